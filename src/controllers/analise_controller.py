@@ -0,0 +1,231 @@
+"""
+Controller para análises de preço e margem sobre o catálogo inteiro
+
+Os dados são lidos em blocos como colunas NumPy de inteiros (valores em
+centavos), sem criar objetos Produto nem Decimal por linha. Cada bloco é
+processado e descartado, então o consumo de memória não depende do tamanho
+do catálogo.
+
+Os métodos não tratam os erros de leitura e cálculo: eles chegam a quem
+chamou, em vez de virarem um resultado vazio que parece válido.
+"""
+import numpy as np
+from models.database import db
+from utils.dinheiro import Dinheiro, BASE_FATOR
+
+# Linhas lidas por bloco
+TAMANHO_BLOCO = 100000
+
+# Limites das faixas de margem (%) usadas na distribuição
+FAIXAS_MARGEM = (-100, 0, 10, 20, 30, 40, 50, 75, 100, 200, 1000)
+
+_SQL_BLOCO = '''
+    SELECT id, preco_custo, preco_venda, estoque_atual,
+           COALESCE(categoria_id, 0)
+    FROM produtos
+    WHERE ativo = 1 AND id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+
+class AnaliseController:
+    """Controlador para análises vetorizadas de preços e margens"""
+    
+    @staticmethod
+    def carregar_blocos(tamanho_bloco=TAMANHO_BLOCO):
+        """
+        Lê os produtos ativos em blocos colunares
+        
+        Yields:
+            dict: Arrays int64 'id', 'custo' e 'venda' (centavos),
+                'estoque' e 'categoria' (0 para sem categoria)
+        """
+        ultimo_id = 0
+        while True:
+            linhas = db.execute_sql(_SQL_BLOCO, (ultimo_id, tamanho_bloco)).fetchall()
+            if not linhas:
+                return
+            
+            dados = np.array(linhas, dtype=np.int64)
+            ultimo_id = int(dados[-1, 0])
+            yield {
+                'id': dados[:, 0],
+                'custo': dados[:, 1],
+                'venda': dados[:, 2],
+                'estoque': dados[:, 3],
+                'categoria': dados[:, 4],
+            }
+    
+    @staticmethod
+    def calcular_margens(custo, venda):
+        """
+        Versão vetorizada de ProdutoController.calcular_margem_lucro
+        
+        Faz as mesmas operações em ponto flutuante, na mesma ordem, e
+        arredonda como round(), então o resultado é o mesmo produto a produto.
+        
+        Args:
+            custo (ndarray): Preços de custo em centavos
+            venda (ndarray): Preços de venda em centavos
+        
+        Returns:
+            ndarray: Margens percentuais (0 onde o custo não é positivo)
+        """
+        margens = np.zeros(len(custo), dtype=np.float64)
+        positivo = custo > 0
+        margens[positivo] = (venda[positivo] - custo[positivo]) / custo[positivo] * 100
+        
+        # np.round multiplica por 100 antes de arredondar; perto da metade do
+        # centésimo isso pode dar outro resultado que round(), que arredonda o
+        # valor exato. Esses poucos casos são arredondados com round().
+        arredondadas = np.round(margens, 2)
+        escala = margens * 100
+        duvidosas = np.abs(escala - np.floor(escala) - 0.5) < 1e-6
+        arredondadas[duvidosas] = [round(margem, 2) for margem in margens[duvidosas].tolist()]
+        return arredondadas
+    
+    @staticmethod
+    def distribuicao_margens(faixas=FAIXAS_MARGEM):
+        """
+        Distribui os produtos com custo informado por faixa de margem
+        
+        Returns:
+            dict: {'faixas': [(inicio, fim, quantidade)], 'media': float,
+                'produtos': int}
+        """
+        limites = np.array((-np.inf,) + tuple(faixas) + (np.inf,))
+        contagens = np.zeros(len(limites) - 1, dtype=np.int64)
+        soma = 0.0
+        total = 0
+        
+        for bloco in AnaliseController.carregar_blocos():
+            com_custo = bloco['custo'] > 0
+            margens = AnaliseController.calcular_margens(
+                bloco['custo'][com_custo], bloco['venda'][com_custo]
+            )
+            contagens += np.histogram(margens, bins=limites)[0]
+            soma += float(margens.sum())
+            total += len(margens)
+        
+        return {
+            'faixas': [(float(limites[i]), float(limites[i + 1]), int(contagens[i]))
+                       for i in range(len(contagens))],
+            'media': round(soma / total, 2) if total else 0,
+            'produtos': total,
+        }
+    
+    @staticmethod
+    def abaixo_da_margem(margem_alvo):
+        """
+        Lista os IDs dos produtos com margem abaixo da meta
+        
+        Args:
+            margem_alvo (float): Margem mínima desejada (%)
+        
+        Returns:
+            ndarray: IDs dos produtos abaixo da meta
+        """
+        encontrados = []
+        for bloco in AnaliseController.carregar_blocos():
+            margens = AnaliseController.calcular_margens(bloco['custo'], bloco['venda'])
+            encontrados.append(bloco['id'][(bloco['custo'] > 0) & (margens < margem_alvo)])
+        
+        if not encontrados:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(encontrados)
+    
+    @staticmethod
+    def valorizacao_estoque():
+        """
+        Calcula o valor do estoque a custo e a preço de venda, por categoria
+        
+        As somas são feitas em centavos inteiros (exatas).
+        
+        Returns:
+            dict: {categoria_id: (valor_custo_centavos, valor_venda_centavos)},
+                com categoria_id None para produtos sem categoria
+        """
+        totais = {}
+        for bloco in AnaliseController.carregar_blocos():
+            estoque = np.maximum(bloco['estoque'], 0)
+            valor_custo = bloco['custo'] * estoque
+            valor_venda = bloco['venda'] * estoque
+            
+            categorias, posicoes = np.unique(bloco['categoria'], return_inverse=True)
+            soma_custo = np.zeros(len(categorias), dtype=np.int64)
+            soma_venda = np.zeros(len(categorias), dtype=np.int64)
+            np.add.at(soma_custo, posicoes, valor_custo)
+            np.add.at(soma_venda, posicoes, valor_venda)
+            
+            for categoria, custo, venda in zip(categorias.tolist(),
+                                               soma_custo.tolist(),
+                                               soma_venda.tolist()):
+                chave = categoria or None
+                anterior = totais.get(chave, (0, 0))
+                totais[chave] = (anterior[0] + custo, anterior[1] + venda)
+        
+        return totais
+    
+    @staticmethod
+    def simular_reajuste(percentual, campo='preco_venda', categoria_id=None):
+        """
+        Simula um reajuste de preço sobre o catálogo inteiro (ou uma categoria)
+        
+        Args:
+            percentual (float): Percentual de reajuste (negativo para reduzir)
+            campo (str): 'preco_venda' ou 'preco_custo'
+            categoria_id (int): Restringe a uma categoria (opcional)
+        
+        Returns:
+            dict: produtos, margem_media_atual, margem_media_nova,
+                abaixo_do_custo, valor do estoque a preço de venda
+                (centavos) antes e depois e erro (campo ou percentual
+                inválido, como em ProdutoController.simular_reajuste)
+        """
+        resumo = {
+            'produtos': 0,
+            'margem_media_atual': 0,
+            'margem_media_nova': 0,
+            'abaixo_do_custo': 0,
+            'valor_venda_atual': 0,
+            'valor_venda_novo': 0,
+            'erro': None,
+        }
+        if campo not in ('preco_venda', 'preco_custo'):
+            resumo['erro'] = "Campo de preço inválido"
+            return resumo
+        fator = Dinheiro.fator_reajuste(percentual)
+        if fator <= 0:
+            resumo['erro'] = "Reajuste deixaria preços negativos"
+            return resumo
+        
+        soma_atual = 0.0
+        soma_nova = 0.0
+        
+        for bloco in AnaliseController.carregar_blocos():
+            if categoria_id is not None:
+                selecao = bloco['categoria'] == categoria_id
+                bloco = {chave: valores[selecao] for chave, valores in bloco.items()}
+            
+            custo, venda = bloco['custo'], bloco['venda']
+            # Arredondamento comercial em centavos, como Dinheiro.reajustado()
+            if campo == 'preco_custo':
+                novo_custo, nova_venda = (custo * fator + BASE_FATOR // 2) // BASE_FATOR, venda
+            else:
+                novo_custo, nova_venda = custo, (venda * fator + BASE_FATOR // 2) // BASE_FATOR
+            
+            estoque = np.maximum(bloco['estoque'], 0)
+            resumo['valor_venda_atual'] += int((venda * estoque).sum())
+            resumo['valor_venda_novo'] += int((nova_venda * estoque).sum())
+            resumo['abaixo_do_custo'] += int((nova_venda < novo_custo).sum())
+            resumo['produtos'] += len(custo)
+            
+            soma_atual += float(AnaliseController.calcular_margens(custo, venda).sum())
+            soma_nova += float(AnaliseController.calcular_margens(novo_custo, nova_venda).sum())
+        
+        if resumo['produtos']:
+            resumo['margem_media_atual'] = round(soma_atual / resumo['produtos'], 2)
+            resumo['margem_media_nova'] = round(soma_nova / resumo['produtos'], 2)
+        
+        return resumo
@@ -1,20 +1,64 @@
 """
 Controller para gerenciamento de categorias
 """
-from models.database import Categoria, db
+from models.database import Categoria, Produto, db
+from peewee import IntegrityError
+from collections import namedtuple
+from datetime import datetime
+
+# Linha somente leitura das listagens
+CategoriaLinha = namedtuple('CategoriaLinha', ['id', 'nome', 'descricao', 'ativo'])
 
 
 class CategoriaController:
     """Controlador para operações com categorias"""
     
+    # Funções chamadas após cada alteração gravada, com
+    # (evento: 'criada' | 'alterada' | 'excluida', categoria: CategoriaLinha);
+    # só os campos gravados vêm preenchidos, os demais ficam None
+    observadores = []
+    
+    @staticmethod
+    def registrar_observador(funcao):
+        """Registra uma função a ser avisada das alterações de categorias"""
+        if funcao not in CategoriaController.observadores:
+            CategoriaController.observadores.append(funcao)
+    
+    @staticmethod
+    def remover_observador(funcao):
+        """Deixa de avisar a função informada"""
+        if funcao in CategoriaController.observadores:
+            CategoriaController.observadores.remove(funcao)
+    
+    @staticmethod
+    def _notificar(evento, categoria):
+        """Avisa os observadores; falhas neles não desfazem a gravação"""
+        for funcao in list(CategoriaController.observadores):
+            try:
+                funcao(evento, categoria)
+            except Exception as e:
+                print(f"Erro ao notificar alteração de categoria: {e}")
+    
     @staticmethod
-    def listar_todas(apenas_ativas=True):
-        """Lista todas as categorias"""
+    def listar_todas(apenas_ativas=True, somente_leitura=False):
+        """
+        Lista todas as categorias
+        
+        Com somente_leitura=True retorna CategoriaLinha (namedtuple) em vez
+        de instâncias de Categoria.
+        """
         try:
-            query = Categoria.select()
+            if somente_leitura:
+                query = Categoria.select(Categoria.id, Categoria.nome,
+                                         Categoria.descricao, Categoria.ativo)
+            else:
+                query = Categoria.select()
             if apenas_ativas:
                 query = query.where(Categoria.ativo == True)
-            return list(query.order_by(Categoria.nome))
+            query = query.order_by(Categoria.nome)
+            if somente_leitura:
+                return list(map(CategoriaLinha._make, query.tuples().iterator()))
+            return list(query)
         except Exception as e:
             print(f"Erro ao listar categorias: {e}")
             return []
@@ -56,57 +100,79 @@ class CategoriaController:
             if not nome or not nome.strip():
                 return False, "Nome é obrigatório", None
             
-            # Verificar se já existe
-            if CategoriaController.buscar_por_nome(nome):
-                return False, "Categoria já cadastrada", None
+            campos = {
+                'nome': nome.strip(),
+                'descricao': descricao.strip() if descricao else '',
+                'ativo': True,
+                'criado_em': datetime.now(),
+            }
+            campos['atualizado_em'] = campos['criado_em']
+            
+            # Criar categoria (o índice único de nome barra duplicações)
+            categoria_id = Categoria.insert(**campos).execute()
             
-            # Criar categoria
-            categoria = Categoria.create(
-                nome=nome.strip(),
-                descricao=descricao.strip() if descricao else '',
-                ativo=True
-            )
+            CategoriaController._notificar('criada', CategoriaLinha(
+                categoria_id, campos['nome'], campos['descricao'], True))
             
-            return True, "Categoria criada com sucesso!", categoria
+            return True, "Categoria criada com sucesso!", Categoria(id=categoria_id, **campos)
             
+        except IntegrityError as e:
+            if 'categorias.nome' in str(e):
+                return False, "Categoria já cadastrada", None
+            return False, f"Erro ao criar categoria: {str(e)}", None
         except Exception as e:
             return False, f"Erro ao criar categoria: {str(e)}", None
     
     @staticmethod
-    def atualizar(categoria_id, nome=None, descricao=None):
+    def atualizar(categoria_id, nome=None, descricao=None, versao=None):
         """
         Atualiza uma categoria
         
+        Apenas os campos informados são gravados.
+        
         Args:
             categoria_id (int): ID da categoria
             nome (str): Novo nome (opcional)
             descricao (str): Nova descrição (opcional)
+            versao (datetime): atualizado_em lido junto com a categoria (opcional);
+                se informado, a gravação falha caso a categoria tenha sido
+                alterada por outro usuário desde então
         
         Returns:
             tuple: (sucesso: bool, mensagem: str)
         """
         try:
-            categoria = Categoria.get_by_id(categoria_id)
+            campos = {'atualizado_em': datetime.now()}
             
             if nome is not None:
                 if not nome.strip():
                     return False, "Nome não pode ser vazio"
                 
-                # Verificar duplicação
-                existe = CategoriaController.buscar_por_nome(nome)
-                if existe and existe.id != categoria_id:
-                    return False, "Já existe outra categoria com este nome"
-                
-                categoria.nome = nome.strip()
+                campos['nome'] = nome.strip()
             
             if descricao is not None:
-                categoria.descricao = descricao.strip()
+                campos['descricao'] = descricao.strip()
+            
+            condicao = Categoria.id == categoria_id
+            if versao is not None:
+                condicao &= Categoria.atualizado_em == versao
+            
+            # O índice único de nome barra duplicações
+            if not Categoria.update(**campos).where(condicao).execute():
+                if versao is not None and Categoria.select().where(Categoria.id == categoria_id).exists():
+                    return False, "Categoria alterada por outro usuário, reabra o cadastro"
+                return False, "Categoria não encontrada"
+            
+            if nome is not None:
+                CategoriaController._notificar('alterada', CategoriaLinha(
+                    categoria_id, campos['nome'], campos.get('descricao'), None))
             
-            categoria.save()
             return True, "Categoria atualizada com sucesso!"
             
-        except Categoria.DoesNotExist:
-            return False, "Categoria não encontrada"
+        except IntegrityError as e:
+            if 'categorias.nome' in str(e):
+                return False, "Já existe outra categoria com este nome"
+            return False, f"Erro ao atualizar categoria: {str(e)}"
         except Exception as e:
             return False, f"Erro ao atualizar categoria: {str(e)}"
     
@@ -122,18 +188,22 @@ class CategoriaController:
             tuple: (sucesso: bool, mensagem: str)
         """
         try:
-            categoria = Categoria.get_by_id(categoria_id)
-            
             # Verificar se tem produtos associados
-            if categoria.produtos.count() > 0:
+            if Produto.select().where(Produto.categoria == categoria_id).exists():
                 return False, "Não é possível excluir categoria com produtos associados"
             
-            categoria.ativo = False
-            categoria.save()
+            query = Categoria.update(
+                ativo=False,
+                atualizado_em=datetime.now()
+            ).where(Categoria.id == categoria_id)
+            
+            if not query.execute():
+                return False, "Categoria não encontrada"
+            
+            CategoriaController._notificar('excluida', CategoriaLinha(
+                categoria_id, None, None, False))
             
             return True, "Categoria excluída com sucesso!"
             
-        except Categoria.DoesNotExist:
-            return False, "Categoria não encontrada"
         except Exception as e:
             return False, f"Erro ao excluir categoria: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,376 @@
+"""
+Controller para gerenciamento de clientes
+"""
+import re
+from models.database import (Cliente, ClienteTermo, ResumoCliente, Venda, db,
+                             indexar_cliente, reindexar_clientes)
+from peewee import IntegrityError, fn
+from collections import namedtuple
+from datetime import datetime
+from utils.dinheiro import Dinheiro
+from utils.texto import somente_digitos, termos
+
+# Linha somente leitura das listagens e sugestões
+ClienteLinha = namedtuple('ClienteLinha', ['id', 'nome', 'cpf_cnpj', 'telefone', 'email'])
+
+# Resumo de compras de um cliente (ver ResumoCliente)
+ResumoLinha = namedtuple('ResumoLinha', [
+    'cliente_id', 'primeira_compra', 'ultima_compra', 'quantidade_compras',
+    'valor_total', 'ticket_medio'
+])
+
+# Limites da busca incremental
+MINIMO_CARACTERES = 2
+LIMITE_SUGESTOES = 50
+
+# Texto digitado que contém só número e pontuação de documento/telefone
+_NUMERICO = re.compile(r'^[\d\s.\-/()+]+$')
+
+# Teto da contagem usada para escolher a palavra mais seletiva
+AMOSTRA_SELETIVIDADE = 1000
+
+# Maior caractere usado como limite superior das buscas por prefixo
+_FIM_PREFIXO = '\uffff'
+
+
+class ClienteController:
+    """Controlador para operações com clientes"""
+    
+    @staticmethod
+    def _colunas():
+        """Colunas lidas nas listagens e sugestões"""
+        return (Cliente.id, Cliente.nome, Cliente.cpf_cnpj, Cliente.telefone, Cliente.email)
+    
+    @staticmethod
+    def listar_todos(apenas_ativos=True):
+        """Lista todos os clientes como ClienteLinha"""
+        try:
+            query = Cliente.select(*ClienteController._colunas())
+            if apenas_ativos:
+                query = query.where(Cliente.ativo == True)
+            query = query.order_by(Cliente.nome)
+            return list(map(ClienteLinha._make, query.tuples().iterator()))
+        except Exception as e:
+            print(f"Erro ao listar clientes: {e}")
+            return []
+    
+    @staticmethod
+    def buscar_por_id(cliente_id):
+        """Busca cliente por ID"""
+        try:
+            return Cliente.get_by_id(cliente_id)
+        except Exception as e:
+            print(f"Erro ao buscar cliente: {e}")
+            return None
+    
+    @staticmethod
+    def buscar_por_documento(cpf_cnpj):
+        """Busca cliente pelo CPF/CNPJ, com ou sem pontuação"""
+        try:
+            chave = somente_digitos(cpf_cnpj)
+            if not chave:
+                return None
+            return Cliente.get(Cliente.chave_documento == chave)
+        except Cliente.DoesNotExist:
+            return None
+        except Exception as e:
+            print(f"Erro ao buscar cliente por documento: {e}")
+            return None
+    
+    @staticmethod
+    def _frequencia(prefixo):
+        """Quantas palavras de nomes têm o prefixo (contagem limitada)"""
+        amostra = (ClienteTermo
+                   .select(ClienteTermo.id)
+                   .where((ClienteTermo.termo >= prefixo) &
+                          (ClienteTermo.termo < prefixo + _FIM_PREFIXO))
+                   .limit(AMOSTRA_SELETIVIDADE))
+        return amostra.count()
+    
+    @staticmethod
+    def _tem_termo(prefixo):
+        """Condição: o cliente tem alguma palavra do nome com o prefixo informado"""
+        termo = ClienteTermo.alias()
+        return fn.EXISTS(
+            termo.select(termo.id)
+            .where((termo.cliente == Cliente.id) &
+                   (termo.termo >= prefixo) &
+                   (termo.termo < prefixo + _FIM_PREFIXO))
+        )
+    
+    @staticmethod
+    def sugerir(texto, limite=10):
+        """
+        Sugestões de clientes ativos para a busca incremental
+        
+        Texto numérico (com ou sem pontuação) é procurado como prefixo do
+        CPF/CNPJ e do telefone. Caso contrário, cada palavra digitada é
+        prefixo de alguma palavra do nome, sem diferenciar acentos nem
+        maiúsculas ('jo si' encontra 'José da Silva').
+        
+        Todas as buscas são por faixa nos índices e param ao atingir o
+        limite, então o tempo não cresce com o tamanho do cadastro.
+        
+        Args:
+            texto (str): Texto digitado
+            limite (int): Quantidade máxima de sugestões (até LIMITE_SUGESTOES)
+        
+        Returns:
+            list: ClienteLinha ordenadas por nome
+        """
+        try:
+            texto = (texto or '').strip()
+            limite = max(1, min(limite, LIMITE_SUGESTOES))
+            if len(texto) < MINIMO_CARACTERES:
+                return []
+            
+            if _NUMERICO.match(texto):
+                digitos = somente_digitos(texto)
+                condicao = (
+                    ((Cliente.chave_documento >= digitos) &
+                     (Cliente.chave_documento < digitos + _FIM_PREFIXO)) |
+                    ((Cliente.chave_telefone >= digitos) &
+                     (Cliente.chave_telefone < digitos + _FIM_PREFIXO))
+                )
+                query = (Cliente
+                         .select(*ClienteController._colunas())
+                         .where(condicao & (Cliente.ativo == True))
+                         .limit(limite))
+                linhas = list(map(ClienteLinha._make, query.tuples()))
+            else:
+                palavras = termos(texto)
+                if not palavras:
+                    return []
+                
+                # A palavra mais seletiva conduz a busca pelo índice e as
+                # demais viram filtros EXISTS
+                if len(palavras) > 1:
+                    palavras.sort(key=ClienteController._frequencia)
+                principal = palavras[0]
+                query = (Cliente
+                         .select(*ClienteController._colunas())
+                         .join(ClienteTermo)
+                         .where((ClienteTermo.termo >= principal) &
+                                (ClienteTermo.termo < principal + _FIM_PREFIXO))
+                         .order_by(ClienteTermo.termo))
+                for palavra in palavras[1:]:
+                    query = query.where(ClienteController._tem_termo(palavra))
+                
+                # Um cliente pode casar por mais de uma palavra do nome
+                linhas = []
+                vistos = set()
+                for linha in query.tuples().iterator():
+                    if linha[0] not in vistos:
+                        vistos.add(linha[0])
+                        linhas.append(ClienteLinha._make(linha))
+                        if len(linhas) >= limite:
+                            break
+            
+            return sorted(linhas, key=lambda linha: linha.nome)
+        except Exception as e:
+            print(f"Erro ao sugerir clientes: {e}")
+            return []
+    
+    @staticmethod
+    def criar(dados):
+        """
+        Cria um novo cliente
+        
+        Args:
+            dados (dict): Dados do cliente
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str, cliente: Cliente)
+        """
+        try:
+            # Validações
+            nome = (dados.get('nome') or '').strip()
+            if not nome:
+                return False, "Nome é obrigatório", None
+            
+            campos = {
+                'nome': nome,
+                'cpf_cnpj': (dados.get('cpf_cnpj') or '').strip() or None,
+                'email': (dados.get('email') or '').strip() or None,
+                'telefone': (dados.get('telefone') or '').strip() or None,
+                'endereco': (dados.get('endereco') or '').strip() or None,
+                'ativo': True,
+                'criado_em': datetime.now(),
+            }
+            
+            if campos['cpf_cnpj'] and ClienteController.buscar_por_documento(campos['cpf_cnpj']):
+                return False, "CPF/CNPJ já cadastrado", None
+            
+            with db.atomic():
+                cliente_id = Cliente.insert(**campos).execute()
+                indexar_cliente(cliente_id, campos['nome'], campos['cpf_cnpj'],
+                                campos['telefone'])
+            
+            return True, "Cliente criado com sucesso!", Cliente(id=cliente_id, **campos)
+        
+        except IntegrityError as e:
+            if 'clientes.cpf_cnpj' in str(e):
+                return False, "CPF/CNPJ já cadastrado", None
+            return False, f"Erro ao criar cliente: {str(e)}", None
+        except Exception as e:
+            return False, f"Erro ao criar cliente: {str(e)}", None
+    
+    @staticmethod
+    def atualizar(cliente_id, dados):
+        """
+        Atualiza um cliente
+        
+        Args:
+            cliente_id (int): ID do cliente
+            dados (dict): Dados a atualizar
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            cliente = Cliente.get_or_none(Cliente.id == cliente_id)
+            if not cliente:
+                return False, "Cliente não encontrado"
+            
+            if 'nome' in dados:
+                if not (dados['nome'] or '').strip():
+                    return False, "Nome não pode ser vazio"
+                cliente.nome = dados['nome'].strip()
+            
+            for campo in ('cpf_cnpj', 'email', 'telefone', 'endereco'):
+                if campo in dados:
+                    setattr(cliente, campo, (dados[campo] or '').strip() or None)
+            
+            if 'cpf_cnpj' in dados and cliente.cpf_cnpj:
+                existente = ClienteController.buscar_por_documento(cliente.cpf_cnpj)
+                if existente and existente.id != cliente.id:
+                    return False, "CPF/CNPJ já cadastrado para outro cliente"
+            
+            with db.atomic():
+                cliente.save()
+                indexar_cliente(cliente.id, cliente.nome, cliente.cpf_cnpj,
+                                cliente.telefone, cliente.ativo)
+            
+            return True, "Cliente atualizado com sucesso!"
+        
+        except IntegrityError as e:
+            if 'clientes.cpf_cnpj' in str(e):
+                return False, "CPF/CNPJ já cadastrado para outro cliente"
+            return False, f"Erro ao atualizar cliente: {str(e)}"
+        except Exception as e:
+            return False, f"Erro ao atualizar cliente: {str(e)}"
+    
+    @staticmethod
+    def excluir(cliente_id):
+        """
+        Exclui (inativa) um cliente
+        
+        O cliente deixa de aparecer nas sugestões.
+        
+        Args:
+            cliente_id (int): ID do cliente
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            with db.atomic():
+                if not Cliente.update(ativo=False).where(Cliente.id == cliente_id).execute():
+                    return False, "Cliente não encontrado"
+                ClienteTermo.delete().where(ClienteTermo.cliente == cliente_id).execute()
+            
+            return True, "Cliente excluído com sucesso!"
+        
+        except Exception as e:
+            return False, f"Erro ao excluir cliente: {str(e)}"
+    
+    @staticmethod
+    def resumo_compras(cliente_id):
+        """
+        Resumo das compras do cliente, lido de clientes_resumo (uma linha)
+        
+        Returns:
+            ResumoLinha: Zerado se o cliente ainda não comprou
+        """
+        try:
+            resumo = ResumoCliente.get_or_none(ResumoCliente.cliente == cliente_id)
+            if not resumo:
+                return ResumoLinha(cliente_id, None, None, 0, Dinheiro(0), Dinheiro(0))
+            return ResumoLinha(cliente_id, resumo.primeira_compra, resumo.ultima_compra,
+                               resumo.quantidade_compras, resumo.valor_total,
+                               resumo.ticket_medio)
+        except Exception as e:
+            print(f"Erro ao buscar resumo de compras: {e}")
+            return None
+    
+    @staticmethod
+    def ultimas_compras(cliente_id, limite=10):
+        """Vendas mais recentes do cliente (índice cliente/data)"""
+        try:
+            return list(Venda.select()
+                        .where(Venda.cliente == cliente_id)
+                        .order_by(Venda.data_venda.desc())
+                        .limit(limite))
+        except Exception as e:
+            print(f"Erro ao listar compras do cliente: {e}")
+            return []
+    
+    @staticmethod
+    def segmentar_rfm(data_referencia=None, faixas=5):
+        """
+        Notas de recência, frequência e valor (RFM) de cada cliente
+        
+        Usa apenas clientes_resumo, sem ler as vendas. Cada nota vai de 1 a
+        faixas conforme a posição do cliente entre os demais (faixas de
+        mesmo tamanho); nota maior é melhor: compra mais recente, mais
+        compras, maior valor.
+        
+        Args:
+            data_referencia (datetime): Data base da recência (padrão: agora)
+            faixas (int): Quantidade de faixas das notas
+        
+        Returns:
+            dict: {cliente_id: (recencia, frequencia, valor)}
+        """
+        try:
+            referencia = data_referencia or datetime.now()
+            linhas = list(ResumoCliente
+                          .select(ResumoCliente.cliente, ResumoCliente.ultima_compra,
+                                  ResumoCliente.quantidade_compras,
+                                  ResumoCliente.valor_total)
+                          .where(ResumoCliente.quantidade_compras > 0)
+                          .tuples())
+            total = len(linhas)
+            if not total:
+                return {}
+            
+            def notas(chave):
+                ordenados = sorted(linhas, key=chave)
+                return {linha[0]: 1 + posicao * faixas // total
+                        for posicao, linha in enumerate(ordenados)}
+            
+            recencia = notas(lambda linha: -(referencia - linha[1]).total_seconds())
+            frequencia = notas(lambda linha: linha[2])
+            valor = notas(lambda linha: linha[3].centavos)
+            
+            return {cliente_id: (recencia[cliente_id], frequencia[cliente_id],
+                                 valor[cliente_id])
+                    for cliente_id in recencia}
+        except Exception as e:
+            print(f"Erro ao segmentar clientes: {e}")
+            return {}
+    
+    @staticmethod
+    def reindexar():
+        """
+        Regera as chaves de busca de todos os clientes
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            total = reindexar_clientes()
+            return True, f"{total} clientes reindexados"
+        except Exception as e:
+            return False, f"Erro ao reindexar clientes: {str(e)}"
+
@@ -0,0 +1,238 @@
+"""
+Controller para gerenciamento de locais (lojas e depósitos) e do estoque por local
+"""
+from models.database import Local, EstoqueLocal, Produto, LOCAL_PADRAO, db
+from peewee import IntegrityError
+from collections import namedtuple
+from datetime import datetime
+
+# Estoque de um produto em um local
+EstoqueLocalLinha = namedtuple('EstoqueLocalLinha', [
+    'produto_id', 'codigo', 'nome', 'quantidade', 'estoque_minimo'
+])
+
+# Estoque de um produto em cada local
+EstoquePorLocalLinha = namedtuple('EstoquePorLocalLinha', [
+    'local_id', 'local_nome', 'quantidade', 'estoque_minimo'
+])
+
+TIPOS_LOCAL = ('loja', 'deposito')
+
+
+class LocalController:
+    """Controlador para operações com locais"""
+    
+    @staticmethod
+    def listar_todos(apenas_ativos=True):
+        """Lista os locais em ordem alfabética"""
+        try:
+            query = Local.select()
+            if apenas_ativos:
+                query = query.where(Local.ativo == True)
+            return list(query.order_by(Local.nome))
+        except Exception as e:
+            print(f"Erro ao listar locais: {e}")
+            return []
+    
+    @staticmethod
+    def buscar_por_id(local_id):
+        """Busca local por ID"""
+        try:
+            return Local.get_by_id(local_id)
+        except Exception as e:
+            print(f"Erro ao buscar local: {e}")
+            return None
+    
+    @staticmethod
+    def criar(dados):
+        """
+        Cria um novo local
+        
+        Args:
+            dados (dict): Dicionário com os dados do local
+                - nome: str
+                - tipo: str ('loja' ou 'deposito')
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str, local: Local)
+        """
+        try:
+            if not dados.get('nome'):
+                return False, "Nome é obrigatório", None
+            
+            tipo = dados.get('tipo', 'loja')
+            if tipo not in TIPOS_LOCAL:
+                return False, "Tipo deve ser loja ou depósito", None
+            
+            local = Local.create(nome=dados['nome'], tipo=tipo)
+            return True, "Local cadastrado com sucesso!", local
+        
+        except IntegrityError as e:
+            if 'locais.nome' in str(e):
+                return False, "Local já cadastrado", None
+            return False, f"Erro ao criar local: {str(e)}", None
+        except Exception as e:
+            return False, f"Erro ao criar local: {str(e)}", None
+    
+    @staticmethod
+    def atualizar(local_id, dados):
+        """
+        Atualiza nome e/ou tipo de um local
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            if 'nome' in dados and not dados['nome']:
+                return False, "Nome é obrigatório"
+            
+            if 'tipo' in dados and dados['tipo'] not in TIPOS_LOCAL:
+                return False, "Tipo deve ser loja ou depósito"
+            
+            campos = {campo: dados[campo] for campo in ('nome', 'tipo') if campo in dados}
+            campos['atualizado_em'] = datetime.now()
+            
+            if not Local.update(**campos).where(Local.id == local_id).execute():
+                return False, "Local não encontrado"
+            
+            return True, "Local atualizado com sucesso!"
+        
+        except IntegrityError as e:
+            if 'locais.nome' in str(e):
+                return False, "Já existe um local com esse nome"
+            return False, f"Erro ao atualizar local: {str(e)}"
+        except Exception as e:
+            return False, f"Erro ao atualizar local: {str(e)}"
+    
+    @staticmethod
+    def excluir(local_id):
+        """
+        Exclui (inativa) um local
+        
+        O local padrão e locais que ainda têm estoque não podem ser excluídos.
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            if local_id == LOCAL_PADRAO:
+                return False, "O local padrão não pode ser excluído"
+            
+            com_estoque = (EstoqueLocal
+                           .select()
+                           .where((EstoqueLocal.local == local_id) &
+                                  (EstoqueLocal.quantidade != 0))
+                           .exists())
+            if com_estoque:
+                return False, "Local ainda tem estoque; transfira-o antes de excluir"
+            
+            query = Local.update(
+                ativo=False,
+                atualizado_em=datetime.now()
+            ).where(Local.id == local_id)
+            
+            if not query.execute():
+                return False, "Local não encontrado"
+            
+            return True, "Local excluído com sucesso!"
+        
+        except Exception as e:
+            return False, f"Erro ao excluir local: {str(e)}"
+    
+    @staticmethod
+    def _linhas_do_local(local_id, condicao=None):
+        """Estoque do local, lido pela chave (local, produto)"""
+        query = (EstoqueLocal
+                 .select(Produto.id, Produto.codigo, Produto.nome,
+                         EstoqueLocal.quantidade, EstoqueLocal.estoque_minimo)
+                 .join(Produto)
+                 .where((EstoqueLocal.local == local_id) & (Produto.ativo == True)))
+        if condicao is not None:
+            query = query.where(condicao)
+        query = query.order_by(Produto.nome)
+        return list(map(EstoqueLocalLinha._make, query.tuples().iterator()))
+    
+    @staticmethod
+    def listar_estoque(local_id):
+        """
+        Lista o estoque dos produtos ativos em um local
+        
+        Returns:
+            list: EstoqueLocalLinha, em ordem de nome
+        """
+        try:
+            return LocalController._linhas_do_local(local_id)
+        except Exception as e:
+            print(f"Erro ao listar estoque do local: {e}")
+            return []
+    
+    @staticmethod
+    def listar_abaixo_estoque_minimo(local_id):
+        """
+        Lista os produtos abaixo do mínimo em um local
+        
+        A condição é a do índice parcial de estoque_locais, então só as
+        linhas abaixo do mínimo daquele local são lidas.
+        
+        Returns:
+            list: EstoqueLocalLinha, em ordem de nome
+        """
+        try:
+            return LocalController._linhas_do_local(
+                local_id, EstoqueLocal.quantidade <= EstoqueLocal.estoque_minimo
+            )
+        except Exception as e:
+            print(f"Erro ao listar produtos abaixo do estoque mínimo do local: {e}")
+            return []
+    
+    @staticmethod
+    def estoque_por_local(produto_id):
+        """
+        Estoque de um produto em cada local ativo
+        
+        Returns:
+            list: EstoquePorLocalLinha, em ordem de nome do local
+        """
+        try:
+            query = (EstoqueLocal
+                     .select(Local.id, Local.nome, EstoqueLocal.quantidade,
+                             EstoqueLocal.estoque_minimo)
+                     .join(Local)
+                     .where((EstoqueLocal.produto == produto_id) & (Local.ativo == True))
+                     .order_by(Local.nome))
+            return list(map(EstoquePorLocalLinha._make, query.tuples().iterator()))
+        except Exception as e:
+            print(f"Erro ao listar estoque por local: {e}")
+            return []
+    
+    @staticmethod
+    def definir_estoque_minimo(local_id, produto_id, estoque_minimo):
+        """
+        Define o estoque mínimo de um produto em um local
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            if estoque_minimo < 0:
+                return False, "Estoque mínimo não pode ser negativo"
+            
+            if not Produto.select().where(Produto.id == produto_id).exists():
+                return False, "Produto não encontrado"
+            
+            if not Local.select().where((Local.id == local_id) & (Local.ativo == True)).exists():
+                return False, "Local não encontrado"
+            
+            with db.atomic():
+                (EstoqueLocal
+                 .insert(local=local_id, produto=produto_id, quantidade=0,
+                         estoque_minimo=estoque_minimo, atualizado_em=datetime.now())
+                 .on_conflict(
+                     conflict_target=[EstoqueLocal.local, EstoqueLocal.produto],
+                     preserve=[EstoqueLocal.estoque_minimo, EstoqueLocal.atualizado_em])
+                 .execute())
+            
+            return True, "Estoque mínimo atualizado com sucesso!"
+        
+        except Exception as e:
+            return False, f"Erro ao definir estoque mínimo: {str(e)}"
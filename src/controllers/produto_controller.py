@@ -1,22 +1,84 @@
 """
 Controller para gerenciamento de produtos
 """
-from models.database import Produto, Categoria, MovimentacaoEstoque, db
+from models.database import (Produto, Categoria, MovimentacaoEstoque,
+                             AlteracaoLote, AlteracaoLoteItem, PrevisaoReposicao,
+                             Local, EstoqueLocal, LOCAL_PADRAO, movimentar_estoque, db)
+from peewee import IntegrityError, JOIN, Value, fn, Expression, OP
+from collections import namedtuple
 from datetime import datetime
-from decimal import Decimal
+from models.consultas import ConsultaPreparada
+from utils.dinheiro import Dinheiro, BASE_FATOR
+
+# Linha somente leitura das listagens, com o nome da categoria já resolvido
+ProdutoLinha = namedtuple('ProdutoLinha', [
+    'id', 'codigo', 'nome', 'categoria_nome', 'preco_custo', 'preco_venda',
+    'estoque_atual', 'estoque_minimo', 'ativo'
+])
+
+# Sugestão de compra, a partir da tabela previsoes_reposicao
+ReposicaoLinha = namedtuple('ReposicaoLinha', [
+    'id', 'codigo', 'nome', 'estoque_atual', 'ponto_pedido', 'estoque_alvo',
+    'quantidade_sugerida', 'demanda_diaria'
+])
+
+
+def _consulta_linhas(condicao=None):
+    """Consulta das listagens somente leitura (ver ProdutoController._listar_linhas)"""
+    query = (Produto
+             .select(Produto.id, Produto.codigo, Produto.nome, Categoria.nome,
+                     Produto.preco_custo, Produto.preco_venda,
+                     Produto.estoque_atual, Produto.estoque_minimo,
+                     Produto.ativo)
+             .join(Categoria, JOIN.LEFT_OUTER)
+             .order_by(Produto.nome))
+    if condicao is not None:
+        query = query.where(condicao)
+    return query
+
+
+# Consultas mais frequentes, com o SQL gerado uma única vez
+_POR_ID = ConsultaPreparada(
+    lambda produto_id: Produto.select().where(Produto.id == produto_id).limit(1),
+    Produto.id)
+_POR_CODIGO = ConsultaPreparada(
+    lambda codigo: Produto.select().where(Produto.codigo == codigo).limit(1),
+    Produto.codigo)
+_TODOS = ConsultaPreparada(lambda: Produto.select().order_by(Produto.nome))
+_TODOS_ATIVOS = ConsultaPreparada(
+    lambda: Produto.select().where(Produto.ativo == True).order_by(Produto.nome))
+_LINHAS = ConsultaPreparada(_consulta_linhas, linha=ProdutoLinha)
+_LINHAS_ATIVAS = ConsultaPreparada(
+    lambda: _consulta_linhas(Produto.ativo == True), linha=ProdutoLinha)
 
 
 class ProdutoController:
     """Controlador para operações com produtos"""
     
     @staticmethod
-    def listar_todos(apenas_ativos=True):
-        """Lista todos os produtos"""
+    def _listar_linhas(condicao):
+        """
+        Lista produtos como ProdutoLinha, sem instanciar modelos
+        
+        Apenas as colunas exibidas são lidas e a categoria vem do JOIN,
+        evitando uma consulta por produto.
+        """
+        return list(map(ProdutoLinha._make, _consulta_linhas(condicao).tuples().iterator()))
+    
+    @staticmethod
+    def listar_todos(apenas_ativos=True, somente_leitura=False):
+        """
+        Lista todos os produtos
+        
+        Com somente_leitura=True retorna ProdutoLinha (namedtuple) em vez
+        de instâncias de Produto: bem mais leve para exibir tabelas grandes.
+        """
         try:
-            query = Produto.select()
-            if apenas_ativos:
-                query = query.where(Produto.ativo == True)
-            return list(query.order_by(Produto.nome))
+            if somente_leitura:
+                consulta = _LINHAS_ATIVAS if apenas_ativos else _LINHAS
+            else:
+                consulta = _TODOS_ATIVOS if apenas_ativos else _TODOS
+            return consulta.executar()
         except Exception as e:
             print(f"Erro ao listar produtos: {e}")
             return []
@@ -25,7 +87,10 @@ class ProdutoController:
     def buscar_por_id(produto_id):
         """Busca produto por ID"""
         try:
-            return Produto.get_by_id(produto_id)
+            produto = _POR_ID.primeiro(produto_id)
+            if produto is None:
+                print(f"Erro ao buscar produto: produto {produto_id} não existe")
+            return produto
         except Exception as e:
             print(f"Erro ao buscar produto: {e}")
             return None
@@ -34,9 +99,7 @@ class ProdutoController:
     def buscar_por_codigo(codigo):
         """Busca produto por código"""
         try:
-            return Produto.get(Produto.codigo == codigo)
-        except Produto.DoesNotExist:
-            return None
+            return _POR_CODIGO.primeiro(codigo)
         except Exception as e:
             print(f"Erro ao buscar produto por código: {e}")
             return None
@@ -57,6 +120,7 @@ class ProdutoController:
                 - estoque_atual: int
                 - estoque_minimo: int
                 - unidade_medida: str
+                - local_id: int (opcional, local do estoque inicial)
         
         Returns:
             tuple: (sucesso: bool, mensagem: str, produto: Produto)
@@ -69,13 +133,9 @@ class ProdutoController:
             if not dados.get('nome'):
                 return False, "Nome é obrigatório", None
             
-            # Verificar se código já existe
-            if ProdutoController.buscar_por_codigo(dados['codigo']):
-                return False, "Código já cadastrado", None
-            
             # Validar preços
-            preco_custo = Decimal(str(dados.get('preco_custo', 0)))
-            preco_venda = Decimal(str(dados.get('preco_venda', 0)))
+            preco_custo = Dinheiro.de_reais(dados.get('preco_custo', 0))
+            preco_venda = Dinheiro.de_reais(dados.get('preco_venda', 0))
             
             if preco_custo < 0:
                 return False, "Preço de custo não pode ser negativo", None
@@ -83,84 +143,140 @@ class ProdutoController:
             if preco_venda < 0:
                 return False, "Preço de venda não pode ser negativo", None
             
-            # Criar produto
+            # O local padrão sempre existe; os demais são conferidos
+            local_id = dados.get('local_id', LOCAL_PADRAO)
+            if local_id != LOCAL_PADRAO:
+                condicao = (Local.id == local_id) & (Local.ativo == True)
+                if not Local.select().where(condicao).exists():
+                    return False, "Local não encontrado", None
+            
+            campos = {
+                'codigo': dados['codigo'],
+                'nome': dados['nome'],
+                'descricao': dados.get('descricao', ''),
+                'categoria': dados.get('categoria_id'),
+                'preco_custo': preco_custo,
+                'preco_venda': preco_venda,
+                'estoque_atual': dados.get('estoque_atual', 0),
+                'estoque_minimo': dados.get('estoque_minimo', 0),
+                'unidade_medida': dados.get('unidade_medida', 'UN'),
+                'ativo': True,
+                'criado_em': datetime.now(),
+            }
+            campos['atualizado_em'] = campos['criado_em']
+            
+            # Criar produto (o índice único de código barra duplicações)
             with db.atomic():
-                produto = Produto.create(
-                    codigo=dados['codigo'],
-                    nome=dados['nome'],
-                    descricao=dados.get('descricao', ''),
-                    categoria=dados.get('categoria_id'),
-                    preco_custo=preco_custo,
-                    preco_venda=preco_venda,
-                    estoque_atual=dados.get('estoque_atual', 0),
-                    estoque_minimo=dados.get('estoque_minimo', 0),
-                    unidade_medida=dados.get('unidade_medida', 'UN'),
-                    ativo=True
-                )
+                produto_id = Produto.insert(**campos).execute()
+                
+                # O local padrão sempre tem a linha do produto, com o estoque
+                # mínimo do cadastro, mesmo sem estoque; o estoque inicial
+                # fica no local informado
+                locais = {LOCAL_PADRAO: 0}
+                locais[local_id] = campos['estoque_atual']
+                EstoqueLocal.insert_many([
+                    {
+                        'local': local,
+                        'produto': produto_id,
+                        'quantidade': quantidade,
+                        'estoque_minimo': campos['estoque_minimo'],
+                        'atualizado_em': campos['criado_em'],
+                    }
+                    for local, quantidade in locais.items()
+                    if local == LOCAL_PADRAO or quantidade > 0
+                ]).execute()
                 
-                # Registrar movimentação inicial se houver estoque
-                if produto.estoque_atual > 0:
-                    MovimentacaoEstoque.create(
-                        produto=produto,
+                # Movimentação do estoque inicial
+                if campos['estoque_atual'] > 0:
+                    MovimentacaoEstoque.insert(
+                        produto=produto_id,
+                        local=local_id,
                         tipo='entrada',
-                        quantidade=produto.estoque_atual,
+                        quantidade=campos['estoque_atual'],
                         estoque_anterior=0,
-                        estoque_atual=produto.estoque_atual,
+                        estoque_atual=campos['estoque_atual'],
                         motivo='Estoque inicial',
-                        observacoes='Cadastro do produto'
-                    )
-                
-                return True, "Produto cadastrado com sucesso!", produto
+                        observacoes='Cadastro do produto',
+                        data_movimentacao=campos['criado_em']
+                    ).execute()
+            
+            return True, "Produto cadastrado com sucesso!", Produto(id=produto_id, **campos)
                 
+        except IntegrityError as e:
+            if 'produtos.codigo' in str(e):
+                return False, "Código já cadastrado", None
+            return False, f"Erro ao criar produto: {str(e)}", None
         except Exception as e:
             return False, f"Erro ao criar produto: {str(e)}", None
     
     @staticmethod
-    def atualizar(produto_id, dados):
+    def atualizar(produto_id, dados, versao=None):
         """
         Atualiza um produto existente
         
+        Apenas os campos presentes em dados são gravados. O estoque mínimo
+        do produto é o do local padrão; o dos demais locais é definido em
+        LocalController.definir_estoque_minimo.
+        
         Args:
             produto_id (int): ID do produto
             dados (dict): Dicionário com os dados a atualizar
+            versao (datetime): atualizado_em lido junto com o produto (opcional);
+                se informado, a gravação falha caso o produto tenha sido
+                alterado por outro usuário desde então
         
         Returns:
             tuple: (sucesso: bool, mensagem: str)
         """
         try:
-            produto = Produto.get_by_id(produto_id)
-            
             # Validações
-            if 'codigo' in dados and dados['codigo'] != produto.codigo:
-                if ProdutoController.buscar_por_codigo(dados['codigo']):
-                    return False, "Código já cadastrado para outro produto"
-            
             if 'nome' in dados and not dados['nome']:
                 return False, "Nome é obrigatório"
             
             # Validar preços se informados
             if 'preco_custo' in dados:
-                preco_custo = Decimal(str(dados['preco_custo']))
+                preco_custo = Dinheiro.de_reais(dados['preco_custo'])
                 if preco_custo < 0:
                     return False, "Preço de custo não pode ser negativo"
                 dados['preco_custo'] = preco_custo
             
             if 'preco_venda' in dados:
-                preco_venda = Decimal(str(dados['preco_venda']))
+                preco_venda = Dinheiro.de_reais(dados['preco_venda'])
                 if preco_venda < 0:
                     return False, "Preço de venda não pode ser negativo"
                 dados['preco_venda'] = preco_venda
             
-            # Atualizar produto
+            # Atualizar produto (o índice único de código barra duplicações)
             dados['atualizado_em'] = datetime.now()
             
-            query = Produto.update(**dados).where(Produto.id == produto_id)
-            query.execute()
+            condicao = Produto.id == produto_id
+            if versao is not None:
+                condicao &= Produto.atualizado_em == versao
+            
+            with db.atomic():
+                query = Produto.update(**dados).where(condicao)
+                if not query.execute():
+                    if versao is not None and Produto.select().where(Produto.id == produto_id).exists():
+                        return False, "Produto alterado por outro usuário, reabra o cadastro"
+                    return False, "Produto não encontrado"
+                
+                # O mínimo do produto acompanha o do local padrão
+                if 'estoque_minimo' in dados:
+                    (EstoqueLocal
+                     .insert(local=LOCAL_PADRAO, produto=produto_id, quantidade=0,
+                             estoque_minimo=dados['estoque_minimo'],
+                             atualizado_em=dados['atualizado_em'])
+                     .on_conflict(
+                         conflict_target=[EstoqueLocal.local, EstoqueLocal.produto],
+                         preserve=[EstoqueLocal.estoque_minimo, EstoqueLocal.atualizado_em])
+                     .execute())
             
             return True, "Produto atualizado com sucesso!"
             
-        except Produto.DoesNotExist:
-            return False, "Produto não encontrado"
+        except IntegrityError as e:
+            if 'produtos.codigo' in str(e):
+                return False, "Código já cadastrado para outro produto"
+            return False, f"Erro ao atualizar produto: {str(e)}"
         except Exception as e:
             return False, f"Erro ao atualizar produto: {str(e)}"
     
@@ -176,21 +292,29 @@ class ProdutoController:
             tuple: (sucesso: bool, mensagem: str)
         """
         try:
-            produto = Produto.get_by_id(produto_id)
-            produto.ativo = False
-            produto.save()
+            query = Produto.update(
+                ativo=False,
+                atualizado_em=datetime.now()
+            ).where(Produto.id == produto_id)
+            
+            if not query.execute():
+                return False, "Produto não encontrado"
             
             return True, "Produto excluído com sucesso!"
             
-        except Produto.DoesNotExist:
-            return False, "Produto não encontrado"
         except Exception as e:
             return False, f"Erro ao excluir produto: {str(e)}"
     
     @staticmethod
-    def ajustar_estoque(produto_id, quantidade, tipo, motivo, observacoes=''):
+    def ajustar_estoque(produto_id, quantidade, tipo, motivo, observacoes='',
+                        local_id=LOCAL_PADRAO):
         """
-        Ajusta o estoque de um produto
+        Ajusta o estoque de um produto em um local
+        
+        O total do produto (estoque_atual) acompanha o ajuste. A quantidade é
+        somada no próprio UPDATE (estoque + quantidade), que numa saída só
+        vale se o resultado for >= 0: não há leitura prévia, então ajustes
+        simultâneos não se perdem nem deixam o estoque negativo.
         
         Args:
             produto_id (int): ID do produto
@@ -198,55 +322,148 @@ class ProdutoController:
             tipo (str): 'entrada', 'saida' ou 'ajuste'
             motivo (str): Motivo da movimentação
             observacoes (str): Observações adicionais
+            local_id (int): Loja ou depósito (padrão: LOCAL_PADRAO)
         
         Returns:
             tuple: (sucesso: bool, mensagem: str)
         """
         try:
+            # O local padrão sempre existe; os demais são conferidos
+            if local_id != LOCAL_PADRAO:
+                condicao = (Local.id == local_id) & (Local.ativo == True)
+                if not Local.select().where(condicao).exists():
+                    return False, "Local não encontrado"
+            
             with db.atomic():
-                produto = Produto.get_by_id(produto_id)
-                estoque_anterior = produto.estoque_atual
-                
-                # Validar estoque negativo
-                if estoque_anterior + quantidade < 0:
+                # Soma no próprio UPDATE, condicionada a estoque + quantidade >= 0
+                estoques = movimentar_estoque(produto_id, local_id, quantidade)
+                if estoques is None:
+                    if not Produto.select().where(Produto.id == produto_id).exists():
+                        return False, "Produto não encontrado"
                     return False, "Estoque não pode ficar negativo"
                 
-                # Atualizar estoque
-                produto.estoque_atual += quantidade
-                produto.atualizado_em = datetime.now()
-                produto.save()
-                
                 # Registrar movimentação
-                MovimentacaoEstoque.create(
-                    produto=produto,
+                MovimentacaoEstoque.insert(
+                    produto=produto_id,
+                    local=local_id,
                     tipo=tipo,
                     quantidade=abs(quantidade),
-                    estoque_anterior=estoque_anterior,
-                    estoque_atual=produto.estoque_atual,
+                    estoque_anterior=estoques[0],
+                    estoque_atual=estoques[1],
                     motivo=motivo,
                     observacoes=observacoes
-                )
+                ).execute()
                 
                 return True, "Estoque ajustado com sucesso!"
                 
-        except Produto.DoesNotExist:
-            return False, "Produto não encontrado"
         except Exception as e:
             return False, f"Erro ao ajustar estoque: {str(e)}"
     
     @staticmethod
-    def listar_abaixo_estoque_minimo():
+    def transferir(produto_id, origem_id, destino_id, quantidade, observacoes=''):
+        """
+        Transfere estoque de um local para outro
+        
+        Saída da origem, entrada no destino e as duas movimentações são
+        gravadas na mesma transação; o total do produto não muda.
+        
+        Args:
+            produto_id (int): ID do produto
+            origem_id (int): Local de onde sai o estoque
+            destino_id (int): Local que recebe o estoque
+            quantidade (int): Quantidade transferida (positiva)
+            observacoes (str): Observações adicionais
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            if quantidade <= 0:
+                return False, "Quantidade deve ser maior que zero"
+            
+            if origem_id == destino_id:
+                return False, "Origem e destino devem ser diferentes"
+            
+            locais = (Local
+                      .select()
+                      .where(Local.id.in_([origem_id, destino_id]) & (Local.ativo == True))
+                      .count())
+            if locais != 2:
+                return False, "Local não encontrado"
+            
+            with db.atomic():
+                saida = movimentar_estoque(produto_id, origem_id, -quantidade)
+                if saida is None:
+                    if not Produto.select().where(Produto.id == produto_id).exists():
+                        return False, "Produto não encontrado"
+                    return False, "Estoque insuficiente na origem"
+                entrada = movimentar_estoque(produto_id, destino_id, quantidade)
+                
+                agora = datetime.now()
+                movimentacao = {
+                    'produto': produto_id,
+                    'tipo': 'transferencia',
+                    'quantidade': quantidade,
+                    'motivo': 'Transferência entre locais',
+                    'observacoes': observacoes,
+                    'data_movimentacao': agora,
+                }
+                MovimentacaoEstoque.insert_many([
+                    dict(movimentacao, local=origem_id,
+                         estoque_anterior=saida[0], estoque_atual=saida[1]),
+                    dict(movimentacao, local=destino_id,
+                         estoque_anterior=entrada[0], estoque_atual=entrada[1]),
+                ]).execute()
+                
+                return True, "Transferência realizada com sucesso!"
+                
+        except Exception as e:
+            return False, f"Erro ao transferir estoque: {str(e)}"
+    
+    @staticmethod
+    def listar_abaixo_estoque_minimo(somente_leitura=False):
         """Lista produtos com estoque abaixo do mínimo"""
         try:
-            query = Produto.select().where(
+            condicao = (
                 (Produto.estoque_atual <= Produto.estoque_minimo) &
                 (Produto.ativo == True)
             )
+            if somente_leitura:
+                return ProdutoController._listar_linhas(condicao)
+            
+            query = Produto.select().where(condicao)
             return list(query.order_by(Produto.nome))
         except Exception as e:
             print(f"Erro ao listar produtos abaixo do estoque mínimo: {e}")
             return []
     
+    @staticmethod
+    def listar_sugestoes_reposicao():
+        """
+        Lista os produtos que atingiram o ponto de pedido previsto
+        
+        Lê a tabela previsoes_reposicao (ver utils.previsao); a quantidade
+        sugerida usa o estoque atual, então continua válida entre cálculos.
+        
+        Returns:
+            list: ReposicaoLinha, da maior para a menor quantidade sugerida
+        """
+        try:
+            quantidade = PrevisaoReposicao.estoque_alvo - Produto.estoque_atual
+            query = (Produto
+                     .select(Produto.id, Produto.codigo, Produto.nome,
+                             Produto.estoque_atual, PrevisaoReposicao.ponto_pedido,
+                             PrevisaoReposicao.estoque_alvo, quantidade,
+                             PrevisaoReposicao.demanda_diaria)
+                     .join(PrevisaoReposicao)
+                     .where((Produto.estoque_atual <= PrevisaoReposicao.ponto_pedido) &
+                            (Produto.ativo == True))
+                     .order_by(quantidade.desc()))
+            return list(map(ReposicaoLinha._make, query.tuples().iterator()))
+        except Exception as e:
+            print(f"Erro ao listar sugestões de reposição: {e}")
+            return []
+    
     @staticmethod
     def calcular_margem_lucro(preco_custo, preco_venda):
         """Calcula a margem de lucro percentual"""
@@ -256,4 +473,326 @@ class ProdutoController:
             margem = ((preco_venda - preco_custo) / preco_custo) * 100
             return round(margem, 2)
         except:
-            return 0
\ No newline at end of file
+            return 0
+    
+    @staticmethod
+    def _condicao_lote(filtro):
+        """
+        Monta a condição das operações em lote
+        
+        Args:
+            filtro (dict): Critérios combinados (pelo menos um é obrigatório)
+                - ids: list de IDs selecionados
+                - categoria_id: int (None para produtos sem categoria)
+                - codigo_inicial: str
+                - codigo_final: str
+        
+        Returns:
+            Expression ou None se nenhum critério foi informado
+        """
+        condicao = Produto.ativo == True
+        informado = False
+        
+        if filtro.get('ids'):
+            condicao &= Produto.id.in_(filtro['ids'])
+            informado = True
+        
+        if 'categoria_id' in filtro:
+            if filtro['categoria_id'] is None:
+                condicao &= Produto.categoria.is_null()
+            else:
+                condicao &= Produto.categoria == filtro['categoria_id']
+            informado = True
+        
+        if filtro.get('codigo_inicial'):
+            condicao &= Produto.codigo >= filtro['codigo_inicial']
+            informado = True
+        
+        if filtro.get('codigo_final'):
+            condicao &= Produto.codigo <= filtro['codigo_final']
+            informado = True
+        
+        return condicao if informado else None
+    
+    @staticmethod
+    def _aplicar_lote(operacao, descricao, condicao, campos):
+        """
+        Executa um UPDATE em lote registrando os valores anteriores e os novos
+        
+        Args:
+            campos (dict): Um único campo de Produto e o valor a gravar
+        
+        Returns:
+            int: Quantidade de produtos alterados
+        """
+        agora = datetime.now()
+        (campo, _), = campos.items()
+        
+        with db.atomic():
+            lote_id = AlteracaoLote.insert(
+                operacao=operacao,
+                descricao=descricao,
+                data_alteracao=agora,
+                campo=campo
+            ).execute()
+            
+            # Diário com os valores anteriores, para desfazer
+            AlteracaoLoteItem.insert_from(
+                Produto.select(
+                    Value(lote_id), Produto.id, Produto.preco_custo,
+                    Produto.preco_venda, Produto.categoria, Produto.ativo
+                ).where(condicao),
+                fields=[
+                    AlteracaoLoteItem.lote, AlteracaoLoteItem.produto,
+                    AlteracaoLoteItem.preco_custo, AlteracaoLoteItem.preco_venda,
+                    AlteracaoLoteItem.categoria, AlteracaoLoteItem.ativo
+                ]
+            ).execute()
+            
+            quantidade = Produto.update(atualizado_em=agora, **campos).where(condicao).execute()
+            
+            # Valores gravados, para desfazer só o que não foi alterado depois
+            AlteracaoLoteItem.update(
+                valor_novo=Produto.select(getattr(Produto, campo))
+                .where(Produto.id == AlteracaoLoteItem.produto)
+            ).where(AlteracaoLoteItem.lote == lote_id).execute()
+            
+            AlteracaoLote.update(quantidade=quantidade).where(
+                AlteracaoLote.id == lote_id
+            ).execute()
+        
+        return quantidade
+    
+    @staticmethod
+    def simular_reajuste(filtro, percentual, campo='preco_venda'):
+        """
+        Calcula o efeito de um reajuste sem gravar nada
+        
+        Args:
+            filtro (dict): Critérios de seleção (ver _condicao_lote)
+            percentual (float): Percentual de reajuste (negativo para reduzir)
+            campo (str): 'preco_venda' ou 'preco_custo'
+        
+        Returns:
+            dict: produtos, margem_media_atual, margem_media_nova, abaixo_do_custo
+                e erro (a mensagem de reajustar_precos_lote para um campo ou
+                percentual inválido, ou None)
+        """
+        condicao = ProdutoController._condicao_lote(filtro)
+        fator = Dinheiro.fator_reajuste(percentual)
+        zero = Dinheiro(0)
+        
+        resumo = {
+            'produtos': 0,
+            'margem_media_atual': 0,
+            'margem_media_nova': 0,
+            'abaixo_do_custo': 0,
+            'erro': None,
+        }
+        # Mesmas validações do reajuste, para a prévia não divergir dele
+        if campo not in ('preco_venda', 'preco_custo'):
+            resumo['erro'] = "Campo de preço inválido"
+            return resumo
+        if fator <= 0:
+            resumo['erro'] = "Reajuste deixaria preços negativos"
+            return resumo
+        if condicao is None:
+            return resumo
+        
+        soma_atual = 0
+        soma_nova = 0
+        query = Produto.select(Produto.preco_custo, Produto.preco_venda).where(condicao)
+        
+        for custo, venda in query.tuples().iterator():
+            custo = custo or zero
+            venda = venda or zero
+            soma_atual += ProdutoController.calcular_margem_lucro(custo, venda)
+            
+            if campo == 'preco_custo':
+                custo = custo.reajustado(fator)
+            else:
+                venda = venda.reajustado(fator)
+            soma_nova += ProdutoController.calcular_margem_lucro(custo, venda)
+            
+            if venda < custo:
+                resumo['abaixo_do_custo'] += 1
+            resumo['produtos'] += 1
+        
+        if resumo['produtos']:
+            resumo['margem_media_atual'] = round(soma_atual / resumo['produtos'], 2)
+            resumo['margem_media_nova'] = round(soma_nova / resumo['produtos'], 2)
+        
+        return resumo
+    
+    @staticmethod
+    def reajustar_precos_lote(filtro, percentual, campo='preco_venda'):
+        """
+        Reajusta em um único UPDATE o preço dos produtos selecionados
+        
+        Args:
+            filtro (dict): Critérios de seleção (ver _condicao_lote)
+            percentual (float): Percentual de reajuste (negativo para reduzir)
+            campo (str): 'preco_venda' ou 'preco_custo'
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str, quantidade: int)
+        """
+        try:
+            if campo not in ('preco_venda', 'preco_custo'):
+                return False, "Campo de preço inválido", None
+            
+            fator = Dinheiro.fator_reajuste(percentual)
+            if fator <= 0:
+                return False, "Reajuste deixaria preços negativos", None
+            
+            condicao = ProdutoController._condicao_lote(filtro)
+            if condicao is None:
+                return False, "Informe ao menos um critério de seleção", None
+            
+            coluna = getattr(Produto, campo)
+            quantidade = ProdutoController._aplicar_lote(
+                'reajuste',
+                f"Reajuste de {percentual}% em {campo}",
+                condicao,
+                # Centavos inteiros com arredondamento comercial, como reajustado()
+                {campo: (coluna * Value(fator, converter=False) + BASE_FATOR // 2) / BASE_FATOR}
+            )
+            
+            return True, f"{quantidade} produtos reajustados com sucesso!", quantidade
+            
+        except Exception as e:
+            return False, f"Erro ao reajustar preços: {str(e)}", None
+    
+    @staticmethod
+    def inativar_lote(filtro):
+        """
+        Inativa em um único UPDATE os produtos selecionados
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str, quantidade: int)
+        """
+        try:
+            condicao = ProdutoController._condicao_lote(filtro)
+            if condicao is None:
+                return False, "Informe ao menos um critério de seleção", None
+            
+            quantidade = ProdutoController._aplicar_lote(
+                'inativacao', "Inativação em lote", condicao, {'ativo': False}
+            )
+            
+            return True, f"{quantidade} produtos inativados com sucesso!", quantidade
+            
+        except Exception as e:
+            return False, f"Erro ao inativar produtos: {str(e)}", None
+    
+    @staticmethod
+    def recategorizar_lote(filtro, categoria_id):
+        """
+        Move em um único UPDATE os produtos selecionados para outra categoria
+        
+        Args:
+            categoria_id (int): Nova categoria (None para deixar sem categoria)
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str, quantidade: int)
+        """
+        try:
+            # O banco não confere as chaves estrangeiras
+            if categoria_id is not None:
+                if not Categoria.select().where(Categoria.id == categoria_id).exists():
+                    return False, "Categoria não encontrada", None
+            
+            condicao = ProdutoController._condicao_lote(filtro)
+            if condicao is None:
+                return False, "Informe ao menos um critério de seleção", None
+            
+            quantidade = ProdutoController._aplicar_lote(
+                'recategorizacao',
+                f"Recategorização para categoria {categoria_id}",
+                condicao,
+                {'categoria': categoria_id}
+            )
+            
+            return True, f"{quantidade} produtos recategorizados com sucesso!", quantidade
+            
+        except Exception as e:
+            return False, f"Erro ao recategorizar produtos: {str(e)}", None
+    
+    @staticmethod
+    def listar_lotes(limite=20):
+        """Lista as últimas alterações em lote"""
+        try:
+            query = AlteracaoLote.select().order_by(AlteracaoLote.id.desc())
+            return list(query.limit(limite))
+        except Exception as e:
+            print(f"Erro ao listar alterações em lote: {e}")
+            return []
+    
+    @staticmethod
+    def desfazer_lote(lote_id):
+        """
+        Restaura os valores anteriores a uma alteração em lote
+        
+        Só volta os produtos em que o campo alterado ainda tem o valor gravado
+        pelo lote; os alterados depois são mantidos e contados na mensagem.
+        
+        Args:
+            lote_id (int): ID da alteração em lote
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            with db.atomic():
+                lote = AlteracaoLote.get_by_id(lote_id)
+                if lote.desfeita:
+                    return False, "Alteração já foi desfeita"
+                
+                def anterior(campo):
+                    return (AlteracaoLoteItem
+                            .select(campo)
+                            .where((AlteracaoLoteItem.lote == lote_id) &
+                                   (AlteracaoLoteItem.produto == Produto.id)))
+                
+                itens = AlteracaoLoteItem.lote == lote_id
+                
+                if lote.campo:
+                    coluna = getattr(Produto, lote.campo)
+                    valores = {coluna: anterior(getattr(AlteracaoLoteItem, lote.campo))}
+                    # IS: a categoria gravada pode ser nula
+                    inalterados = (AlteracaoLoteItem
+                                   .select(AlteracaoLoteItem.produto)
+                                   .where(itens & (AlteracaoLoteItem.produto == Produto.id) &
+                                          Expression(coluna, OP.IS,
+                                                     AlteracaoLoteItem.valor_novo)))
+                    condicao = fn.EXISTS(inalterados)
+                else:
+                    # Lotes gravados sem o valor novo: só produtos não
+                    # alterados desde o lote (mesmo atualizado_em)
+                    valores = {
+                        Produto.preco_custo: anterior(AlteracaoLoteItem.preco_custo),
+                        Produto.preco_venda: anterior(AlteracaoLoteItem.preco_venda),
+                        Produto.categoria: anterior(AlteracaoLoteItem.categoria),
+                        Produto.ativo: anterior(AlteracaoLoteItem.ativo),
+                    }
+                    condicao = (Produto.id.in_(
+                        AlteracaoLoteItem.select(AlteracaoLoteItem.produto).where(itens)
+                    ) & (Produto.atualizado_em == lote.data_alteracao))
+                
+                valores[Produto.atualizado_em] = datetime.now()
+                quantidade = Produto.update(valores).where(condicao).execute()
+                mantidos = AlteracaoLoteItem.select().where(itens).count() - quantidade
+                
+                AlteracaoLote.update(desfeita=True).where(
+                    AlteracaoLote.id == lote_id
+                ).execute()
+            
+            if mantidos:
+                return True, (f"Alteração desfeita ({quantidade} produtos restaurados, "
+                              f"{mantidos} alterados depois do lote foram mantidos)")
+            return True, f"Alteração desfeita ({quantidade} produtos restaurados)"
+            
+        except AlteracaoLote.DoesNotExist:
+            return False, "Alteração em lote não encontrada"
+        except Exception as e:
+            return False, f"Erro ao desfazer alteração: {str(e)}"
\ No newline at end of file
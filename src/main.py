@@ -1,11 +1,17 @@
 """
 Aplicação Principal - Sistema de Vendas e Estoque
 """
+import os
 import sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout
+from PySide6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout,
+                               QHBoxLayout, QLabel)
 from PySide6.QtCore import Qt
 from models.database import db, criar_tabelas
+from views.busca_incremental import CampoCliente
 from views.produto_view import ProdutoView
+from views.relatorio_view import RelatorioView
+from utils.backup import AgendadorBackup
+from utils import perfil
 
 
 class JanelaPrincipal(QMainWindow):
@@ -19,6 +25,15 @@ class JanelaPrincipal(QMainWindow):
         # Inicializar banco de dados
         self.inicializar_banco()
         
+        # Instrumentação de desempenho (opcional)
+        if os.environ.get('SISTEMA_PERFIL'):
+            perfil.ativar(arquivo_lentas='consultas_lentas.log')
+            perfil.iniciar_servidor()
+        
+        # Backup e manutenção periódicos
+        self.agendador_backup = AgendadorBackup()
+        self.agendador_backup.iniciar()
+        
         # Configurar interface
         self.configurar_ui()
     
@@ -55,7 +70,16 @@ class JanelaPrincipal(QMainWindow):
         """Cria a aba de vendas"""
         aba_vendas = QWidget()
         layout = QVBoxLayout(aba_vendas)
-        # Aqui virá a interface de vendas
+        
+        # Cliente da venda (opcional)
+        linha_cliente = QHBoxLayout()
+        linha_cliente.addWidget(QLabel("Cliente:"))
+        self.campo_cliente = CampoCliente()
+        linha_cliente.addWidget(self.campo_cliente)
+        layout.addLayout(linha_cliente)
+        
+        # Aqui virá o restante da interface de vendas
+        layout.addStretch()
         self.abas.addTab(aba_vendas, "💰 Vendas")
     
     def criar_aba_produtos(self):
@@ -79,13 +103,16 @@ class JanelaPrincipal(QMainWindow):
     
     def criar_aba_relatorios(self):
         """Cria a aba de relatórios"""
-        aba_relatorios = QWidget()
-        layout = QVBoxLayout(aba_relatorios)
-        # Aqui virá a interface de relatórios
-        self.abas.addTab(aba_relatorios, "📈 Relatórios")
+        self.aba_relatorios = RelatorioView()
+        self.abas.addTab(self.aba_relatorios, "📈 Relatórios")
     
     def closeEvent(self, event):
         """Fecha a conexão com o banco ao fechar o aplicativo"""
+        self.agendador_backup.parar()
+        self.aba_relatorios.fechar()
+        if os.environ.get('SISTEMA_PERFIL'):
+            perfil.exportar('metricas.json')
+            perfil.parar_servidor()
         if not db.is_closed():
             db.close()
         event.accept()
@@ -0,0 +1,132 @@
+"""
+Consultas preparadas: SQL gerado uma vez e reutilizado
+
+Montar uma consulta Peewee e gerar o seu SQL a cada chamada custa mais que
+a própria busca no SQLite em consultas pequenas (busca por código no
+caixa, por exemplo). ConsultaPreparada monta a consulta uma única vez com
+marcadores no lugar dos parâmetros, guarda o SQL, a posição de cada
+parâmetro e os conversores das colunas, e nas chamadas seguintes executa
+o SQL direto no cursor.
+
+Exemplo:
+    _POR_CODIGO = ConsultaPreparada(
+        lambda codigo: Produto.select().where(Produto.codigo == codigo),
+        Produto.codigo)
+    produto = _POR_CODIGO.primeiro('P00000001')
+"""
+from peewee import Value
+
+
+class _Marcador:
+    """Ocupa o lugar de um parâmetro durante a geração do SQL"""
+    
+    __slots__ = ('indice',)
+    
+    def __init__(self, indice):
+        self.indice = indice
+
+
+class ConsultaPreparada:
+    """
+    Consulta Peewee com SQL e leitura das linhas em cache
+    
+    A consulta é montada uma vez, na criação; o SQL é gerado na primeira
+    execução em cada banco.
+    
+    Args:
+        construir: Função que recebe os parâmetros e devolve a consulta
+        *campos: Campo correspondente a cada parâmetro (o db_value dele é
+            aplicado ao valor informado); None para passar o valor direto
+        linha: Como devolver cada linha: None para instâncias do modelo,
+            tuple para tuplas ou uma classe com _make (namedtuple)
+    """
+    
+    def __init__(self, construir, *campos, linha=None):
+        self.campos = campos
+        self.linha = linha
+        self.conversores = [campo.db_value if campo is not None else None
+                            for campo in campos]
+        
+        marcadores = [_Marcador(i) for i in range(len(campos))]
+        self.query = construir(*[Value(m, converter=False) for m in marcadores])
+        if linha is not None:
+            self.query = self.query.tuples()
+        self.modelo = self.query.model
+        
+        # Por banco: [sql, layout dos parâmetros, leitor das linhas]
+        self._compiladas = {}
+    
+    def _compilar(self, database):
+        """Gera o SQL e o layout dos parâmetros para o banco informado"""
+        sql, params = database.get_sql_context().sql(self.query).query()
+        
+        # Cada posição é o índice do parâmetro da chamada ou uma constante
+        layout = [(p.indice, None) if isinstance(p, _Marcador) else (None, p)
+                  for p in params]
+        compilada = [sql, layout, None]
+        self._compiladas[database] = compilada
+        return compilada
+    
+    def _leitor(self, compilada, cursor):
+        """Conversores das colunas e construtor das linhas (calculados uma vez)"""
+        wrapper = self.query._get_cursor_wrapper(cursor)
+        wrapper.initialize()
+        colunas = wrapper.columns
+        conversores = [(i, conversor) for i, conversor in enumerate(wrapper.converters)
+                       if conversor is not None]
+        
+        def converter(row):
+            row = list(row)
+            for i, conversor in conversores:
+                if row[i] is not None:
+                    row[i] = conversor(row[i])
+            return row
+        
+        if self.linha is None:
+            modelo = self.modelo
+            
+            def ler(row):
+                obj = modelo(__no_default__=1, **dict(zip(colunas, converter(row))))
+                obj._dirty.clear()
+                return obj
+        elif self.linha is tuple:
+            def ler(row):
+                return tuple(converter(row))
+        else:
+            fabrica = self.linha._make
+            
+            def ler(row):
+                return fabrica(converter(row))
+        
+        compilada[2] = ler
+        return ler
+    
+    def executar(self, *valores):
+        """
+        Executa a consulta no banco atual do modelo
+        
+        Returns:
+            list: Linhas no formato definido em 'linha'
+        """
+        database = self.modelo._meta.database
+        compilada = self._compiladas.get(database) or self._compilar(database)
+        sql, layout, ler = compilada
+        
+        params = []
+        for indice, constante in layout:
+            if indice is None:
+                params.append(constante)
+            else:
+                valor = valores[indice]
+                conversor = self.conversores[indice]
+                params.append(conversor(valor) if conversor and valor is not None else valor)
+        
+        cursor = database.execute_sql(sql, params)
+        if ler is None:
+            ler = self._leitor(compilada, cursor)
+        return [ler(row) for row in cursor]
+    
+    def primeiro(self, *valores):
+        """Executa e devolve a primeira linha (None se não houver)"""
+        linhas = self.executar(*valores)
+        return linhas[0] if linhas else None
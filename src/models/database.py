@@ -2,20 +2,62 @@
 Modelos de banco de dados usando Peewee ORM
 """
 from peewee import *
+from playhouse.migrate import SqliteMigrator, migrate
 from datetime import datetime
+from utils.dinheiro import Dinheiro
+from utils.texto import somente_digitos, termos
 import os
 
 # Caminho do banco de dados
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'database.db')
 
 # Configuração do banco de dados
-db = SqliteDatabase(DB_PATH)
+# auto_vacuum incremental só vale para bancos novos (ver utils/backup.py)
+# WAL: os relatórios (utils/relatorios.py) leem em paralelo sem bloquear
+# nem serem bloqueados pelas gravações do caixa e do estoque
+db = SqliteDatabase(DB_PATH, pragmas={
+    'auto_vacuum': 'incremental',
+    'journal_mode': 'wal',
+})
+
+# Versão do esquema (PRAGMA user_version); ver migrar_tabelas
+# 1: valores monetários gravados em centavos inteiros
+# 2: chaves de busca de clientes (documento, telefone e termos do nome)
+# 3: resumo de compras por cliente (clientes_resumo)
+# 4: estoque por local (locais, estoque_locais)
+VERSAO_ESQUEMA = 4
+
+# Local que recebe o estoque existente na migração e as movimentações sem local
+LOCAL_PADRAO = 1
+
+
+class DinheiroField(IntegerField):
+    """
+    Valor monetário gravado em centavos inteiros e lido como Dinheiro
+    
+    Aceita Dinheiro ou reais em float, Decimal ou str. Um int poderia ser
+    reais ou centavos, então só o zero é aceito.
+    """
+    
+    def db_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, Dinheiro):
+            return value.centavos
+        if isinstance(value, int) and value != 0:
+            raise TypeError(f"Valor monetário inteiro ambíguo ({value}): use Dinheiro")
+        return Dinheiro.de_reais(value).centavos
+    
+    def python_value(self, value):
+        return None if value is None else Dinheiro(value)
 
 
 class BaseModel(Model):
     """Modelo base para todas as tabelas"""
     class Meta:
         database = db
+        # save() grava apenas os campos alterados
+        only_save_dirty = True
 
 
 class Categoria(BaseModel):
@@ -24,6 +66,9 @@ class Categoria(BaseModel):
     descricao = TextField(null=True)
     ativo = BooleanField(default=True)
     criado_em = DateTimeField(default=datetime.now)
+    atualizado_em = DateTimeField(default=datetime.now, index=True)
+    # Número da última alteração na base central (ver utils/sincronizacao.py)
+    sequencia = IntegerField(default=0, index=True, constraints=[SQL('DEFAULT 0')])
     
     class Meta:
         table_name = 'categorias'
@@ -35,14 +80,16 @@ class Produto(BaseModel):
     nome = CharField(max_length=200)
     descricao = TextField(null=True)
     categoria = ForeignKeyField(Categoria, backref='produtos', null=True)
-    preco_custo = DecimalField(max_digits=10, decimal_places=2)
-    preco_venda = DecimalField(max_digits=10, decimal_places=2)
+    preco_custo = DinheiroField()
+    preco_venda = DinheiroField()
     estoque_atual = IntegerField(default=0)
     estoque_minimo = IntegerField(default=0)
     unidade_medida = CharField(max_length=20, default='UN')
     ativo = BooleanField(default=True)
     criado_em = DateTimeField(default=datetime.now)
-    atualizado_em = DateTimeField(default=datetime.now)
+    atualizado_em = DateTimeField(default=datetime.now, index=True)
+    # Número da última alteração na base central (ver utils/sincronizacao.py)
+    sequencia = IntegerField(default=0, index=True, constraints=[SQL('DEFAULT 0')])
     
     class Meta:
         table_name = 'produtos'
@@ -57,19 +104,35 @@ class Cliente(BaseModel):
     endereco = TextField(null=True)
     ativo = BooleanField(default=True)
     criado_em = DateTimeField(default=datetime.now)
+    # Chaves de busca (só dígitos), mantidas por indexar_cliente
+    chave_documento = CharField(max_length=18, null=True, index=True)
+    chave_telefone = CharField(max_length=20, null=True, index=True)
     
     class Meta:
         table_name = 'clientes'
 
 
+class ClienteTermo(BaseModel):
+    """Palavras normalizadas do nome dos clientes ativos, para busca por prefixo"""
+    cliente = ForeignKeyField(Cliente, backref='termos', on_delete='CASCADE')
+    termo = CharField(max_length=200)
+    
+    class Meta:
+        table_name = 'clientes_termos'
+        # Cobre a busca por prefixo sem precisar ler a tabela
+        indexes = (
+            (('termo', 'cliente'), False),
+        )
+
+
 class Venda(BaseModel):
     """Vendas realizadas"""
     numero_venda = CharField(max_length=50, unique=True)
     cliente = ForeignKeyField(Cliente, backref='vendas', null=True)
     data_venda = DateTimeField(default=datetime.now)
-    valor_total = DecimalField(max_digits=10, decimal_places=2, default=0)
-    desconto = DecimalField(max_digits=10, decimal_places=2, default=0)
-    valor_final = DecimalField(max_digits=10, decimal_places=2, default=0)
+    valor_total = DinheiroField(default=0)
+    desconto = DinheiroField(default=0)
+    valor_final = DinheiroField(default=0)
     forma_pagamento = CharField(max_length=50)
     status = CharField(max_length=20, default='finalizada')  # finalizada, cancelada
     observacoes = TextField(null=True)
@@ -77,6 +140,9 @@ class Venda(BaseModel):
     
     class Meta:
         table_name = 'vendas'
+        indexes = (
+            (('cliente', 'data_venda'), False),
+        )
 
 
 class ItemVenda(BaseModel):
@@ -84,39 +150,486 @@ class ItemVenda(BaseModel):
     venda = ForeignKeyField(Venda, backref='itens')
     produto = ForeignKeyField(Produto, backref='vendas')
     quantidade = IntegerField()
-    preco_unitario = DecimalField(max_digits=10, decimal_places=2)
-    subtotal = DecimalField(max_digits=10, decimal_places=2)
+    preco_unitario = DinheiroField()
+    subtotal = DinheiroField()
     
     class Meta:
         table_name = 'itens_venda'
 
 
+class Local(BaseModel):
+    """Lojas e depósitos com estoque próprio"""
+    nome = CharField(max_length=100, unique=True)
+    tipo = CharField(max_length=20, default='loja')  # loja, deposito
+    ativo = BooleanField(default=True)
+    criado_em = DateTimeField(default=datetime.now)
+    atualizado_em = DateTimeField(default=datetime.now, index=True)
+    # Número da última alteração na base central (ver utils/sincronizacao.py)
+    sequencia = IntegerField(default=0, index=True, constraints=[SQL('DEFAULT 0')])
+    
+    class Meta:
+        table_name = 'locais'
+
+
+class EstoqueLocal(BaseModel):
+    """
+    Estoque de cada produto em cada local
+    
+    Produto.estoque_atual é a soma dos locais, mantida por movimentar_estoque.
+    """
+    local = ForeignKeyField(Local, backref='estoques', index=False)
+    produto = ForeignKeyField(Produto, backref='estoques')
+    quantidade = IntegerField(default=0)
+    estoque_minimo = IntegerField(default=0)
+    atualizado_em = DateTimeField(default=datetime.now, index=True)
+    # Número da última alteração na base central (ver utils/sincronizacao.py)
+    sequencia = IntegerField(default=0, index=True, constraints=[SQL('DEFAULT 0')])
+    
+    class Meta:
+        table_name = 'estoque_locais'
+        # A chave (local, produto) atende as consultas de um local lendo só
+        # as linhas dele, qualquer que seja a quantidade de locais
+        primary_key = CompositeKey('local', 'produto')
+
+
+# Produtos abaixo do mínimo por local: o índice parcial só contém essas
+# linhas e atende a condição exatamente como escrita na consulta
+EstoqueLocal.add_index(
+    EstoqueLocal.index(EstoqueLocal.local, EstoqueLocal.produto)
+    .where(EstoqueLocal.quantidade <= EstoqueLocal.estoque_minimo)
+)
+
+
 class MovimentacaoEstoque(BaseModel):
     """Histórico de movimentações de estoque"""
     produto = ForeignKeyField(Produto, backref='movimentacoes')
-    tipo = CharField(max_length=20)  # entrada, saida, ajuste
+    tipo = CharField(max_length=20)  # entrada, saida, ajuste, transferencia
     quantidade = IntegerField()
+    # Estoque do local antes e depois da movimentação
     estoque_anterior = IntegerField()
     estoque_atual = IntegerField()
     motivo = CharField(max_length=100)
     observacoes = TextField(null=True)
     data_movimentacao = DateTimeField(default=datetime.now)
+    local = ForeignKeyField(Local, backref='movimentacoes', null=True)
     
     class Meta:
         table_name = 'movimentacoes_estoque'
+        # Cobre a leitura das saídas por produto e data da previsão de reposição
+        indexes = (
+            (('tipo', 'produto', 'data_movimentacao', 'quantidade'), False),
+        )
+
+
+class AlteracaoLote(BaseModel):
+    """Alterações em lote de produtos (diário para desfazer)"""
+    operacao = CharField(max_length=30)  # reajuste, inativacao, recategorizacao
+    descricao = CharField(max_length=200)
+    quantidade = IntegerField(default=0)
+    desfeita = BooleanField(default=False)
+    data_alteracao = DateTimeField(default=datetime.now)
+    # Campo de Produto alterado pelo lote
+    campo = CharField(max_length=30, null=True)
+    
+    class Meta:
+        table_name = 'alteracoes_lote'
+
+
+class AlteracaoLoteItem(BaseModel):
+    """Valores anteriores de cada produto alterado em lote"""
+    lote = ForeignKeyField(AlteracaoLote, backref='itens')
+    produto = ForeignKeyField(Produto, backref='alteracoes_lote')
+    preco_custo = DinheiroField()
+    preco_venda = DinheiroField()
+    categoria = ForeignKeyField(Categoria, null=True)
+    ativo = BooleanField()
+    # Valor gravado pelo lote no campo alterado, como está no banco
+    valor_novo = IntegerField(null=True)
+    
+    class Meta:
+        table_name = 'alteracoes_lote_itens'
+
+
+class PrevisaoReposicao(BaseModel):
+    """
+    Previsão de demanda e sugestão de reposição por produto
+    
+    Gravada por utils.previsao a partir do histórico de saídas. A quantidade
+    a comprar é estoque_alvo menos o estoque atual no momento da consulta.
+    """
+    produto = ForeignKeyField(Produto, primary_key=True, backref='previsao',
+                              on_delete='CASCADE')
+    demanda_diaria = FloatField()
+    desvio_diario = FloatField()
+    ponto_pedido = IntegerField()
+    estoque_alvo = IntegerField()
+    calculado_em = DateTimeField(default=datetime.now, index=True)
+    
+    class Meta:
+        table_name = 'previsoes_reposicao'
+
+
+class ResumoCliente(BaseModel):
+    """
+    Resumo das compras (não canceladas) de cada cliente
+    
+    Mantido pelos gatilhos de GATILHOS_RESUMO_CLIENTE a cada venda
+    registrada, alterada ou cancelada; reconstruir_resumo_clientes
+    recalcula tudo a partir das vendas.
+    """
+    cliente = ForeignKeyField(Cliente, primary_key=True, backref='resumo',
+                              on_delete='CASCADE')
+    primeira_compra = DateTimeField(null=True)
+    ultima_compra = DateTimeField(null=True)
+    quantidade_compras = IntegerField(default=0)
+    valor_total = DinheiroField(default=0)
+    
+    class Meta:
+        table_name = 'clientes_resumo'
+    
+    @property
+    def ticket_medio(self):
+        """Valor médio por compra"""
+        if not self.quantidade_compras:
+            return Dinheiro(0)
+        return self.valor_total / self.quantidade_compras
+
+
+class ControleSincronizacao(BaseModel):
+    """Marcadores de sincronização com a base central (chave/valor)"""
+    chave = CharField(max_length=50, unique=True)
+    valor = CharField(max_length=50)
+    
+    class Meta:
+        table_name = 'controle_sincronizacao'
+
+
+MODELOS = [
+    Categoria,
+    Produto,
+    Cliente,
+    ClienteTermo,
+    Venda,
+    ItemVenda,
+    Local,
+    EstoqueLocal,
+    MovimentacaoEstoque,
+    AlteracaoLote,
+    AlteracaoLoteItem,
+    PrevisaoReposicao,
+    ResumoCliente,
+    ControleSincronizacao
+]
+
+# Colunas adicionadas depois da primeira versão: (modelo, campo)
+COLUNAS_ADICIONADAS = [
+    (Categoria, Categoria.atualizado_em),
+    (Cliente, Cliente.chave_documento),
+    (Cliente, Cliente.chave_telefone),
+    (MovimentacaoEstoque, MovimentacaoEstoque.local),
+    (AlteracaoLote, AlteracaoLote.campo),
+    (AlteracaoLoteItem, AlteracaoLoteItem.valor_novo),
+    (Categoria, Categoria.sequencia),
+    (Produto, Produto.sequencia),
+    (Local, Local.sequencia),
+    (EstoqueLocal, EstoqueLocal.sequencia),
+]
+
+
+# Gatilhos que mantêm clientes_resumo. Uma venda conta para o resumo quando
+# tem cliente e não está cancelada; numa alteração a contribuição antiga é
+# retirada e a nova somada. Ao retirar, primeira e última compra são
+# recalculadas só com as vendas daquele cliente (índice cliente/data).
+_CONDICAO_RESUMO = "{linha}.cliente_id IS NOT NULL AND {linha}.status <> 'cancelada'"
+
+_SOMAR_RESUMO = """
+    INSERT INTO clientes_resumo
+        (cliente_id, primeira_compra, ultima_compra, quantidade_compras, valor_total)
+    SELECT NEW.cliente_id, NEW.data_venda, NEW.data_venda, 1, NEW.valor_final
+    WHERE {condicao}
+    ON CONFLICT(cliente_id) DO UPDATE SET
+        primeira_compra = MIN(COALESCE(primeira_compra, excluded.primeira_compra),
+                              excluded.primeira_compra),
+        ultima_compra = MAX(COALESCE(ultima_compra, excluded.ultima_compra),
+                            excluded.ultima_compra),
+        quantidade_compras = quantidade_compras + 1,
+        valor_total = valor_total + excluded.valor_total;
+""".format(condicao=_CONDICAO_RESUMO.format(linha='NEW'))
+
+_RETIRAR_RESUMO = """
+    UPDATE clientes_resumo SET
+        quantidade_compras = quantidade_compras - 1,
+        valor_total = valor_total - OLD.valor_final,
+        primeira_compra = (SELECT MIN(data_venda) FROM vendas
+                           WHERE cliente_id = OLD.cliente_id AND status <> 'cancelada'),
+        ultima_compra = (SELECT MAX(data_venda) FROM vendas
+                         WHERE cliente_id = OLD.cliente_id AND status <> 'cancelada')
+    WHERE cliente_id = OLD.cliente_id AND {condicao};
+""".format(condicao=_CONDICAO_RESUMO.format(linha='OLD'))
+
+GATILHOS_RESUMO_CLIENTE = [
+    f"""CREATE TRIGGER IF NOT EXISTS vendas_resumo_inserir
+        AFTER INSERT ON vendas
+        BEGIN {_SOMAR_RESUMO} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS vendas_resumo_alterar
+        AFTER UPDATE OF cliente_id, status, valor_final, data_venda ON vendas
+        BEGIN {_RETIRAR_RESUMO} {_SOMAR_RESUMO} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS vendas_resumo_excluir
+        AFTER DELETE ON vendas
+        BEGIN {_RETIRAR_RESUMO} END""",
+]
+
+
+def reconstruir_resumo_clientes(database=db):
+    """
+    Recalcula clientes_resumo a partir de todas as vendas
+    
+    Returns:
+        int: Quantidade de clientes com compras
+    """
+    database.create_tables([ResumoCliente])
+    query = (Venda
+             .select(Venda.cliente, fn.MIN(Venda.data_venda), fn.MAX(Venda.data_venda),
+                     fn.COUNT(Venda.id), fn.SUM(Venda.valor_final))
+             .where(Venda.cliente.is_null(False) & (Venda.status != 'cancelada'))
+             .group_by(Venda.cliente))
+    
+    with database.atomic():
+        ResumoCliente.delete().execute(database)
+        ResumoCliente.insert_from(query, [
+            ResumoCliente.cliente, ResumoCliente.primeira_compra,
+            ResumoCliente.ultima_compra, ResumoCliente.quantidade_compras,
+            ResumoCliente.valor_total,
+        ]).execute(database)
+    return ResumoCliente.select().count(database)
+
+
+def indexar_cliente(cliente_id, nome, cpf_cnpj, telefone, ativo=True, database=db):
+    """Atualiza as chaves de busca de um cliente"""
+    Cliente.update(
+        chave_documento=somente_digitos(cpf_cnpj) or None,
+        chave_telefone=somente_digitos(telefone) or None
+    ).where(Cliente.id == cliente_id).execute(database)
+    
+    ClienteTermo.delete().where(ClienteTermo.cliente == cliente_id).execute(database)
+    if ativo:
+        linhas = [(cliente_id, termo) for termo in termos(nome)]
+        if linhas:
+            ClienteTermo.insert_many(
+                linhas, fields=[ClienteTermo.cliente, ClienteTermo.termo]
+            ).execute(database)
+
+
+def _criar_local_padrao(database):
+    Local.insert(id=LOCAL_PADRAO, nome='Loja', tipo='loja').on_conflict_ignore().execute(database)
+
+
+def movimentar_estoque(produto_id, local_id, quantidade, validar=True, database=db):
+    """
+    Soma quantidade ao estoque do produto no local e ao total do produto
+    
+    Deve rodar dentro da transação que registra a movimentação. A linha do
+    local é criada na primeira entrada, com o estoque mínimo do produto.
+    
+    Args:
+        quantidade (int): Positiva para entradas, negativa para saídas
+        validar (bool): Recusa saídas maiores que o estoque do local
+    
+    Returns:
+        tuple: (estoque_anterior, estoque_atual) do local, ou None se a
+            saída foi recusada (ou o produto não existe)
+    """
+    agora = datetime.now()
+    if validar and quantidade < 0:
+        query = (EstoqueLocal
+                 .update(quantidade=EstoqueLocal.quantidade + quantidade, atualizado_em=agora)
+                 .where((EstoqueLocal.local == local_id) &
+                        (EstoqueLocal.produto == produto_id) &
+                        (EstoqueLocal.quantidade + quantidade >= 0)))
+    else:
+        origem = (Produto
+                  .select(Value(local_id), Produto.id, Value(quantidade),
+                          Produto.estoque_minimo, Value(agora))
+                  .where(Produto.id == produto_id))
+        query = (EstoqueLocal
+                 .insert_from(origem, [EstoqueLocal.local, EstoqueLocal.produto,
+                                       EstoqueLocal.quantidade, EstoqueLocal.estoque_minimo,
+                                       EstoqueLocal.atualizado_em])
+                 .on_conflict(
+                     conflict_target=[EstoqueLocal.local, EstoqueLocal.produto],
+                     update={EstoqueLocal.quantidade: EstoqueLocal.quantidade + quantidade,
+                             EstoqueLocal.atualizado_em: agora}))
+    
+    linha = query.returning(EstoqueLocal.quantidade).tuples().execute(database)
+    linha = next(iter(linha), None)
+    if linha is None:
+        return None
+    
+    Produto.update(
+        estoque_atual=Produto.estoque_atual + quantidade,
+        atualizado_em=agora
+    ).where(Produto.id == produto_id).execute(database)
+    return linha[0] - quantidade, linha[0]
+
+
+def conciliar_estoque_locais(database=db):
+    """
+    Lança no LOCAL_PADRAO a diferença entre o total do produto e seus locais
+    
+    Usado na migração (todo o estoque vai para o local padrão) e após
+    cargas em lote que gravam só Produto.estoque_atual.
+    
+    Returns:
+        int: Quantidade de produtos acertados
+    """
+    database.create_tables([Local, EstoqueLocal])
+    _criar_local_padrao(database)
+    cursor = database.execute_sql('''
+        INSERT INTO estoque_locais (local_id, produto_id, quantidade, estoque_minimo, atualizado_em)
+        SELECT ?, p.id, p.estoque_atual - COALESCE(s.total, 0), p.estoque_minimo, ?
+        FROM produtos p
+        LEFT JOIN (SELECT produto_id, SUM(quantidade) AS total
+                   FROM estoque_locais GROUP BY produto_id) s ON s.produto_id = p.id
+        WHERE p.estoque_atual <> COALESCE(s.total, 0)
+        ON CONFLICT (local_id, produto_id) DO UPDATE SET
+            quantidade = quantidade + excluded.quantidade,
+            atualizado_em = excluded.atualizado_em
+    ''', (LOCAL_PADRAO, datetime.now()))
+    return cursor.rowcount
+
+
+def _migrar_locais(database):
+    """Versão 4: estoque existente e movimentações antigas no local padrão"""
+    if not database.table_exists('produtos'):
+        return
+    conciliar_estoque_locais(database)
+    if database.table_exists('movimentacoes_estoque'):
+        (MovimentacaoEstoque
+         .update(local=LOCAL_PADRAO)
+         .where(MovimentacaoEstoque.local.is_null())
+         .execute(database))
+
+
+def _migrar_centavos(database):
+    """Versão 1: converte os valores monetários de reais para centavos"""
+    for modelo in MODELOS:
+        tabela = modelo._meta.table_name
+        if not database.table_exists(tabela):
+            continue
+        for campo in modelo._meta.sorted_fields:
+            if isinstance(campo, DinheiroField):
+                database.execute_sql(
+                    f'UPDATE "{tabela}" SET "{campo.column_name}" = '
+                    f'CAST(ROUND("{campo.column_name}" * 100) AS INTEGER) '
+                    f'WHERE "{campo.column_name}" IS NOT NULL'
+                )
+
+
+def _migrar_chaves_clientes(database):
+    """Versão 2: chaves de busca dos clientes existentes"""
+    if database.table_exists('clientes'):
+        reindexar_clientes(database)
+
+
+def _migrar_resumo_clientes(database):
+    """Versão 3: resumo de compras a partir das vendas existentes"""
+    if database.table_exists('vendas'):
+        reconstruir_resumo_clientes(database)
+
+
+def _aplicar_versao(database, versao, migracao):
+    """
+    Aplica uma migração de dados pendente
+    
+    A nova versão é gravada na mesma transação dos dados: se a migração
+    falhar, nada muda e ela roda de novo na próxima inicialização; se
+    concluir, não roda outra vez (a conversão para centavos, por exemplo,
+    não pode ser aplicada duas vezes).
+    """
+    if database.pragma('user_version') >= versao:
+        return
+    with database.atomic():
+        migracao(database)
+        database.pragma('user_version', versao)
+
+
+def migrar_tabelas(database=db):
+    """
+    Atualiza bancos criados por versões anteriores
+    
+    Adiciona as colunas novas e aplica as conversões de dados pendentes
+    conforme o PRAGMA user_version. Deve rodar antes de create_tables.
+    """
+    _aplicar_versao(database, 1, _migrar_centavos)
+    
+    migrator = SqliteMigrator(database)
+    operacoes = []
+    
+    for modelo, campo in COLUNAS_ADICIONADAS:
+        tabela = modelo._meta.table_name
+        if not database.table_exists(tabela):
+            continue
+        colunas = {coluna.name for coluna in database.get_columns(tabela)}
+        if campo.column_name not in colunas:
+            operacoes.append(migrator.add_column(tabela, campo.column_name, campo))
+    
+    if operacoes:
+        with database.atomic():
+            migrate(*operacoes)
+    
+    _aplicar_versao(database, 2, _migrar_chaves_clientes)
+    _aplicar_versao(database, 3, _migrar_resumo_clientes)
+    _aplicar_versao(database, 4, _migrar_locais)
+
+
+def reindexar_clientes(database=db):
+    """
+    Regera as chaves de busca de todos os clientes
+    
+    Usado na migração e após cargas em lote que não passam pelo controller.
+    
+    Returns:
+        int: Quantidade de clientes indexados
+    """
+    database.create_tables([ClienteTermo])
+    cursor = database.execute_sql(
+        'SELECT id, nome, cpf_cnpj, telefone, ativo FROM clientes'
+    )
+    chaves = []
+    linhas_termos = []
+    for cliente_id, nome, cpf_cnpj, telefone, ativo in cursor.fetchall():
+        chaves.append((somente_digitos(cpf_cnpj) or None,
+                       somente_digitos(telefone) or None, cliente_id))
+        if ativo:
+            linhas_termos.extend((cliente_id, termo) for termo in termos(nome))
+    
+    with database.atomic():
+        database.cursor().executemany(
+            'UPDATE clientes SET chave_documento = ?, chave_telefone = ? WHERE id = ?',
+            chaves
+        )
+        ClienteTermo.delete().execute(database)
+        for lote in chunked(linhas_termos, 500):
+            ClienteTermo.insert_many(
+                lote, fields=[ClienteTermo.cliente, ClienteTermo.termo]
+            ).execute(database)
+    return len(chaves)
+
+
+def preparar_esquema(database=db):
+    """Migra, cria as tabelas que faltam e registra a versão do esquema"""
+    migrar_tabelas(database)
+    database.create_tables(MODELOS)
+    _criar_local_padrao(database)
+    for gatilho in GATILHOS_RESUMO_CLIENTE:
+        database.execute_sql(gatilho)
+    database.pragma('user_version', VERSAO_ESQUEMA)
 
 
 def criar_tabelas():
     """Cria todas as tabelas no banco de dados"""
     with db:
-        db.create_tables([
-            Categoria,
-            Produto,
-            Cliente,
-            Venda,
-            ItemVenda,
-            MovimentacaoEstoque
-        ])
+        preparar_esquema()
         print("Tabelas criadas com sucesso!")
 
 
@@ -147,14 +660,16 @@ def inserir_dados_exemplo():
             estoque_atual=30,
             estoque_minimo=5
         )
+        conciliar_estoque_locais()
         
-        # Cliente
-        Cliente.create(
+        # Cliente (com as chaves de busca)
+        cliente = Cliente.create(
             nome='João Silva',
             cpf_cnpj='123.456.789-00',
             email='joao@email.com',
             telefone='(11) 98765-4321'
         )
+        indexar_cliente(cliente.id, cliente.nome, cliente.cpf_cnpj, cliente.telefone)
         
         print("Dados de exemplo inseridos com sucesso!")
 
@@ -0,0 +1,234 @@
+"""
+Backup online e manutenção do banco de dados
+
+O backup usa a API de backup online do SQLite em passos de poucas páginas,
+liberando o banco entre um passo e outro para que a aplicação continue
+gravando durante a cópia. Copiar o arquivo database.db diretamente enquanto
+o sistema está em uso pode gerar um backup corrompido.
+
+Uso (a partir da pasta src):
+    python -m utils.backup            # backup online
+    python -m utils.backup compactar  # cópia compactada (VACUUM INTO)
+    python -m utils.backup otimizar   # vacuum incremental + PRAGMA optimize
+"""
+import glob
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from models.database import db, DB_PATH
+
+# Pasta onde os backups são gravados
+BACKUP_DIR = os.path.join(os.path.dirname(DB_PATH), 'backups')
+
+# Páginas copiadas por passo do backup online
+PAGINAS_POR_PASSO = 256
+
+# Pausa entre os passos (segundos), para dar vez aos escritores
+PAUSA_ENTRE_PASSOS = 0.01
+
+# Quantidade de backups mantidos na pasta
+BACKUPS_MANTIDOS = 7
+
+
+def _nome_arquivo(prefixo):
+    """
+    Gera o caminho de um novo arquivo de backup
+    
+    O carimbo vai até os microssegundos: dois backups no mesmo segundo não
+    se sobrescrevem (e o VACUUM INTO não falha por o arquivo já existir).
+    """
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    carimbo = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    return os.path.join(BACKUP_DIR, f'{prefixo}_{carimbo}.db')
+
+
+def _relatorio(arquivo, inicio, paginas=None):
+    """Monta o relatório de duração e vazão de um backup"""
+    duracao = time.perf_counter() - inicio
+    tamanho = os.path.getsize(arquivo)
+    return {
+        'arquivo': arquivo,
+        'paginas': paginas,
+        'bytes': tamanho,
+        'duracao': round(duracao, 3),
+        'mb_por_segundo': round(tamanho / 1048576 / duracao, 2) if duracao > 0 else None,
+    }
+
+
+def _remover_antigos(prefixo, manter=BACKUPS_MANTIDOS):
+    """Remove os backups mais antigos, mantendo os últimos"""
+    arquivos = sorted(glob.glob(os.path.join(BACKUP_DIR, f'{prefixo}_*.db')))
+    for arquivo in arquivos[:-manter] if manter else []:
+        os.remove(arquivo)
+
+
+def fazer_backup(destino=None, paginas=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS):
+    """
+    Faz o backup online do banco de dados
+    
+    Args:
+        destino (str): Arquivo de destino (padrão: pasta de backups)
+        paginas (int): Páginas copiadas por passo
+        pausa (float): Pausa entre os passos, em segundos
+    
+    Returns:
+        tuple: (sucesso: bool, mensagem: str, relatorio: dict)
+    """
+    destino = destino or _nome_arquivo('backup')
+    inicio = time.perf_counter()
+    total_paginas = [0]
+    
+    def progresso(status, restantes, total):
+        total_paginas[0] = total
+    
+    try:
+        origem = sqlite3.connect(db.database)
+        copia = sqlite3.connect(destino)
+        try:
+            origem.backup(copia, pages=paginas, progress=progresso, sleep=pausa)
+        finally:
+            copia.close()
+            origem.close()
+        
+        relatorio = _relatorio(destino, inicio, total_paginas[0])
+        _remover_antigos('backup')
+        
+        return True, (f"Backup concluído em {relatorio['duracao']}s "
+                      f"({relatorio['mb_por_segundo']} MB/s)"), relatorio
+    
+    except Exception as e:
+        return False, f"Erro ao fazer backup: {str(e)}", None
+
+
+def compactar(destino=None):
+    """
+    Gera uma cópia compactada do banco com VACUUM INTO
+    
+    A cópia é feita dentro de uma única transação de leitura, sem páginas
+    livres e com os índices reconstruídos.
+    
+    Returns:
+        tuple: (sucesso: bool, mensagem: str, relatorio: dict)
+    """
+    destino = destino or _nome_arquivo('compactado')
+    inicio = time.perf_counter()
+    
+    try:
+        conexao = sqlite3.connect(db.database)
+        try:
+            conexao.execute('VACUUM INTO ?', (destino,))
+        finally:
+            conexao.close()
+        
+        relatorio = _relatorio(destino, inicio)
+        _remover_antigos('compactado')
+        
+        return True, (f"Cópia compactada gerada em {relatorio['duracao']}s "
+                      f"({relatorio['mb_por_segundo']} MB/s)"), relatorio
+    
+    except Exception as e:
+        return False, f"Erro ao compactar banco: {str(e)}", None
+
+
+def otimizar(paginas_livres=1000):
+    """
+    Executa a manutenção periódica do banco
+    
+    Devolve páginas livres ao sistema (quando o banco usa auto_vacuum
+    incremental) e atualiza as estatísticas do planejador com PRAGMA optimize,
+    que só roda ANALYZE nas tabelas que precisam.
+    
+    Returns:
+        tuple: (sucesso: bool, mensagem: str)
+    """
+    try:
+        conexao = sqlite3.connect(db.database)
+        try:
+            livres_antes = conexao.execute('PRAGMA freelist_count').fetchone()[0]
+            modo_vacuum = conexao.execute('PRAGMA auto_vacuum').fetchone()[0]
+            
+            # 2 = INCREMENTAL. O PRAGMA libera uma página a cada passo, e
+            # execute() só dá o primeiro; executescript() o executa até o fim
+            if modo_vacuum == 2 and livres_antes:
+                conexao.executescript(f'PRAGMA incremental_vacuum({int(paginas_livres)})')
+            
+            conexao.execute('PRAGMA optimize')
+            livres_depois = conexao.execute('PRAGMA freelist_count').fetchone()[0]
+        finally:
+            conexao.close()
+        
+        return True, (f"Banco otimizado ({livres_antes - livres_depois} "
+                      f"páginas livres devolvidas)")
+    
+    except Exception as e:
+        return False, f"Erro ao otimizar banco: {str(e)}"
+
+
+class AgendadorBackup:
+    """Executa backup e manutenção periodicamente em segundo plano"""
+    
+    def __init__(self, intervalo_backup=6 * 3600, intervalo_manutencao=24 * 3600,
+                 intervalo_verificacao=1):
+        """
+        Args:
+            intervalo_backup (int): Segundos entre backups
+            intervalo_manutencao (int): Segundos entre otimizações do banco
+            intervalo_verificacao (float): Segundos entre verificações dos prazos
+        """
+        self.intervalo_backup = intervalo_backup
+        self.intervalo_manutencao = intervalo_manutencao
+        self.intervalo_verificacao = intervalo_verificacao
+        self.ultimo_relatorio = None
+        self._parar = threading.Event()
+        self._thread = None
+    
+    def iniciar(self):
+        """Inicia o agendador em uma thread de segundo plano"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+        self._thread.start()
+    
+    def parar(self):
+        """Interrompe o agendador"""
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def _executar(self):
+        """Laço do agendador"""
+        proximo_backup = time.monotonic() + self.intervalo_backup
+        proxima_manutencao = time.monotonic() + self.intervalo_manutencao
+        
+        while not self._parar.wait(timeout=self.intervalo_verificacao):
+            agora = time.monotonic()
+            
+            if agora >= proximo_backup:
+                sucesso, mensagem, relatorio = fazer_backup()
+                if sucesso:
+                    self.ultimo_relatorio = relatorio
+                print(mensagem)
+                proximo_backup = agora + self.intervalo_backup
+            
+            if agora >= proxima_manutencao:
+                sucesso, mensagem = otimizar()
+                print(mensagem)
+                proxima_manutencao = agora + self.intervalo_manutencao
+
+
+if __name__ == '__main__':
+    acao = sys.argv[1] if len(sys.argv) > 1 else 'backup'
+    
+    if acao == 'compactar':
+        sucesso, mensagem, _ = compactar()
+    elif acao == 'otimizar':
+        sucesso, mensagem = otimizar()
+    else:
+        sucesso, mensagem, _ = fazer_backup()
+    
+    print(mensagem)
+    sys.exit(0 if sucesso else 1)
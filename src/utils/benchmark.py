@@ -0,0 +1,412 @@
+"""
+Benchmarks das operações principais sobre um catálogo sintético grande
+
+Cria um banco temporário com utils.gerador_dados, mede cada caso e compara
+com a linha de base salva anteriormente para a mesma escala, acusando as
+regressões acima da tolerância. Os tempos dependem da máquina: a linha de
+base é gravada com --salvar em cada máquina e não é versionada.
+
+Uso (a partir da pasta src):
+    python -m utils.benchmark --produtos 100000 --salvar    # grava linha de base
+    python -m utils.benchmark --produtos 100000             # compara com ela
+    python -m utils.benchmark --casos buscar_por_codigo criar
+
+Os casos da interface (busca e renderização da tabela) só rodam quando o
+PySide6 está instalado; usam a plataforma Qt "offscreen".
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from models.database import (db, Produto, Categoria, EstoqueLocal, MovimentacaoEstoque,
+                             LOCAL_PADRAO, criar_tabelas)
+from controllers.produto_controller import ProdutoController
+from controllers.categoria_controller import CategoriaController
+from controllers.cliente_controller import ClienteController
+from controllers.local_controller import LocalController
+from utils import gerador_dados
+
+# Pasta onde as linhas de base são gravadas
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks')
+
+# Variação máxima aceita em relação à linha de base (20%)
+TOLERANCIA = 0.20
+
+CASOS = {}
+
+
+def caso(nome, repeticoes=20, escrita=False):
+    """Registra um caso de benchmark
+    
+    A função decorada recebe o contexto e devolve a função a ser medida.
+    Nos casos de escrita também é medido o volume gravado no WAL.
+    """
+    def decorator(preparar):
+        CASOS[nome] = (preparar, repeticoes, escrita)
+        return preparar
+    return decorator
+
+
+class Contexto:
+    """Dados compartilhados pelos casos"""
+    
+    def __init__(self, produtos, semente, locais=1):
+        self.produtos = produtos
+        self.locais = locais
+        self.rnd = random.Random(semente)
+        self.proximo_codigo = produtos + 1
+        self.app = None
+    
+    def codigo_aleatorio(self):
+        return f'P{self.rnd.randint(1, self.produtos):08d}'
+    
+    def local_aleatorio(self):
+        # IDs dos locais gerados: 1 (padrão) a 'locais'
+        return self.rnd.randint(1, self.locais)
+    
+    def novo_codigo(self):
+        codigo = f'B{self.proximo_codigo:08d}'
+        self.proximo_codigo += 1
+        return codigo
+    
+    def qt(self):
+        """Inicializa o Qt sob demanda (None se o PySide6 não estiver disponível)"""
+        if self.app is None:
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            try:
+                from PySide6.QtWidgets import QApplication
+            except ImportError:
+                return None
+            self.app = QApplication.instance() or QApplication([])
+        return self.app
+
+
+@caso('listar_todos', repeticoes=5)
+def _listar_todos(ctx):
+    return ProdutoController.listar_todos
+
+
+@caso('listar_todos_leitura', repeticoes=5)
+def _listar_todos_leitura(ctx):
+    return lambda: ProdutoController.listar_todos(somente_leitura=True)
+
+
+@caso('buscar_por_codigo', repeticoes=2000)
+def _buscar_por_codigo(ctx):
+    return lambda: ProdutoController.buscar_por_codigo(ctx.codigo_aleatorio())
+
+
+# Os casos *_orm repetem a mesma consulta montada pelo Peewee a cada chamada,
+# para comparar com as consultas preparadas usadas pelo controller
+@caso('buscar_por_codigo_orm', repeticoes=2000)
+def _buscar_por_codigo_orm(ctx):
+    return lambda: Produto.get_or_none(Produto.codigo == ctx.codigo_aleatorio())
+
+
+@caso('buscar_por_id', repeticoes=2000)
+def _buscar_por_id(ctx):
+    return lambda: ProdutoController.buscar_por_id(ctx.rnd.randint(1, ctx.produtos))
+
+
+@caso('buscar_por_id_orm', repeticoes=2000)
+def _buscar_por_id_orm(ctx):
+    return lambda: Produto.get_by_id(ctx.rnd.randint(1, ctx.produtos))
+
+
+@caso('listar_todos_orm', repeticoes=5)
+def _listar_todos_orm(ctx):
+    return lambda: list(Produto.select().where(Produto.ativo == True).order_by(Produto.nome))
+
+
+@caso('criar', repeticoes=500, escrita=True)
+def _criar(ctx):
+    def criar():
+        ProdutoController.criar({
+            'codigo': ctx.novo_codigo(),
+            'nome': 'Produto de benchmark',
+            'preco_custo': 10,
+            'preco_venda': 15,
+            'estoque_atual': 10,
+        })
+    return criar
+
+
+def salvar_linha_inteira(instancia):
+    """save() como antes de only_save_dirty: grava todas as colunas da linha"""
+    instancia.save(only=instancia._meta.sorted_fields)
+
+
+# Os casos *_save fazem a mesma alteração lendo a linha e gravando-a inteira
+# com save(), para comparar o WAL gravado com o dos UPDATEs do controller
+@caso('ajustar_estoque', repeticoes=500, escrita=True)
+def _ajustar_estoque(ctx):
+    return lambda: ProdutoController.ajustar_estoque(
+        ctx.rnd.randint(1, ctx.produtos), 1, 'entrada', 'Benchmark')
+
+
+@caso('ajustar_estoque_save', repeticoes=500, escrita=True)
+def _ajustar_estoque_save(ctx):
+    def ajustar():
+        with db.atomic():
+            produto = Produto.get_by_id(ctx.rnd.randint(1, ctx.produtos))
+            estoque = EstoqueLocal.get_by_id((LOCAL_PADRAO, produto.id))
+            estoque_anterior = estoque.quantidade
+            agora = datetime.now()
+            produto.estoque_atual += 1
+            produto.atualizado_em = agora
+            salvar_linha_inteira(produto)
+            estoque.quantidade += 1
+            estoque.atualizado_em = agora
+            salvar_linha_inteira(estoque)
+            MovimentacaoEstoque.create(
+                produto=produto, local=LOCAL_PADRAO, tipo='entrada', quantidade=1,
+                estoque_anterior=estoque_anterior, estoque_atual=estoque.quantidade,
+                motivo='Benchmark', observacoes='', data_movimentacao=agora)
+    return ajustar
+
+
+@caso('excluir', repeticoes=500, escrita=True)
+def _excluir(ctx):
+    return lambda: ProdutoController.excluir(ctx.rnd.randint(1, ctx.produtos))
+
+
+@caso('excluir_save', repeticoes=500, escrita=True)
+def _excluir_save(ctx):
+    def excluir():
+        produto = Produto.get_by_id(ctx.rnd.randint(1, ctx.produtos))
+        produto.ativo = False
+        produto.atualizado_em = datetime.now()
+        salvar_linha_inteira(produto)
+    return excluir
+
+
+@caso('atualizar_categoria', repeticoes=500, escrita=True)
+def _atualizar_categoria(ctx):
+    return lambda: CategoriaController.atualizar(
+        ctx.rnd.randint(1, 50), descricao=f'Descrição {ctx.rnd.random()}')
+
+
+@caso('atualizar_categoria_save', repeticoes=500, escrita=True)
+def _atualizar_categoria_save(ctx):
+    def atualizar():
+        categoria = Categoria.get_by_id(ctx.rnd.randint(1, 50))
+        categoria.descricao = f'Descrição {ctx.rnd.random()}'
+        categoria.atualizado_em = datetime.now()
+        salvar_linha_inteira(categoria)
+    return atualizar
+
+
+@caso('listar_abaixo_estoque_minimo', repeticoes=5)
+def _listar_abaixo_estoque_minimo(ctx):
+    return ProdutoController.listar_abaixo_estoque_minimo
+
+
+# Com --locais, medem se as consultas de um local continuam com o mesmo
+# tempo conforme cresce a quantidade de locais
+@caso('listar_abaixo_minimo_local', repeticoes=20)
+def _listar_abaixo_minimo_local(ctx):
+    return lambda: LocalController.listar_abaixo_estoque_minimo(ctx.local_aleatorio())
+
+
+@caso('transferir', repeticoes=500, escrita=True)
+def _transferir(ctx):
+    destino = LocalController.criar({'nome': 'Depósito de benchmark', 'tipo': 'deposito'})[2]
+    return lambda: ProdutoController.transferir(
+        ctx.rnd.randint(1, ctx.produtos), LOCAL_PADRAO, destino.id, 1)
+
+
+@caso('sugerir_cliente', repeticoes=500)
+def _sugerir_cliente(ctx):
+    termos = [palavra.lower()[:3] for palavra in gerador_dados.PALAVRAS]
+    return lambda: ClienteController.sugerir(
+        f'{ctx.rnd.choice(termos)} {ctx.rnd.randint(1, 999)}')
+
+
+@caso('buscar_na_view', repeticoes=5)
+def _buscar_na_view(ctx):
+    if not ctx.qt():
+        return None
+    from views.produto_view import ProdutoView
+    view = ProdutoView()
+    
+    def buscar():
+        view.txt_busca.blockSignals(True)
+        view.txt_busca.setText('arroz')
+        view.txt_busca.blockSignals(False)
+        view.buscar()
+    return buscar
+
+
+@caso('atualizar_tabela', repeticoes=3)
+def _atualizar_tabela(ctx):
+    if not ctx.qt():
+        return None
+    from views.produto_view import ProdutoView
+    view = ProdutoView()
+    produtos = ProdutoController.listar_todos(somente_leitura=True)
+    return lambda: view.atualizar_tabela(produtos)
+
+
+@caso('rolar_tabela', repeticoes=120)
+def _rolar_tabela(ctx):
+    if not ctx.qt():
+        return None
+    from views.produto_view import ProdutoView
+    view = ProdutoView()
+    view.resize(1200, 700)
+    view.show()
+    ctx.app.processEvents()
+    barra = view.tabela.verticalScrollBar()
+    
+    def rolar():
+        # Um quadro: salta para uma posição qualquer e repinta as células visíveis
+        barra.setValue(ctx.rnd.randint(0, barra.maximum()))
+        view.tabela.viewport().repaint()
+    return rolar
+
+
+def medir(funcao, repeticoes):
+    """
+    Mede o tempo de cada execução da função
+    
+    Returns:
+        dict: mínimo, mediana e média em milissegundos
+    """
+    funcao()  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'repeticoes': repeticoes,
+        'min_ms': round(min(tempos), 4),
+        'mediana_ms': round(statistics.median(tempos), 4),
+        'media_ms': round(statistics.mean(tempos), 4),
+    }
+
+
+def medir_wal(funcao, repeticoes):
+    """
+    Mede quantos bytes cada execução grava no WAL
+    
+    O checkpoint automático fica desligado durante a medição para que o
+    arquivo -wal acumule tudo o que foi gravado.
+    
+    Returns:
+        int: Bytes gravados no WAL por execução
+    """
+    arquivo_wal = db.database + '-wal'
+    db.execute_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+    db.execute_sql('PRAGMA wal_autocheckpoint=0')
+    try:
+        for _ in range(repeticoes):
+            funcao()
+        tamanho = os.path.getsize(arquivo_wal) if os.path.exists(arquivo_wal) else 0
+    finally:
+        db.execute_sql('PRAGMA wal_autocheckpoint=1000')
+        db.execute_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+    return tamanho // repeticoes
+
+
+def caminho_baseline(produtos):
+    """Arquivo da linha de base para a escala informada"""
+    return os.path.join(BASELINE_DIR, f'baseline_{produtos}.json')
+
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA):
+    """
+    Compara as medianas com a linha de base
+    
+    Returns:
+        list: (caso, mediana_base, mediana_atual, variacao) das regressões
+    """
+    regressoes = []
+    for nome, atual in resultados.items():
+        base = baseline.get(nome)
+        if not base or not base['mediana_ms']:
+            continue
+        variacao = atual['mediana_ms'] / base['mediana_ms'] - 1
+        if variacao > tolerancia:
+            regressoes.append((nome, base['mediana_ms'], atual['mediana_ms'], variacao))
+    return regressoes
+
+
+def executar(produtos=10000, movimentacoes=0, vendas=0, casos=None, semente=42, locais=1):
+    """
+    Gera o banco temporário e executa os casos
+    
+    Returns:
+        dict: Resultado de cada caso executado
+    """
+    pasta = tempfile.mkdtemp(prefix='benchmark_')
+    db.init(os.path.join(pasta, 'benchmark.db'))
+    criar_tabelas()
+    db.execute_sql('PRAGMA journal_mode=wal')
+    gerador_dados.gerar(produtos=produtos, movimentacoes=movimentacoes,
+                        vendas=vendas, semente=semente, locais=locais)
+    
+    ctx = Contexto(produtos, semente, locais)
+    resultados = {}
+    
+    for nome, (preparar, repeticoes, escrita) in CASOS.items():
+        if casos and nome not in casos:
+            continue
+        funcao = preparar(ctx)
+        if funcao is None:
+            print(f"{nome}: ignorado (PySide6 indisponível)")
+            continue
+        resultados[nome] = medir(funcao, repeticoes)
+        if escrita:
+            resultados[nome]['wal_bytes_por_op'] = medir_wal(funcao, repeticoes)
+        print(f"{nome}: mediana {resultados[nome]['mediana_ms']:.3f} ms"
+              + (f", {resultados[nome]['wal_bytes_por_op']} bytes/op no WAL" if escrita else ''))
+    
+    # Cada UPDATE do controller ao lado da mesma alteração feita com save()
+    for nome, resultado in resultados.items():
+        anterior = resultados.get(f'{nome}_save')
+        if anterior and 'wal_bytes_por_op' in resultado:
+            print(f"{nome}: {resultado['wal_bytes_por_op']} bytes/op no WAL "
+                  f"(save(): {anterior['wal_bytes_por_op']} bytes/op)")
+    
+    db.close()
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks do sistema')
+    parser.add_argument('--produtos', type=int, default=10000)
+    parser.add_argument('--movimentacoes', type=int, default=0)
+    parser.add_argument('--vendas', type=int, default=0)
+    parser.add_argument('--locais', type=int, default=1, help='Locais, contando o padrão')
+    parser.add_argument('--casos', nargs='*', help='Casos a executar (padrão: todos)')
+    parser.add_argument('--salvar', action='store_true', help='Grava como linha de base')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+    
+    resultados = executar(args.produtos, args.movimentacoes, args.vendas, args.casos,
+                          locais=args.locais)
+    arquivo = caminho_baseline(args.produtos)
+    
+    if args.salvar:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Linha de base gravada em {arquivo}")
+        sys.exit(0)
+    
+    if not os.path.exists(arquivo):
+        print("Nenhuma linha de base para esta escala (use --salvar)")
+        sys.exit(0)
+    
+    with open(arquivo, encoding='utf-8') as f:
+        regressoes = comparar(resultados, json.load(f), args.tolerancia)
+    
+    for nome, base, atual, variacao in regressoes:
+        print(f"REGRESSÃO {nome}: {base:.3f} ms -> {atual:.3f} ms (+{variacao:.0%})")
+    sys.exit(1 if regressoes else 0)
@@ -0,0 +1,190 @@
+"""
+Representação de valores monetários em centavos inteiros
+
+Dinheiro guarda apenas um int com os centavos. Somas, subtrações,
+multiplicação por quantidades e comparações são operações inteiras exatas,
+sem criar um Decimal por valor. Decimal só é usado na entrada de dados
+(conversão de reais digitados ou float para centavos).
+
+Números comuns (int, float, Decimal, str) misturados com Dinheiro são
+sempre interpretados como reais: Dinheiro(1050) > 10 é True. A igualdade
+e a ordem com números são exatas, como entre int, float e Decimal
+(Dinheiro(100) == 1, mas Dinheiro(10) != 0.1, que não é exatamente 0,10, e
+Dinheiro(10) < 0.1), e o hash é o do valor em reais, para que valores
+iguais tenham o mesmo hash.
+"""
+import operator
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTAVO = Decimal('0.01')
+
+# Base dos fatores de reajuste: 1.000.000 = 100%
+BASE_FATOR = 1000000
+
+
+def _dividir_arredondando(numerador, denominador):
+    """Divisão inteira com arredondamento comercial (meio para longe do zero)"""
+    quociente, resto = divmod(abs(numerador), denominador)
+    if resto * 2 >= denominador:
+        quociente += 1
+    return quociente if numerador >= 0 else -quociente
+
+
+def _centavos(valor):
+    """Converte Dinheiro ou um valor em reais para centavos"""
+    if isinstance(valor, Dinheiro):
+        return valor.centavos
+    if isinstance(valor, int):
+        return valor * 100
+    reais = Decimal(str(valor)).quantize(CENTAVO, ROUND_HALF_UP)
+    return int(reais * 100)
+
+
+class Dinheiro:
+    """Valor monetário exato em centavos"""
+    
+    __slots__ = ('centavos',)
+    
+    def __init__(self, centavos=0):
+        self.centavos = centavos
+    
+    @classmethod
+    def de_reais(cls, valor):
+        """Cria a partir de um valor em reais (int, float, Decimal ou str)"""
+        if isinstance(valor, Dinheiro):
+            return valor
+        return cls(_centavos(valor))
+    
+    @staticmethod
+    def fator_reajuste(percentual):
+        """
+        Fator inteiro de um reajuste percentual, na base BASE_FATOR
+        
+        Calculado uma vez e aplicado a muitos valores com reajustado().
+        """
+        return int((100 + Decimal(str(percentual))) * (BASE_FATOR // 100))
+    
+    @staticmethod
+    def somar(valores):
+        """Soma um iterável de Dinheiro"""
+        return Dinheiro(sum(valor.centavos for valor in valores))
+    
+    @property
+    def reais(self):
+        """Valor em reais como Decimal (para exibição ou integração)"""
+        return Decimal(self.centavos).scaleb(-2)
+    
+    def reajustado(self, fator):
+        """Aplica um fator obtido com fator_reajuste()"""
+        return Dinheiro(_dividir_arredondando(self.centavos * fator, BASE_FATOR))
+    
+    def percentual(self, percentual):
+        """Parcela percentual do valor (ex.: desconto de 10%)"""
+        fator = int(Decimal(str(percentual)) * (BASE_FATOR // 100))
+        return Dinheiro(_dividir_arredondando(self.centavos * fator, BASE_FATOR))
+    
+    def __str__(self):
+        sinal = '-' if self.centavos < 0 else ''
+        reais, centavos = divmod(abs(self.centavos), 100)
+        return f'{sinal}{reais}.{centavos:02d}'
+    
+    def __repr__(self):
+        return f"Dinheiro('{self}')"
+    
+    def __format__(self, spec):
+        if spec in ('', '.2f'):
+            return str(self)
+        return format(float(self), spec)
+    
+    def __float__(self):
+        return self.centavos / 100
+    
+    def __bool__(self):
+        return self.centavos != 0
+    
+    def __hash__(self):
+        # O mesmo de int, float e Decimal iguais ao valor em reais
+        return hash(self.reais)
+    
+    def __add__(self, outro):
+        return Dinheiro(self.centavos + _centavos(outro))
+    
+    __radd__ = __add__
+    
+    def __sub__(self, outro):
+        return Dinheiro(self.centavos - _centavos(outro))
+    
+    def __rsub__(self, outro):
+        return Dinheiro(_centavos(outro) - self.centavos)
+    
+    def __neg__(self):
+        return Dinheiro(-self.centavos)
+    
+    def __abs__(self):
+        return Dinheiro(abs(self.centavos))
+    
+    def __mul__(self, fator):
+        """Multiplica por uma quantidade (int) ou por um fator qualquer"""
+        if isinstance(fator, int):
+            return Dinheiro(self.centavos * fator)
+        valor = (Decimal(self.centavos) * Decimal(str(fator))).quantize(1, ROUND_HALF_UP)
+        return Dinheiro(int(valor))
+    
+    __rmul__ = __mul__
+    
+    def __truediv__(self, outro):
+        """Dinheiro / Dinheiro dá a razão (float); Dinheiro / número, um valor"""
+        if isinstance(outro, Dinheiro):
+            return self.centavos / outro.centavos
+        if isinstance(outro, int):
+            return Dinheiro(_dividir_arredondando(self.centavos, outro))
+        valor = (Decimal(self.centavos) / Decimal(str(outro))).quantize(1, ROUND_HALF_UP)
+        return Dinheiro(int(valor))
+    
+    def _comparar(self, outro, operacao):
+        """Compara com Dinheiro ou com um número em reais, sem arredondar"""
+        if isinstance(outro, Dinheiro):
+            return operacao(self.centavos, outro.centavos)
+        if isinstance(outro, int):
+            return operacao(self.centavos, outro * 100)
+        if isinstance(outro, (float, Decimal)):
+            return operacao(self.reais, outro)
+        return NotImplemented
+    
+    def __eq__(self, outro):
+        return self._comparar(outro, operator.eq)
+    
+    def __lt__(self, outro):
+        return self._comparar(outro, operator.lt)
+    
+    def __le__(self, outro):
+        return self._comparar(outro, operator.le)
+    
+    def __gt__(self, outro):
+        return self._comparar(outro, operator.gt)
+    
+    def __ge__(self, outro):
+        return self._comparar(outro, operator.ge)
+
+
+def totalizar_venda(itens, desconto=None, percentual_desconto=None):
+    """
+    Calcula os valores de uma venda em aritmética inteira
+    
+    Args:
+        itens (list): Pares (quantidade: int, preco_unitario: Dinheiro)
+        desconto: Desconto em valor (Dinheiro ou reais), opcional
+        percentual_desconto (float): Desconto percentual, opcional
+    
+    Returns:
+        tuple: (subtotais: list, valor_total, desconto, valor_final)
+    """
+    subtotais = [preco * quantidade for quantidade, preco in itens]
+    valor_total = Dinheiro.somar(subtotais)
+    
+    if percentual_desconto:
+        desconto = valor_total.percentual(percentual_desconto)
+    else:
+        desconto = Dinheiro.de_reais(desconto or 0)
+    
+    return subtotais, valor_total, desconto, valor_total - desconto
@@ -0,0 +1,318 @@
+"""
+Gerador de dados sintéticos para testes de desempenho
+
+Preenche os modelos existentes com catálogos grandes (de dezenas de milhares
+a milhões de produtos), movimentações de estoque e vendas, usando
+insert_many em lotes. Com a mesma semente os dados gerados são sempre os
+mesmos, o que permite comparar medições entre execuções.
+
+Uso (a partir da pasta src):
+    python -m utils.gerador_dados --banco /tmp/grande.db --produtos 100000 \\
+        --movimentacoes 1000000 --vendas 200000 --locais 20
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from peewee import chunked
+from models.database import (db, Categoria, Produto, Cliente, Venda, ItemVenda,
+                             Local, EstoqueLocal, MovimentacaoEstoque, LOCAL_PADRAO,
+                             criar_tabelas, reindexar_clientes,
+                             conciliar_estoque_locais)
+from utils.dinheiro import Dinheiro
+
+# Quantidade de linhas por INSERT em lote
+TAMANHO_LOTE = 500
+
+# Data de referência fixa, para que as datas geradas sejam reproduzíveis
+DATA_BASE = datetime(2024, 1, 1)
+
+# Período coberto pelas movimentações e vendas (dias)
+DIAS_HISTORICO = 365
+
+PALAVRAS = [
+    'Arroz', 'Feijão', 'Açúcar', 'Café', 'Leite', 'Óleo', 'Macarrão', 'Farinha',
+    'Sabão', 'Detergente', 'Biscoito', 'Suco', 'Refrigerante', 'Água', 'Sal',
+    'Molho', 'Queijo', 'Manteiga', 'Iogurte', 'Chocolate', 'Papel', 'Shampoo',
+]
+VARIANTES = ['Tradicional', 'Integral', 'Light', 'Premium', 'Econômico', 'Zero']
+EMBALAGENS = ['200g', '500g', '1kg', '2kg', '5kg', '350ml', '1L', '2L', '12un']
+UNIDADES = ['UN', 'KG', 'L', 'CX', 'PC']
+FORMAS_PAGAMENTO = ['dinheiro', 'debito', 'credito', 'pix']
+
+
+def _inserir(modelo, campos, linhas):
+    """Insere as linhas em lotes dentro de uma transação"""
+    total = 0
+    with db.atomic():
+        for lote in chunked(linhas, TAMANHO_LOTE):
+            modelo.insert_many(lote, fields=campos).execute()
+            total += len(lote)
+    return total
+
+
+def _inserir_ids(modelo, campos, linhas):
+    """Insere as linhas em lotes dentro de uma transação e retorna os IDs gerados"""
+    ids = []
+    with db.atomic():
+        for lote in chunked(linhas, TAMANHO_LOTE):
+            cursor = (modelo.insert_many(lote, fields=campos)
+                      .returning(modelo.id)
+                      .tuples()
+                      .execute())
+            ids.extend(linha_id for linha_id, in cursor)
+    return ids
+
+
+def _data_aleatoria(rnd):
+    """Data aleatória dentro do período de histórico"""
+    return DATA_BASE + timedelta(seconds=rnd.randrange(DIAS_HISTORICO * 86400))
+
+
+def gerar_categorias(rnd, quantidade):
+    """
+    Gera categorias
+    
+    Returns:
+        list: IDs das categorias geradas
+    """
+    linhas = (
+        (f'Categoria {i:04d}', f'Categoria sintética {i}', True, DATA_BASE, DATA_BASE)
+        for i in range(1, quantidade + 1)
+    )
+    campos = [Categoria.nome, Categoria.descricao, Categoria.ativo,
+              Categoria.criado_em, Categoria.atualizado_em]
+    return _inserir_ids(Categoria, campos, linhas)
+
+
+def gerar_produtos(rnd, quantidade, categorias):
+    """
+    Gera produtos com códigos sequenciais (P00000001, P00000002, ...)
+    
+    Args:
+        categorias (list): IDs das categorias a sortear
+    
+    Returns:
+        list: IDs dos produtos gerados
+    """
+    def linhas():
+        for i in range(1, quantidade + 1):
+            custo = rnd.randint(50, 50000)
+            venda = custo + custo * rnd.randint(-5, 80) // 100
+            minimo = rnd.randint(0, 50)
+            yield (
+                f'P{i:08d}',
+                f'{rnd.choice(PALAVRAS)} {rnd.choice(VARIANTES)} {rnd.choice(EMBALAGENS)}',
+                rnd.choice(categorias) if categorias else None,
+                Dinheiro(custo),
+                Dinheiro(venda),
+                rnd.randint(0, 500),
+                minimo,
+                rnd.choice(UNIDADES),
+                True,
+                DATA_BASE,
+                DATA_BASE,
+            )
+    
+    campos = [Produto.codigo, Produto.nome, Produto.categoria, Produto.preco_custo,
+              Produto.preco_venda, Produto.estoque_atual, Produto.estoque_minimo,
+              Produto.unidade_medida, Produto.ativo, Produto.criado_em,
+              Produto.atualizado_em]
+    ids = _inserir_ids(Produto, campos, linhas())
+    # Estoque gerado vai para o local padrão
+    conciliar_estoque_locais()
+    return ids
+
+
+def gerar_locais(rnd, quantidade, produtos):
+    """
+    Gera locais além do padrão, com estoque de todos os produtos em cada um
+    
+    Args:
+        produtos (list): IDs dos produtos
+    
+    Returns:
+        list: IDs de todos os locais, inclusive o padrão
+    """
+    ids = [LOCAL_PADRAO]
+    with db.atomic():
+        for i in range(2, quantidade + 1):
+            ids.append(Local.insert(nome=f'Local {i:03d}',
+                                    tipo='deposito' if i % 5 == 0 else 'loja',
+                                    criado_em=DATA_BASE, atualizado_em=DATA_BASE).execute())
+    
+    def linhas():
+        for local_id in ids[1:]:
+            for produto_id in produtos:
+                yield (local_id, produto_id, rnd.randint(0, 200), rnd.randint(0, 30), DATA_BASE)
+    
+    campos = [EstoqueLocal.local, EstoqueLocal.produto, EstoqueLocal.quantidade,
+              EstoqueLocal.estoque_minimo, EstoqueLocal.atualizado_em]
+    _inserir(EstoqueLocal, campos, linhas())
+    
+    # Totais dos produtos a partir dos locais
+    if len(ids) > 1:
+        db.execute_sql('''
+            UPDATE produtos SET estoque_atual = (
+                SELECT SUM(quantidade) FROM estoque_locais WHERE produto_id = produtos.id)
+        ''')
+    return ids
+
+
+def gerar_clientes(rnd, quantidade):
+    """
+    Gera clientes e suas chaves de busca
+    
+    Returns:
+        list: IDs dos clientes gerados
+    """
+    def linhas():
+        for i in range(1, quantidade + 1):
+            yield (
+                f'{rnd.choice(PALAVRAS)} Cliente {i}',
+                f'{i:011d}',
+                f'cliente{i}@email.com',
+                f'(11) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}',
+                True,
+                DATA_BASE,
+            )
+    
+    campos = [Cliente.nome, Cliente.cpf_cnpj, Cliente.email, Cliente.telefone,
+              Cliente.ativo, Cliente.criado_em]
+    ids = _inserir_ids(Cliente, campos, linhas())
+    reindexar_clientes()
+    return ids
+
+
+def gerar_movimentacoes(rnd, quantidade, produtos, locais=(LOCAL_PADRAO,)):
+    """
+    Gera movimentações de estoque (cerca de 80% saídas) nos locais informados
+    
+    Args:
+        produtos (list): IDs dos produtos
+        locais (list): IDs dos locais
+    """
+    def linhas():
+        for _ in range(quantidade):
+            tipo = 'saida' if rnd.random() < 0.8 else 'entrada'
+            qtd = rnd.randint(1, 10) if tipo == 'saida' else rnd.randint(10, 100)
+            anterior = rnd.randint(qtd, 500)
+            atual = anterior - qtd if tipo == 'saida' else anterior + qtd
+            yield (
+                rnd.choice(produtos),
+                tipo,
+                qtd,
+                anterior,
+                atual,
+                'Venda' if tipo == 'saida' else 'Compra',
+                _data_aleatoria(rnd),
+                rnd.choice(locais),
+            )
+    
+    campos = [MovimentacaoEstoque.produto, MovimentacaoEstoque.tipo,
+              MovimentacaoEstoque.quantidade, MovimentacaoEstoque.estoque_anterior,
+              MovimentacaoEstoque.estoque_atual, MovimentacaoEstoque.motivo,
+              MovimentacaoEstoque.data_movimentacao, MovimentacaoEstoque.local]
+    return _inserir(MovimentacaoEstoque, campos, linhas())
+
+
+def gerar_vendas(rnd, quantidade, produtos, clientes, itens_por_venda=3):
+    """
+    Gera vendas e seus itens (IDs das vendas são sequenciais a partir do atual)
+    
+    Args:
+        produtos (list): IDs dos produtos
+        clientes (list): IDs dos clientes
+    """
+    primeiro_id = (Venda.select(Venda.id).order_by(Venda.id.desc()).scalar() or 0) + 1
+    campos = [Venda.id, Venda.numero_venda, Venda.cliente, Venda.data_venda,
+              Venda.valor_total, Venda.desconto, Venda.valor_final,
+              Venda.forma_pagamento, Venda.status]
+    campos_itens = [ItemVenda.venda, ItemVenda.produto, ItemVenda.quantidade,
+                    ItemVenda.preco_unitario, ItemVenda.subtotal]
+    
+    with db.atomic():
+        for inicio in range(0, quantidade, TAMANHO_LOTE):
+            vendas = []
+            itens = []
+            for venda_id in range(primeiro_id + inicio,
+                                  primeiro_id + min(inicio + TAMANHO_LOTE, quantidade)):
+                total = 0
+                for _ in range(rnd.randint(1, itens_por_venda * 2 - 1)):
+                    qtd = rnd.randint(1, 5)
+                    preco = rnd.randint(100, 20000)
+                    total += qtd * preco
+                    itens.append((venda_id, rnd.choice(produtos), qtd,
+                                  Dinheiro(preco), Dinheiro(qtd * preco)))
+                desconto = total * rnd.choice((0, 0, 0, 5, 10)) // 100
+                vendas.append((
+                    venda_id,
+                    f'V{venda_id:09d}',
+                    rnd.choice(clientes) if clientes and rnd.random() < 0.6 else None,
+                    _data_aleatoria(rnd),
+                    Dinheiro(total),
+                    Dinheiro(desconto),
+                    Dinheiro(total - desconto),
+                    rnd.choice(FORMAS_PAGAMENTO),
+                    'cancelada' if rnd.random() < 0.02 else 'finalizada',
+                ))
+            
+            Venda.insert_many(vendas, fields=campos).execute()
+            for lote in chunked(itens, TAMANHO_LOTE):
+                ItemVenda.insert_many(lote, fields=campos_itens).execute()
+    
+    return quantidade
+
+
+def gerar(produtos=10000, categorias=50, clientes=1000, movimentacoes=0,
+          vendas=0, semente=42, locais=1):
+    """
+    Preenche o banco atual com dados sintéticos
+    
+    Args:
+        produtos (int): Quantidade de produtos
+        categorias (int): Quantidade de categorias
+        clientes (int): Quantidade de clientes
+        movimentacoes (int): Quantidade de movimentações de estoque
+        vendas (int): Quantidade de vendas
+        semente (int): Semente do gerador aleatório
+        locais (int): Quantidade de locais, contando o padrão
+    
+    Returns:
+        dict: Quantidade de registros gerados por tabela
+    """
+    rnd = random.Random(semente)
+    ids_categorias = gerar_categorias(rnd, categorias)
+    ids_produtos = gerar_produtos(rnd, produtos, ids_categorias)
+    ids_locais = gerar_locais(rnd, locais, ids_produtos)
+    ids_clientes = gerar_clientes(rnd, clientes)
+    return {
+        'categorias': len(ids_categorias),
+        'produtos': len(ids_produtos),
+        'locais': len(ids_locais),
+        'clientes': len(ids_clientes),
+        'movimentacoes': (gerar_movimentacoes(rnd, movimentacoes, ids_produtos, ids_locais)
+                          if ids_produtos else 0),
+        'vendas': gerar_vendas(rnd, vendas, ids_produtos, ids_clientes) if ids_produtos else 0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos para testes de desempenho')
+    parser.add_argument('--banco', help='Arquivo SQLite de destino (padrão: database.db)')
+    parser.add_argument('--produtos', type=int, default=10000)
+    parser.add_argument('--categorias', type=int, default=50)
+    parser.add_argument('--clientes', type=int, default=1000)
+    parser.add_argument('--movimentacoes', type=int, default=0)
+    parser.add_argument('--vendas', type=int, default=0)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--locais', type=int, default=1, help='Locais, contando o padrão')
+    args = parser.parse_args()
+    
+    if args.banco:
+        db.init(args.banco)
+    criar_tabelas()
+    
+    gerados = gerar(args.produtos, args.categorias, args.clientes,
+                    args.movimentacoes, args.vendas, args.semente, args.locais)
+    for tabela, quantidade in gerados.items():
+        print(f"{tabela}: {quantidade}")
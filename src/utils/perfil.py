@@ -0,0 +1,359 @@
+"""
+Instrumentação de desempenho dos controllers e das consultas SQL
+
+Quando ativada, registra para cada método de controller e para cada SQL
+executado um histograma de latência, a quantidade de consultas e de linhas
+por chamada (útil para encontrar padrões N+1) e um log de consultas lentas
+com o EXPLAIN QUERY PLAN. Por SQL, as linhas são as lidas nas consultas e
+as alteradas nas gravações. Desativada, nada é interceptado e o custo é zero:
+os métodos originais são restaurados.
+
+Uso:
+    from utils import perfil
+    perfil.ativar(limiar_lento_ms=50, arquivo_lentas='consultas_lentas.log')
+    perfil.iniciar_servidor(8765)   # http://127.0.0.1:8765/metricas
+    ...
+    perfil.exportar('metricas.json')
+
+Na aplicação, basta definir a variável de ambiente SISTEMA_PERFIL=1.
+"""
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from models.database import db
+from controllers.produto_controller import ProdutoController
+from controllers.categoria_controller import CategoriaController
+from controllers.cliente_controller import ClienteController
+from controllers.local_controller import LocalController
+
+# Controllers instrumentados por padrão
+CONTROLLERS = [ProdutoController, CategoriaController, ClienteController, LocalController]
+
+# Quantidade máxima de entradas mantidas no log de consultas lentas
+MAX_CONSULTAS_LENTAS = 200
+
+
+class Histograma:
+    """Histograma de latência com faixas fixas em milissegundos"""
+    
+    LIMITES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+    
+    def __init__(self):
+        self.contagens = [0] * (len(self.LIMITES_MS) + 1)
+        self.total = 0
+        self.soma_ms = 0.0
+        self.maximo_ms = 0.0
+    
+    def registrar(self, ms):
+        """Registra uma medição"""
+        self.contagens[bisect_left(self.LIMITES_MS, ms)] += 1
+        self.total += 1
+        self.soma_ms += ms
+        if ms > self.maximo_ms:
+            self.maximo_ms = ms
+    
+    def como_dict(self):
+        """Retorna o histograma em formato serializável"""
+        faixas = [f'<={limite}ms' for limite in self.LIMITES_MS] + ['>1000ms']
+        return {
+            'total': self.total,
+            'media_ms': round(self.soma_ms / self.total, 3) if self.total else 0,
+            'maximo_ms': round(self.maximo_ms, 3),
+            'faixas': dict(zip(faixas, self.contagens)),
+        }
+
+
+class _Estado:
+    """Estado global da instrumentação"""
+    
+    def __init__(self):
+        self.ativo = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.limiar_lento_ms = 50
+        self.arquivo_lentas = None
+        self.metodos = {}
+        self.consultas = {}
+        self.lentas = []
+        self.originais = []
+        self.servidor = None
+    
+    def pilha(self):
+        """Pilha de chamadas de controller da thread atual"""
+        pilha = getattr(self.local, 'pilha', None)
+        if pilha is None:
+            pilha = self.local.pilha = []
+        return pilha
+
+
+_estado = _Estado()
+
+
+def _metricas_metodo(nome):
+    """Obtém (ou cria) as métricas de um método"""
+    metricas = _estado.metodos.get(nome)
+    if metricas is None:
+        metricas = _estado.metodos[nome] = {
+            'latencia': Histograma(),
+            'consultas': 0,
+            'max_consultas_por_chamada': 0,
+            'linhas': 0,
+            'falhas': 0,
+        }
+    return metricas
+
+
+def _instrumentar_metodo(nome, funcao):
+    """Envolve um método de controller com a medição de latência"""
+    
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        quadro = {'consultas': 0}
+        pilha = _estado.pilha()
+        pilha.append(quadro)
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args, **kwargs)
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            pilha.pop()
+        
+        # Linhas retornadas pelas listagens e falhas dos métodos (sucesso, ...)
+        linhas = len(resultado) if isinstance(resultado, list) else 0
+        falha = isinstance(resultado, tuple) and resultado and resultado[0] is False
+        
+        with _estado.lock:
+            metricas = _metricas_metodo(nome)
+            metricas['latencia'].registrar(ms)
+            metricas['consultas'] += quadro['consultas']
+            metricas['linhas'] += linhas
+            if quadro['consultas'] > metricas['max_consultas_por_chamada']:
+                metricas['max_consultas_por_chamada'] = quadro['consultas']
+            if falha:
+                metricas['falhas'] += 1
+        
+        return resultado
+    
+    return wrapper
+
+
+def _registrar_lenta(execute_sql, sql, params, ms):
+    """Registra uma consulta lenta com seu plano de execução"""
+    try:
+        cursor = execute_sql('EXPLAIN QUERY PLAN ' + sql, params)
+        plano = [linha[-1] for linha in cursor.fetchall()]
+    except Exception as e:
+        plano = [f'Erro ao obter plano: {e}']
+    
+    entrada = {
+        'data': datetime.now().isoformat(sep=' ', timespec='seconds'),
+        'ms': round(ms, 3),
+        'sql': sql,
+        'params': [str(p) for p in params or ()],
+        'plano': plano,
+    }
+    
+    with _estado.lock:
+        _estado.lentas.append(entrada)
+        del _estado.lentas[:-MAX_CONSULTAS_LENTAS]
+    
+    if _estado.arquivo_lentas:
+        with open(_estado.arquivo_lentas, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+
+
+class _CursorMedido:
+    """
+    Cursor que conta as linhas lidas de um SQL
+    
+    O rowcount do SQLite só vale para gravações (-1 em SELECT); as linhas
+    de uma consulta são contadas conforme são lidas.
+    """
+    
+    def __init__(self, cursor, metricas):
+        self._cursor = cursor
+        self._metricas = metricas
+    
+    def _contar(self, quantidade):
+        if quantidade:
+            with _estado.lock:
+                self._metricas['linhas_lidas'] += quantidade
+    
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        self._contar(linha is not None)
+        return linha
+    
+    def fetchmany(self, *args):
+        linhas = self._cursor.fetchmany(*args)
+        self._contar(len(linhas))
+        return linhas
+    
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        self._contar(len(linhas))
+        return linhas
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        linha = next(self._cursor)
+        self._contar(1)
+        return linha
+    
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+def _instrumentar_execute_sql(execute_sql):
+    """Envolve o execute_sql do banco com a medição de cada SQL"""
+    
+    @functools.wraps(execute_sql)
+    def wrapper(sql, params=None, *args, **kwargs):
+        inicio = time.perf_counter()
+        cursor = execute_sql(sql, params, *args, **kwargs)
+        ms = (time.perf_counter() - inicio) * 1000
+        
+        for quadro in _estado.pilha():
+            quadro['consultas'] += 1
+        
+        with _estado.lock:
+            metricas = _estado.consultas.get(sql)
+            if metricas is None:
+                metricas = _estado.consultas[sql] = {
+                    'latencia': Histograma(),
+                    'linhas_lidas': 0,
+                    'linhas_afetadas': 0,
+                }
+            metricas['latencia'].registrar(ms)
+            # Gravações: linhas alteradas (rowcount é -1 em consultas)
+            if cursor.rowcount > 0:
+                metricas['linhas_afetadas'] += cursor.rowcount
+        
+        if ms >= _estado.limiar_lento_ms and not sql.startswith('EXPLAIN'):
+            _registrar_lenta(execute_sql, sql, params, ms)
+        
+        return _CursorMedido(cursor, metricas)
+    
+    return wrapper
+
+
+def ativar(limiar_lento_ms=50, arquivo_lentas=None, controllers=None, database=db):
+    """
+    Ativa a instrumentação
+    
+    Args:
+        limiar_lento_ms (float): Consultas a partir deste tempo vão para o log
+        arquivo_lentas (str): Arquivo (JSON por linha) para as consultas lentas
+        controllers (list): Classes a instrumentar (padrão: CONTROLLERS)
+        database: Banco cujas consultas serão medidas
+    """
+    if _estado.ativo:
+        return
+    
+    _estado.limiar_lento_ms = limiar_lento_ms
+    _estado.arquivo_lentas = arquivo_lentas
+    
+    for controller in controllers or CONTROLLERS:
+        for nome, atributo in list(vars(controller).items()):
+            if isinstance(atributo, staticmethod):
+                _estado.originais.append((controller, nome, atributo))
+                wrapper = _instrumentar_metodo(f'{controller.__name__}.{nome}',
+                                               atributo.__func__)
+                setattr(controller, nome, staticmethod(wrapper))
+    
+    # Atributo de instância, removido ao desativar
+    database.execute_sql = _instrumentar_execute_sql(database.execute_sql)
+    _estado.originais.append((database, 'execute_sql', None))
+    
+    _estado.ativo = True
+
+
+def desativar():
+    """Desativa a instrumentação e restaura os métodos originais"""
+    if not _estado.ativo:
+        return
+    
+    for alvo, nome, original in reversed(_estado.originais):
+        if original is None:
+            delattr(alvo, nome)
+        else:
+            setattr(alvo, nome, original)
+    _estado.originais.clear()
+    _estado.ativo = False
+
+
+def zerar():
+    """Descarta as métricas coletadas"""
+    with _estado.lock:
+        _estado.metodos.clear()
+        _estado.consultas.clear()
+        _estado.lentas.clear()
+
+
+def metricas():
+    """
+    Retorna as métricas coletadas
+    
+    Returns:
+        dict: métodos, consultas SQL e consultas lentas
+    """
+    with _estado.lock:
+        metodos = {
+            nome: dict(m, latencia=m['latencia'].como_dict())
+            for nome, m in _estado.metodos.items()
+        }
+        consultas = {
+            sql: dict(m, latencia=m['latencia'].como_dict())
+            for sql, m in _estado.consultas.items()
+        }
+        lentas = list(_estado.lentas)
+    
+    return {'metodos': metodos, 'consultas': consultas, 'lentas': lentas}
+
+
+def exportar(caminho):
+    """Grava as métricas em um arquivo JSON"""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(metricas(), arquivo, ensure_ascii=False, indent=2)
+
+
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    """Responde GET /metricas com as métricas em JSON"""
+    
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metricas':
+            self.send_error(404)
+            return
+        corpo = json.dumps(metricas(), ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+    
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_servidor(porta=8765):
+    """Publica as métricas em http://127.0.0.1:<porta>/metricas"""
+    if _estado.servidor:
+        return _estado.servidor
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), _HandlerMetricas)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    _estado.servidor = servidor
+    return servidor
+
+
+def parar_servidor():
+    """Encerra o servidor de métricas"""
+    if _estado.servidor:
+        _estado.servidor.shutdown()
+        _estado.servidor.server_close()
+        _estado.servidor = None
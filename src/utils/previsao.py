@@ -0,0 +1,268 @@
+"""
+Previsão de demanda e sugestão de reposição de estoque
+
+Para cada produto ativo, as saídas de estoque (MovimentacaoEstoque com
+tipo 'saida') são somadas por dia e suavizadas por médias móveis
+exponenciais (EWMA) da demanda diária e da sua variância. Daí saem:
+
+- ponto_pedido: demanda esperada durante o prazo de entrega mais um
+  estoque de segurança (nunca abaixo do estoque_minimo cadastrado);
+- estoque_alvo: ponto_pedido mais a demanda do período de cobertura.
+
+O histórico é lido em uma única passada, em ordem de produto e data, pelo
+índice (tipo, produto, data, quantidade); cada produto guarda apenas o
+estado das médias, então a memória não depende da quantidade de
+movimentações. Os produtos são divididos em faixas de ID processadas em
+paralelo por um pool de processos, cada um com sua própria conexão
+somente leitura. O resultado vai para a tabela previsoes_reposicao.
+
+Uso (a partir da pasta src):
+    python -m utils.previsao --processos 4 --dias 180 --prazo 7 --cobertura 30
+"""
+import argparse
+import math
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from urllib.request import pathname2url
+from peewee import chunked, fn
+from models.database import db, Produto, PrevisaoReposicao, criar_tabelas
+
+# Produtos (faixa de IDs) por tarefa do pool
+TAMANHO_FAIXA = 10000
+
+# Linhas por INSERT em lote
+TAMANHO_LOTE = 500
+
+# Valor z do nível de serviço do estoque de segurança (1.65 ~ 95%)
+Z_SERVICO = 1.65
+
+_SQL_PRODUTOS = '''
+    SELECT id, estoque_minimo
+    FROM produtos
+    WHERE ativo = 1 AND id BETWEEN ? AND ?
+'''
+
+_SQL_SAIDAS = '''
+    SELECT produto_id, substr(data_movimentacao, 1, 10), quantidade
+    FROM movimentacoes_estoque
+    WHERE tipo = 'saida' AND produto_id BETWEEN ? AND ?
+      AND data_movimentacao >= ? AND data_movimentacao < ?
+    ORDER BY produto_id, data_movimentacao
+'''
+
+
+class MediaExponencial:
+    """
+    Média e variância móveis exponenciais de uma série diária
+    
+    Dias sem saída contam como demanda zero; sequências de dias zerados
+    são aplicadas de uma vez, em forma fechada.
+    """
+    
+    __slots__ = ('alfa', 'media', 'variancia', 'dia')
+    
+    def __init__(self, alfa, dia, valor):
+        self.alfa = alfa
+        self.media = float(valor)
+        self.variancia = 0.0
+        self.dia = dia
+    
+    def avancar(self, dia):
+        """Aplica os dias sem saída entre o último dia registrado e 'dia'"""
+        dias = dia - self.dia
+        if dias > 0:
+            # k passos com valor 0: m' = b^k m, v' = b^k (v + m^2 (1 - b^k))
+            fator = (1 - self.alfa) ** dias
+            self.variancia = fator * (self.variancia + self.media ** 2 * (1 - fator))
+            self.media *= fator
+            self.dia = dia
+    
+    def adicionar(self, dia, valor):
+        """Registra a demanda total de um dia posterior ao último"""
+        self.avancar(dia - 1)
+        diferenca = valor - self.media
+        incremento = self.alfa * diferenca
+        self.media += incremento
+        self.variancia = (1 - self.alfa) * (self.variancia + diferenca * incremento)
+        self.dia = dia
+
+
+def calcular_sugestao(media, estoque_minimo, prazo_entrega, cobertura, z=Z_SERVICO):
+    """
+    Ponto de pedido e estoque alvo a partir da demanda diária
+    
+    Returns:
+        tuple: (ponto_pedido: int, estoque_alvo: int)
+    """
+    seguranca = z * math.sqrt(media.variancia) * math.sqrt(prazo_entrega)
+    ponto_pedido = max(math.ceil(media.media * prazo_entrega + seguranca), estoque_minimo)
+    estoque_alvo = ponto_pedido + math.ceil(media.media * cobertura)
+    return ponto_pedido, estoque_alvo
+
+
+def calcular_faixa(tarefa):
+    """
+    Calcula as previsões de uma faixa de IDs de produto
+    
+    Executada nos processos do pool: abre a própria conexão somente leitura.
+    
+    Args:
+        tarefa (tuple): (caminho_banco, id_inicial, id_final, parametros)
+    
+    Returns:
+        list: Linhas (produto_id, demanda, desvio, ponto_pedido, estoque_alvo)
+    """
+    caminho, inicio, fim, parametros = tarefa
+    referencia = parametros['data_referencia'].toordinal()
+    data_inicial = parametros['data_referencia'] - timedelta(days=parametros['dias_historico'])
+    data_final = parametros['data_referencia'] + timedelta(days=1)
+    alfa = 2 / (parametros['janela'] + 1)
+    
+    conexao = sqlite3.connect(f'file:{pathname2url(caminho)}?mode=ro', uri=True, timeout=30)
+    try:
+        minimos = dict(conexao.execute(_SQL_PRODUTOS, (inicio, fim)))
+        resultados = []
+        
+        def concluir(produto_id, media):
+            media.avancar(referencia)
+            ponto_pedido, estoque_alvo = calcular_sugestao(
+                media, minimos[produto_id], parametros['prazo_entrega'],
+                parametros['cobertura']
+            )
+            resultados.append((produto_id, round(media.media, 4),
+                               round(math.sqrt(media.variancia), 4),
+                               ponto_pedido, estoque_alvo))
+        
+        # Estado do produto em leitura: médias até o dia anterior e o total
+        # parcial do dia atual
+        produto_atual = None
+        media = None
+        dia_atual = None
+        total_dia = 0
+        
+        def fechar_dia(media):
+            if media is None:
+                # Demanda zero desde o início do histórico, não desde a
+                # primeira saída: um produto que começou a vender no fim
+                # do período não tem a média inflada
+                media = MediaExponencial(alfa, data_inicial.toordinal() - 1, 0)
+            media.adicionar(dia_atual, total_dia)
+            return media
+        
+        cursor = conexao.execute(_SQL_SAIDAS, (inicio, fim, data_inicial.isoformat(),
+                                             data_final.isoformat()))
+        for produto_id, texto_dia, quantidade in cursor:
+            if produto_id not in minimos:
+                continue
+            dia = date.fromisoformat(texto_dia).toordinal()
+            
+            if produto_id == produto_atual and dia == dia_atual:
+                total_dia += quantidade
+                continue
+            
+            if produto_id == produto_atual:
+                media = fechar_dia(media)
+            else:
+                if produto_atual is not None:
+                    concluir(produto_atual, fechar_dia(media))
+                produto_atual = produto_id
+                media = None
+            dia_atual, total_dia = dia, quantidade
+        
+        if produto_atual is not None:
+            concluir(produto_atual, fechar_dia(media))
+        return resultados
+    finally:
+        conexao.close()
+
+
+def executar(processos=None, dias_historico=180, janela=28, prazo_entrega=7,
+             cobertura=30, data_referencia=None, database=db):
+    """
+    Recalcula a tabela previsoes_reposicao
+    
+    Args:
+        processos (int): Processos do pool (padrão: núcleos da máquina;
+            1 calcula no próprio processo)
+        dias_historico (int): Dias de histórico considerados
+        janela (int): Janela equivalente da média exponencial (dias)
+        prazo_entrega (int): Prazo de entrega do fornecedor (dias)
+        cobertura (int): Dias de demanda cobertos por uma compra
+        data_referencia (date): Último dia considerado (padrão: hoje)
+        database: Banco de dados (arquivo SQLite)
+    
+    Returns:
+        int: Quantidade de produtos com previsão
+    """
+    parametros = {
+        'dias_historico': dias_historico,
+        'janela': janela,
+        'prazo_entrega': prazo_entrega,
+        'cobertura': cobertura,
+        'data_referencia': data_referencia or date.today(),
+    }
+    inicio_execucao = datetime.now()
+    
+    menor, maior = (Produto
+                    .select(fn.MIN(Produto.id), fn.MAX(Produto.id))
+                    .tuples()
+                    .bind(database)
+                    .get())
+    if menor is None:
+        return 0
+    tarefas = [(database.database, inicio, min(inicio + TAMANHO_FAIXA - 1, maior), parametros)
+               for inicio in range(menor, maior + 1, TAMANHO_FAIXA)]
+    
+    campos = [PrevisaoReposicao.produto, PrevisaoReposicao.demanda_diaria,
+              PrevisaoReposicao.desvio_diario, PrevisaoReposicao.ponto_pedido,
+              PrevisaoReposicao.estoque_alvo, PrevisaoReposicao.calculado_em]
+    
+    def gravar(resultados):
+        # Uma transação curta por faixa, para não bloquear os leitores
+        with database.atomic():
+            for lote in chunked(resultados, TAMANHO_LOTE):
+                (PrevisaoReposicao
+                 .insert_many([linha + (inicio_execucao,) for linha in lote], fields=campos)
+                 .on_conflict_replace()
+                 .execute(database))
+        return len(resultados)
+    
+    total = 0
+    if processos == 1 or len(tarefas) == 1:
+        for tarefa in tarefas:
+            total += gravar(calcular_faixa(tarefa))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            for resultados in pool.map(calcular_faixa, tarefas):
+                total += gravar(resultados)
+    
+    # Produtos que deixaram de ter saídas (ou foram inativados)
+    (PrevisaoReposicao
+     .delete()
+     .where(PrevisaoReposicao.calculado_em < inicio_execucao)
+     .execute(database))
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Previsão de demanda e sugestão de reposição')
+    parser.add_argument('--banco', help='Arquivo SQLite (padrão: database.db)')
+    parser.add_argument('--processos', type=int, help='Processos do pool (padrão: núcleos)')
+    parser.add_argument('--dias', type=int, default=180, help='Dias de histórico')
+    parser.add_argument('--janela', type=int, default=28, help='Janela da média exponencial (dias)')
+    parser.add_argument('--prazo', type=int, default=7, help='Prazo de entrega (dias)')
+    parser.add_argument('--cobertura', type=int, default=30, help='Dias cobertos por compra')
+    parser.add_argument('--data', type=date.fromisoformat, help='Data de referência (AAAA-MM-DD)')
+    args = parser.parse_args()
+    
+    if args.banco:
+        db.init(args.banco)
+    criar_tabelas()
+    
+    # Sem transação externa (with db abriria uma): cada faixa é confirmada
+    # assim que gravada, sem prender o banco até o fim do cálculo
+    with db.connection_context():
+        total = executar(args.processos, args.dias, args.janela, args.prazo,
+                         args.cobertura, args.data)
+    print(f"Previsões calculadas para {total} produtos")
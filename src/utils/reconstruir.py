@@ -0,0 +1,40 @@
+"""
+Reconstrução das tabelas derivadas a partir dos dados de origem
+
+As tabelas derivadas são mantidas a cada gravação; este comando as recalcula
+por inteiro, após importações diretas no banco ou para conferência.
+
+Uso (a partir da pasta src):
+    python -m utils.reconstruir                       # todas
+    python -m utils.reconstruir resumo_clientes --banco /caminho/para/database.db
+"""
+import argparse
+from models.database import (db, criar_tabelas, reindexar_clientes, reconstruir_resumo_clientes,
+                             conciliar_estoque_locais)
+
+# Nome -> (função de reconstrução, descrição)
+TABELAS = {
+    'termos_clientes': (reindexar_clientes, 'chaves de busca de clientes'),
+    'resumo_clientes': (reconstruir_resumo_clientes, 'resumo de compras por cliente'),
+    'estoque_locais': (conciliar_estoque_locais, 'estoque por local acertado no local padrão'),
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reconstrói as tabelas derivadas')
+    parser.add_argument('tabelas', nargs='*',
+                        help=f"Tabelas a reconstruir: {', '.join(TABELAS)} (padrão: todas)")
+    parser.add_argument('--banco', help='Arquivo SQLite (padrão: database.db)')
+    args = parser.parse_args()
+    for nome in args.tabelas:
+        if nome not in TABELAS:
+            parser.error(f"tabela desconhecida: {nome}")
+    
+    if args.banco:
+        db.init(args.banco)
+    criar_tabelas()
+    
+    with db:
+        for nome in args.tabelas or TABELAS:
+            reconstruir, descricao = TABELAS[nome]
+            print(f"{descricao}: {reconstruir()} registros")
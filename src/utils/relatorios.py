@@ -0,0 +1,240 @@
+"""
+Relatórios em conexões somente leitura, fora da thread da interface
+
+Consultas longas sobre vendas e movimentações não usam a conexão db da
+aplicação: rodam em um pool próprio de conexões SQLite somente leitura
+(query_only, cache maior), em threads de fundo. Com o banco em modo WAL,
+leitores não bloqueiam o caixa nem as gravações de estoque, e as
+gravações não bloqueiam os relatórios.
+
+Cada relatório roda dentro de uma transação de leitura: todas as suas
+consultas veem o mesmo instantâneo do banco, mesmo que vendas sejam
+registradas no meio. As linhas são entregues em lotes, conforme são
+lidas, para que a interface possa exibi-las aos poucos.
+
+Uso:
+    executor = ExecutorRelatorios()
+    execucao = executor.executar(vendas_por_dia, inicio, fim,
+                                 ao_receber=print, ao_concluir=lambda total: ...)
+    execucao.cancelar()
+"""
+import queue
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from models.database import db
+from utils.dinheiro import Dinheiro
+
+# Conexões (e threads) de relatório simultâneas
+TAMANHO_POOL = 2
+
+# Linhas por lote entregue à interface
+TAMANHO_LOTE = 500
+
+# Cache de páginas de cada conexão de relatório (KiB, valor negativo no PRAGMA)
+CACHE_KIB = 65536
+
+VendaDiaLinha = namedtuple('VendaDiaLinha', 'dia quantidade valor_total desconto valor_final')
+MaisVendidoLinha = namedtuple('MaisVendidoLinha', 'codigo nome quantidade valor')
+MovimentacaoLinha = namedtuple('MovimentacaoLinha', 'data local codigo nome tipo quantidade '
+                                                    'estoque_anterior estoque_atual motivo')
+
+_PRAGMAS_LEITURA = (
+    'PRAGMA query_only = 1',
+    f'PRAGMA cache_size = -{CACHE_KIB}',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA mmap_size = 268435456',
+)
+
+
+class PoolLeitura:
+    """Pool de conexões SQLite somente leitura"""
+    
+    def __init__(self, caminho=None, tamanho=TAMANHO_POOL):
+        """
+        Args:
+            caminho (str): Arquivo do banco (padrão: o de db)
+            tamanho (int): Quantidade de conexões
+        """
+        self.caminho = caminho or db.database
+        self.livres = queue.LifoQueue()
+        self.conexoes = []
+        for _ in range(tamanho):
+            conexao = sqlite3.connect(f'file:{pathname2url(self.caminho)}?mode=ro', uri=True,
+                                      timeout=30, check_same_thread=False,
+                                      isolation_level=None)
+            for pragma in _PRAGMAS_LEITURA:
+                conexao.execute(pragma)
+            self.conexoes.append(conexao)
+            self.livres.put(conexao)
+    
+    @contextmanager
+    def instantaneo(self):
+        """
+        Empresta uma conexão com uma transação de leitura aberta
+        
+        O instantâneo é fixado na primeira leitura e vale até o fim do bloco.
+        """
+        conexao = self.livres.get()
+        try:
+            conexao.execute('BEGIN')
+            try:
+                yield conexao
+            finally:
+                conexao.execute('COMMIT')
+        finally:
+            self.livres.put(conexao)
+    
+    def fechar(self):
+        """Fecha todas as conexões"""
+        for conexao in self.conexoes:
+            conexao.close()
+        self.conexoes = []
+
+
+class Execucao:
+    """Relatório em andamento"""
+    
+    def __init__(self):
+        self.cancelado = threading.Event()
+        # Protege conexao: ela só é interrompida enquanto pertence a este
+        # relatório, nunca depois de voltar ao pool
+        self.trava = threading.Lock()
+        self.conexao = None
+        self.futuro = None
+    
+    def cancelar(self):
+        """Interrompe a consulta em andamento; nenhum lote novo é entregue"""
+        self.cancelado.set()
+        with self.trava:
+            if self.conexao is not None:
+                self.conexao.interrupt()
+
+
+class ExecutorRelatorios:
+    """Executa relatórios em threads de fundo sobre um PoolLeitura"""
+    
+    def __init__(self, caminho=None, tamanho=TAMANHO_POOL):
+        self.pool = PoolLeitura(caminho, tamanho)
+        self.threads = ThreadPoolExecutor(max_workers=tamanho,
+                                          thread_name_prefix='relatorio')
+    
+    def executar(self, relatorio, *args, ao_receber=None, ao_concluir=None,
+                 ao_falhar=None, tamanho_lote=TAMANHO_LOTE, execucao=None):
+        """
+        Agenda um relatório
+        
+        As funções de retorno são chamadas na thread do relatório; na
+        interface, use views.relatorio_view.RelatorioQt para recebê-las
+        na thread principal.
+        
+        Args:
+            relatorio: Função (conexao, *args) que gera as linhas
+            ao_receber: Chamada com cada lote (list) de linhas
+            ao_concluir: Chamada com o total de linhas ao terminar
+            ao_falhar: Chamada com a mensagem de erro
+            execucao (Execucao): Controle a usar (padrão: um novo)
+        
+        Returns:
+            Execucao: Permite cancelar o relatório
+        """
+        execucao = execucao or Execucao()
+        
+        def rodar():
+            total = 0
+            try:
+                with self.pool.instantaneo() as conexao:
+                    with execucao.trava:
+                        execucao.conexao = conexao
+                    try:
+                        lote = []
+                        for linha in relatorio(conexao, *args):
+                            if execucao.cancelado.is_set():
+                                break
+                            lote.append(linha)
+                            if len(lote) >= tamanho_lote:
+                                total += len(lote)
+                                if ao_receber:
+                                    ao_receber(lote)
+                                lote = []
+                        if lote and not execucao.cancelado.is_set():
+                            total += len(lote)
+                            if ao_receber:
+                                ao_receber(lote)
+                    finally:
+                        # Desvincula antes de a conexão voltar ao pool
+                        with execucao.trava:
+                            execucao.conexao = None
+                if ao_concluir and not execucao.cancelado.is_set():
+                    ao_concluir(total)
+            except Exception as e:
+                if not execucao.cancelado.is_set():
+                    if ao_falhar:
+                        ao_falhar(str(e))
+                    else:
+                        print(f"Erro ao executar relatório: {e}")
+        
+        execucao.futuro = self.threads.submit(rodar)
+        return execucao
+    
+    def fechar(self):
+        """Aguarda os relatórios em andamento e fecha as conexões"""
+        self.threads.shutdown(wait=True)
+        self.pool.fechar()
+
+
+# Relatórios: geradores (conexao, *args) -> linhas (namedtuples)
+# Datas como texto ISO (AAAA-MM-DD); valores monetários em Dinheiro
+
+def vendas_por_dia(conexao, inicio, fim):
+    """Vendas não canceladas agrupadas por dia (VendaDiaLinha)"""
+    cursor = conexao.execute('''
+        SELECT substr(data_venda, 1, 10) AS dia, COUNT(*),
+               SUM(valor_total), SUM(desconto), SUM(valor_final)
+        FROM vendas
+        WHERE status <> 'cancelada' AND data_venda >= ? AND data_venda < date(?, '+1 day')
+        GROUP BY dia
+        ORDER BY dia
+    ''', (inicio, fim))
+    for dia, quantidade, total, desconto, final in cursor:
+        yield VendaDiaLinha(dia, quantidade, Dinheiro(total), Dinheiro(desconto),
+                            Dinheiro(final))
+
+
+def produtos_mais_vendidos(conexao, inicio, fim, limite=100):
+    """Produtos por quantidade vendida no período (MaisVendidoLinha)"""
+    cursor = conexao.execute('''
+        SELECT p.codigo, p.nome, SUM(i.quantidade) AS quantidade, SUM(i.subtotal)
+        FROM itens_venda i
+        JOIN vendas v ON v.id = i.venda_id
+        JOIN produtos p ON p.id = i.produto_id
+        WHERE v.status <> 'cancelada' AND v.data_venda >= ? AND v.data_venda < date(?, '+1 day')
+        GROUP BY i.produto_id
+        ORDER BY quantidade DESC
+        LIMIT ?
+    ''', (inicio, fim, limite))
+    for codigo, nome, quantidade, valor in cursor:
+        yield MaisVendidoLinha(codigo, nome, quantidade, Dinheiro(valor))
+
+
+def movimentacoes_periodo(conexao, inicio, fim):
+    """
+    Movimentações de estoque do período (MovimentacaoLinha)
+    
+    Em ordem de registro (id), que acompanha a data: assim as linhas saem
+    conforme a tabela é percorrida, sem esperar a ordenação de todas.
+    """
+    cursor = conexao.execute('''
+        SELECT m.data_movimentacao, l.nome, p.codigo, p.nome, m.tipo, m.quantidade,
+               m.estoque_anterior, m.estoque_atual, m.motivo
+        FROM movimentacoes_estoque m
+        JOIN produtos p ON p.id = m.produto_id
+        LEFT JOIN locais l ON l.id = m.local_id
+        WHERE m.data_movimentacao >= ? AND m.data_movimentacao < date(?, '+1 day')
+        ORDER BY m.id
+    ''', (inicio, fim))
+    for linha in cursor:
+        yield MovimentacaoLinha._make(linha)
@@ -0,0 +1,422 @@
+"""
+Sincronização da réplica local do caixa com a base central
+
+Cada caixa trabalha sobre o próprio arquivo SQLite (database.db) e consulta
+produtos e categorias localmente. Periodicamente:
+
+- vendas e movimentações de estoque registradas no caixa são enviadas à
+  base central, a partir do último ID já enviado por este caixa;
+- o catálogo (categorias, locais, produtos e estoque por local) é recebido
+  da base central apenas com as linhas alteradas desde a última
+  sincronização (campo sequencia).
+
+Na base central, gatilhos numeram cada linha do catálogo inserida ou
+alterada com um contador único e crescente. Como as gravações no SQLite são
+serializadas, a numeração segue a ordem em que as alterações são
+confirmadas, independentemente do relógio de cada caixa.
+
+O tráfego é proporcional às alterações, não ao tamanho do catálogo.
+
+Os IDs autoincrementais de cada banco são independentes: as linhas são
+identificadas entre os bancos pela chave natural (código do produto, nome
+da categoria e do local, dígitos do CPF/CNPJ do cliente). Produtos,
+categorias e clientes cadastrados no caixa são criados na base central
+quando uma venda ou movimentação enviada os referencia.
+
+Uso (a partir da pasta src):
+    python -m utils.sincronizacao /caminho/para/central.db
+"""
+import socket
+import sys
+from collections import defaultdict
+from peewee import SqliteDatabase, chunked
+from models.database import (db, Categoria, Local, Produto, EstoqueLocal, Cliente,
+                             Venda, ItemVenda, MovimentacaoEstoque, ControleSincronizacao,
+                             LOCAL_PADRAO, MODELOS, indexar_cliente, movimentar_estoque,
+                             preparar_esquema)
+
+# Quantidade de linhas por INSERT em lote
+TAMANHO_LOTE = 500
+
+# Catálogo recebido da base central: (modelo, marcador, chave natural,
+# chaves estrangeiras como {campo: (modelo, chave natural)})
+CATALOGO = (
+    (Categoria, 'recebimento_categorias', (Categoria.nome,), {}),
+    (Local, 'recebimento_locais', (Local.nome,), {}),
+    (Produto, 'recebimento_produtos', (Produto.codigo,),
+     {'categoria': (Categoria, Categoria.nome)}),
+    (EstoqueLocal, 'recebimento_estoques', (EstoqueLocal.local, EstoqueLocal.produto),
+     {'local': (Local, Local.nome), 'produto': (Produto, Produto.codigo)}),
+)
+
+# Contador das alterações do catálogo na base central (controle_sincronizacao)
+CHAVE_SEQUENCIA = 'sequencia_catalogo'
+
+# Numera a linha inserida ou alterada com o próximo valor do contador. A
+# condição do gatilho de alteração ignora a própria numeração.
+_NUMERAR_ALTERACAO = """
+    UPDATE controle_sincronizacao SET valor = CAST(valor AS INTEGER) + 1
+    WHERE chave = '{chave}';
+    UPDATE {tabela} SET sequencia = (SELECT CAST(valor AS INTEGER)
+                                     FROM controle_sincronizacao
+                                     WHERE chave = '{chave}')
+    WHERE rowid = NEW.rowid;
+"""
+
+
+def instalar_sequencia(database):
+    """Cria o contador e os gatilhos que numeram as alterações do catálogo"""
+    (ControleSincronizacao
+     .insert(chave=CHAVE_SEQUENCIA, valor='0')
+     .on_conflict_ignore()
+     .execute(database))
+    for modelo, _, _, _ in CATALOGO:
+        tabela = modelo._meta.table_name
+        corpo = _NUMERAR_ALTERACAO.format(tabela=tabela, chave=CHAVE_SEQUENCIA)
+        database.execute_sql(f"""CREATE TRIGGER IF NOT EXISTS {tabela}_sequencia_inserir
+            AFTER INSERT ON {tabela}
+            BEGIN {corpo} END""")
+        database.execute_sql(f"""CREATE TRIGGER IF NOT EXISTS {tabela}_sequencia_alterar
+            AFTER UPDATE ON {tabela}
+            WHEN NEW.sequencia = OLD.sequencia
+            BEGIN {corpo} END""")
+
+
+def mapear_ids(modelo, chave, ids, origem, destino):
+    """
+    Relaciona IDs de um banco aos IDs do outro pela chave natural
+    
+    Args:
+        modelo: Modelo das linhas
+        chave: Campo único que identifica a linha nos dois bancos
+        ids: IDs no banco de origem
+        origem, destino: Bancos
+    
+    Returns:
+        dict: ID na origem -> ID no destino (só das linhas existentes no destino)
+    """
+    mapa = {}
+    for lote in chunked(set(ids), TAMANHO_LOTE):
+        chaves = dict(modelo.select(modelo.id, chave)
+                      .where(modelo.id.in_(lote))
+                      .tuples()
+                      .bind(origem))
+        ids_destino = dict(modelo.select(chave, modelo.id)
+                           .where(chave.in_(list(chaves.values())))
+                           .tuples()
+                           .bind(destino))
+        for id_origem, valor in chaves.items():
+            if valor in ids_destino:
+                mapa[id_origem] = ids_destino[valor]
+    return mapa
+
+
+class Sincronizador:
+    """Sincroniza a réplica local de um caixa com a base central"""
+    
+    def __init__(self, caminho_central, identificador=None, database_local=db):
+        """
+        Args:
+            caminho_central (str): Caminho do arquivo SQLite da base central
+            identificador (str): Identificação do caixa (padrão: nome da máquina)
+            database_local: Banco local do caixa
+        """
+        self.identificador = identificador or socket.gethostname()
+        self.db_local = database_local
+        self.db_central = SqliteDatabase(caminho_central)
+        
+        # Garante o mesmo esquema na base central
+        with self.db_central.bind_ctx(MODELOS):
+            preparar_esquema(self.db_central)
+            instalar_sequencia(self.db_central)
+    
+    def _ler_marcador(self, database, chave, padrao=None):
+        """Lê um marcador de sincronização do banco informado"""
+        valor = (ControleSincronizacao
+                 .select(ControleSincronizacao.valor)
+                 .where(ControleSincronizacao.chave == chave)
+                 .scalar(database))
+        return valor if valor is not None else padrao
+    
+    def _gravar_marcador(self, database, chave, valor):
+        """Grava um marcador de sincronização no banco informado"""
+        (ControleSincronizacao
+         .insert(chave=chave, valor=str(valor))
+         .on_conflict_replace()
+         .execute(database))
+    
+    def _categorias_centrais(self, ids):
+        """IDs locais -> IDs centrais das categorias, criando as que faltam"""
+        mapa = mapear_ids(Categoria, Categoria.nome, ids, self.db_local, self.db_central)
+        faltando = [categoria_id for categoria_id in set(ids) if categoria_id not in mapa]
+        for lote in chunked(faltando, TAMANHO_LOTE):
+            for linha in Categoria.select().where(Categoria.id.in_(lote)).dicts().bind(self.db_local):
+                categoria_id = linha.pop('id')
+                mapa[categoria_id] = Categoria.insert(**linha).execute(self.db_central)
+        return mapa
+    
+    def _produtos_centrais(self, ids):
+        """IDs locais -> IDs centrais dos produtos, criando os que faltam"""
+        mapa = mapear_ids(Produto, Produto.codigo, ids, self.db_local, self.db_central)
+        faltando = [produto_id for produto_id in set(ids) if produto_id not in mapa]
+        for lote in chunked(faltando, TAMANHO_LOTE):
+            linhas = list(Produto.select().where(Produto.id.in_(lote)).dicts().bind(self.db_local))
+            categorias = self._categorias_centrais(
+                [linha['categoria'] for linha in linhas if linha['categoria']]
+            )
+            for linha in linhas:
+                produto_id = linha.pop('id')
+                linha['categoria'] = categorias.get(linha['categoria'])
+                # O estoque chega à base central pelas movimentações enviadas
+                linha['estoque_atual'] = 0
+                mapa[produto_id] = Produto.insert(**linha).execute(self.db_central)
+        return mapa
+    
+    def _locais_centrais(self, ids):
+        """
+        IDs locais -> IDs centrais dos locais
+        
+        Locais são cadastrados na base central e chegam aos caixas pelo
+        catálogo; um local que só exista no caixa interrompe o envio.
+        """
+        mapa = mapear_ids(Local, Local.nome, ids, self.db_local, self.db_central)
+        faltando = sorted(set(ids) - set(mapa))
+        if faltando:
+            raise ValueError(f"Locais inexistentes na base central: {faltando}")
+        return mapa
+    
+    def _clientes_centrais(self, ids):
+        """
+        IDs locais -> IDs centrais dos clientes, criando os que faltam
+        
+        Clientes com CPF/CNPJ são identificados pelos dígitos dele
+        (chave_documento), qualquer que seja a formatação; os demais, pelo
+        vínculo gravado na base central quando foram criados lá.
+        """
+        mapa = mapear_ids(Cliente, Cliente.chave_documento, ids, self.db_local, self.db_central)
+        faltando = [cliente_id for cliente_id in set(ids) if cliente_id not in mapa]
+        for lote in chunked(faltando, TAMANHO_LOTE):
+            for linha in Cliente.select().where(Cliente.id.in_(lote)).dicts().bind(self.db_local):
+                cliente_id = linha.pop('id')
+                chave = f'cliente:{self.identificador}:{cliente_id}'
+                cliente_central = self._ler_marcador(self.db_central, chave)
+                if cliente_central is None:
+                    cliente_central = Cliente.insert(**linha).execute(self.db_central)
+                    indexar_cliente(cliente_central, linha['nome'], linha['cpf_cnpj'],
+                                    linha['telefone'], linha['ativo'],
+                                    database=self.db_central)
+                    self._gravar_marcador(self.db_central, chave, cliente_central)
+                mapa[cliente_id] = int(cliente_central)
+        return mapa
+    
+    def enviar_vendas(self):
+        """
+        Envia à base central as vendas (e seus itens) ainda não enviadas
+        
+        O marcador do último ID enviado fica na base central e é gravado na
+        mesma transação dos dados, então uma falha no meio do envio não
+        duplica vendas. Clientes e produtos são gravados com os IDs que
+        têm na base central.
+        
+        Returns:
+            int: Quantidade de vendas enviadas
+        """
+        chave = f'envio_vendas:{self.identificador}'
+        ultimo_id = int(self._ler_marcador(self.db_central, chave, 0))
+        
+        vendas = list(Venda.select()
+                      .where(Venda.id > ultimo_id)
+                      .order_by(Venda.id)
+                      .dicts()
+                      .bind(self.db_local))
+        if not vendas:
+            return 0
+        
+        itens_por_venda = defaultdict(list)
+        itens = (ItemVenda.select()
+                 .where(ItemVenda.venda > ultimo_id)
+                 .dicts()
+                 .bind(self.db_local))
+        for item in itens:
+            itens_por_venda[item['venda']].append(item)
+        
+        with self.db_central.atomic():
+            clientes = self._clientes_centrais(
+                [venda['cliente'] for venda in vendas if venda['cliente']]
+            )
+            produtos = self._produtos_centrais(
+                [item['produto'] for itens in itens_por_venda.values() for item in itens]
+            )
+            
+            for venda in vendas:
+                venda_id_local = venda.pop('id')
+                venda['cliente'] = clientes.get(venda['cliente'])
+                venda_id_central = Venda.insert(**venda).execute(self.db_central)
+                
+                linhas = []
+                for item in itens_por_venda[venda_id_local]:
+                    item = dict(item)
+                    del item['id']
+                    item['venda'] = venda_id_central
+                    item['produto'] = produtos[item['produto']]
+                    linhas.append(item)
+                for lote in chunked(linhas, TAMANHO_LOTE):
+                    ItemVenda.insert_many(lote).execute(self.db_central)
+            
+            self._gravar_marcador(self.db_central, chave, venda_id_local)
+        
+        return len(vendas)
+    
+    def enviar_movimentacoes(self):
+        """
+        Envia à base central as movimentações de estoque ainda não enviadas
+        
+        O estoque de cada produto em cada local na base central (e o total
+        do produto) é ajustado pela variação das movimentações; os gatilhos
+        da base central renumeram as linhas, e os demais caixas recebem o
+        novo saldo na próxima sincronização. Se algum local das movimentações não
+        existir na base central, nada é enviado (ValueError).
+        
+        Returns:
+            int: Quantidade de movimentações enviadas
+        """
+        chave = f'envio_movimentacoes:{self.identificador}'
+        ultimo_id = int(self._ler_marcador(self.db_central, chave, 0))
+        
+        movimentacoes = (MovimentacaoEstoque.select()
+                         .where(MovimentacaoEstoque.id > ultimo_id)
+                         .order_by(MovimentacaoEstoque.id)
+                         .dicts()
+                         .bind(self.db_local))
+        
+        total = 0
+        variacoes = defaultdict(int)
+        
+        with self.db_central.atomic():
+            for lote in chunked(movimentacoes, TAMANHO_LOTE):
+                produtos = self._produtos_centrais([mov['produto'] for mov in lote])
+                locais = self._locais_centrais(
+                    [mov['local'] or LOCAL_PADRAO for mov in lote]
+                )
+                for mov in lote:
+                    ultimo_id = mov.pop('id')
+                    mov['produto'] = produtos[mov['produto']]
+                    mov['local'] = locais[mov['local'] or LOCAL_PADRAO]
+                    variacoes[(mov['produto'], mov['local'])] += (mov['estoque_atual'] -
+                                                                  mov['estoque_anterior'])
+                MovimentacaoEstoque.insert_many(lote).execute(self.db_central)
+                total += len(lote)
+            
+            if not total:
+                return 0
+            
+            # Sem validar: o caixa já validou a saída no próprio estoque
+            for (produto_id, local_id), variacao in variacoes.items():
+                if variacao:
+                    movimentar_estoque(produto_id, local_id, variacao, validar=False,
+                                       database=self.db_central)
+            
+            self._gravar_marcador(self.db_central, chave, ultimo_id)
+        
+        return total
+    
+    def receber_catalogo(self):
+        """
+        Recebe da base central as categorias, locais, produtos e estoques alterados
+        
+        Usa a maior sequencia já recebida como marcador e lê só as linhas
+        numeradas depois dela. A leitura na base central é feita numa única
+        transação: cada alteração confirmada tem numeração maior que as
+        anteriores, então nenhuma linha fica para trás. No primeiro
+        recebimento todo o catálogo é lido (inclusive as linhas anteriores
+        aos gatilhos, com sequencia 0). As linhas mantêm os IDs que já têm
+        no caixa.
+        
+        Returns:
+            int: Quantidade de linhas recebidas
+        """
+        total = 0
+        
+        with self.db_local.atomic(), self.db_central.atomic():
+            for modelo, chave, naturais, estrangeiras in CATALOGO:
+                marcador = self._ler_marcador(self.db_local, chave)
+                
+                query = modelo.select().order_by(modelo.sequencia)
+                if marcador is not None:
+                    query = query.where(modelo.sequencia > int(marcador))
+                
+                nomes_naturais = {campo.name for campo in naturais}
+                preservar = [campo for campo in modelo._meta.sorted_fields
+                             if campo.name != 'id' and campo.name not in nomes_naturais]
+                # Linhas cuja referência obrigatória não existe no caixa são ignoradas
+                obrigatorias = [campo for campo in estrangeiras
+                                if not modelo._meta.fields[campo].null]
+                
+                maior = None
+                for lote in chunked(query.dicts().bind(self.db_central), TAMANHO_LOTE):
+                    maior = lote[-1]['sequencia']
+                    total += len(lote)
+                    
+                    # Chaves estrangeiras com os IDs do caixa
+                    mapas = {
+                        campo: mapear_ids(alvo, chave_alvo,
+                                          [linha[campo] for linha in lote if linha[campo]],
+                                          self.db_central, self.db_local)
+                        for campo, (alvo, chave_alvo) in estrangeiras.items()
+                    }
+                    linhas = []
+                    for linha in lote:
+                        linha.pop('id', None)
+                        for campo, mapa in mapas.items():
+                            if linha[campo] is not None:
+                                linha[campo] = mapa.get(linha[campo])
+                        if all(linha[campo] is not None for campo in obrigatorias):
+                            linhas.append(linha)
+                    
+                    if linhas:
+                        (modelo.insert_many(linhas)
+                         .on_conflict(conflict_target=list(naturais), preserve=preservar)
+                         .execute(self.db_local))
+                
+                if maior is not None:
+                    self._gravar_marcador(self.db_local, chave, maior)
+        
+        return total
+    
+    def sincronizar(self):
+        """
+        Executa uma sincronização completa: envia e depois recebe
+        
+        O envio vem primeiro para que o catálogo recebido já contenha o
+        estoque ajustado pelas movimentações deste caixa.
+        
+        Returns:
+            tuple: (sucesso: bool, mensagem: str)
+        """
+        try:
+            vendas = self.enviar_vendas()
+            movimentacoes = self.enviar_movimentacoes()
+            catalogo = self.receber_catalogo()
+            
+            return True, (f"Sincronização concluída: {vendas} vendas e "
+                          f"{movimentacoes} movimentações enviadas, "
+                          f"{catalogo} registros do catálogo recebidos")
+        except Exception as e:
+            return False, f"Erro ao sincronizar: {str(e)}"
+    
+    def fechar(self):
+        """Fecha a conexão com a base central"""
+        if not self.db_central.is_closed():
+            self.db_central.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.sincronizacao /caminho/para/central.db")
+        sys.exit(1)
+    
+    sincronizador = Sincronizador(sys.argv[1])
+    sucesso, mensagem = sincronizador.sincronizar()
+    sincronizador.fechar()
+    print(mensagem)
+    sys.exit(0 if sucesso else 1)
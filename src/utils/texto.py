@@ -0,0 +1,25 @@
+"""
+Normalização de texto para chaves de busca
+"""
+import re
+import unicodedata
+
+_NAO_DIGITOS = re.compile(r'\D')
+_PALAVRAS = re.compile(r'\w+')
+
+
+def somente_digitos(texto):
+    """Mantém apenas os dígitos ('123.456.789-00' -> '12345678900')"""
+    return _NAO_DIGITOS.sub('', texto or '')
+
+
+def normalizar(texto):
+    """Remove acentos e converte para minúsculas ('João' -> 'joao')"""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return sem_acentos.casefold()
+
+
+def termos(texto):
+    """Palavras normalizadas do texto, sem repetição e na ordem em que aparecem"""
+    return list(dict.fromkeys(_PALAVRAS.findall(normalizar(texto))))
@@ -0,0 +1,91 @@
+"""
+Campos de busca incremental (enquanto o usuário digita)
+"""
+from PySide6.QtWidgets import QLineEdit, QCompleter
+from PySide6.QtCore import Qt, QTimer, QStringListModel, Signal
+from controllers.cliente_controller import ClienteController
+
+# Espera após a última tecla antes de buscar (ms)
+ATRASO_BUSCA = 150
+
+
+class BuscaIncremental(QLineEdit):
+    """
+    QLineEdit que emite buscaSolicitada só quando a digitação pausa
+    
+    Cada tecla reinicia o temporizador, então uma palavra digitada de uma
+    vez gera uma única busca em vez de uma por caractere.
+    """
+    
+    buscaSolicitada = Signal(str)
+    
+    def __init__(self, parent=None, atraso=ATRASO_BUSCA):
+        super().__init__(parent)
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(atraso)
+        self.temporizador.timeout.connect(self.emitir_busca)
+        self.textEdited.connect(self.temporizador.start)
+        self.ultimo_texto = None
+    
+    def emitir_busca(self):
+        """Emite a busca se o texto mudou desde a última"""
+        texto = self.text().strip()
+        if texto != self.ultimo_texto:
+            self.ultimo_texto = texto
+            self.buscaSolicitada.emit(texto)
+
+
+class CampoCliente(BuscaIncremental):
+    """
+    Campo de seleção de cliente por nome, telefone ou CPF/CNPJ
+    
+    As sugestões vêm de ClienteController.sugerir; o cliente escolhido
+    fica em cliente_id (None enquanto nenhum for escolhido).
+    """
+    
+    clienteSelecionado = Signal(object)
+    
+    def __init__(self, parent=None, limite=10):
+        super().__init__(parent)
+        self.limite = limite
+        self.cliente_id = None
+        self.sugestoes = {}
+        self.setPlaceholderText("Nome, telefone ou CPF/CNPJ do cliente...")
+        
+        self.modelo = QStringListModel(self)
+        self.completer = QCompleter(self.modelo, self)
+        # O filtro já foi feito na consulta; o completer só exibe
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.activated[str].connect(self.selecionar)
+        self.setCompleter(self.completer)
+        
+        self.textEdited.connect(self.limpar_selecao)
+        self.buscaSolicitada.connect(self.atualizar_sugestoes)
+    
+    def limpar_selecao(self):
+        """Descarta o cliente escolhido quando o texto é alterado"""
+        if self.cliente_id is not None:
+            self.cliente_id = None
+            self.clienteSelecionado.emit(None)
+    
+    def atualizar_sugestoes(self, texto):
+        """Consulta e exibe as sugestões para o texto digitado"""
+        self.sugestoes = {}
+        for cliente in ClienteController.sugerir(texto, self.limite):
+            detalhe = cliente.telefone or cliente.cpf_cnpj or ''
+            rotulo = f"{cliente.nome} — {detalhe}" if detalhe else cliente.nome
+            self.sugestoes[rotulo] = cliente
+        
+        self.modelo.setStringList(list(self.sugestoes))
+        if self.sugestoes:
+            self.completer.complete()
+    
+    def selecionar(self, rotulo):
+        """Registra o cliente escolhido na lista de sugestões"""
+        cliente = self.sugestoes.get(rotulo)
+        if cliente:
+            self.cliente_id = cliente.id
+            self.setText(cliente.nome)
+            self.clienteSelecionado.emit(cliente)
@@ -0,0 +1,136 @@
+"""
+Lista de categorias compartilhada pelos seletores (QComboBox)
+
+As categorias ativas são lidas uma única vez e ficam em um modelo Qt
+único para toda a aplicação. Os combos apenas apontam para ele, então
+abrir um diálogo não consulta o banco nem recria itens. O modelo
+acompanha CategoriaController (criar, atualizar, excluir) e insere,
+move ou remove só a linha afetada.
+
+Uso:
+    configurar_combo_categorias(self.cmb_categoria)
+    categoria_id = self.cmb_categoria.currentData()
+"""
+from bisect import bisect_left
+from PySide6.QtWidgets import QComboBox, QCompleter
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from controllers.categoria_controller import CategoriaController
+from utils.texto import normalizar
+
+# Texto da primeira linha (categoria_id None)
+SEM_CATEGORIA = "Sem categoria"
+
+
+class ModeloCategorias(QAbstractListModel):
+    """
+    Categorias ativas em ordem alfabética, com "Sem categoria" na linha 0
+    
+    DisplayRole é o nome e UserRole o ID, como nos itens de um QComboBox.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Ordenadas por (nome normalizado, id); a linha no modelo é a posição + 1
+        self.chaves = []
+        self.nomes = {}
+        self.carregar()
+        CategoriaController.registrar_observador(self.categoria_alterada)
+    
+    @staticmethod
+    def _chave(categoria_id, nome):
+        return (normalizar(nome), categoria_id)
+    
+    def carregar(self):
+        """(Re)lê todas as categorias ativas do banco"""
+        self.beginResetModel()
+        categorias = CategoriaController.listar_todas(somente_leitura=True)
+        self.nomes = {categoria.id: categoria.nome for categoria in categorias}
+        self.chaves = sorted(self._chave(id_, nome) for id_, nome in self.nomes.items())
+        self.endResetModel()
+    
+    def linha_da_categoria(self, categoria_id):
+        """Linha do modelo da categoria (0 para None, -1 se não estiver na lista)"""
+        if categoria_id is None:
+            return 0
+        nome = self.nomes.get(categoria_id)
+        if nome is None:
+            return -1
+        return bisect_left(self.chaves, self._chave(categoria_id, nome)) + 1
+    
+    def _inserir(self, categoria_id, nome):
+        chave = self._chave(categoria_id, nome)
+        posicao = bisect_left(self.chaves, chave)
+        self.beginInsertRows(QModelIndex(), posicao + 1, posicao + 1)
+        self.chaves.insert(posicao, chave)
+        self.nomes[categoria_id] = nome
+        self.endInsertRows()
+    
+    def _remover(self, categoria_id):
+        linha = self.linha_da_categoria(categoria_id)
+        if linha <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), linha, linha)
+        del self.chaves[linha - 1]
+        del self.nomes[categoria_id]
+        self.endRemoveRows()
+    
+    def categoria_alterada(self, evento, categoria):
+        """Aplica uma alteração avisada por CategoriaController"""
+        if evento == 'criada':
+            self._inserir(categoria.id, categoria.nome)
+        elif evento == 'excluida':
+            self._remover(categoria.id)
+        elif evento == 'alterada' and categoria.id in self.nomes:
+            # Renomear pode mudar a posição: remove e insere de novo
+            self._remover(categoria.id)
+            self._inserir(categoria.id, categoria.nome)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.chaves) + 1
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        row = index.row()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return SEM_CATEGORIA if row == 0 else self.nomes[self.chaves[row - 1][1]]
+        if role == Qt.ItemDataRole.UserRole:
+            return None if row == 0 else self.chaves[row - 1][1]
+        return None
+
+
+_MODELO = None
+
+
+def modelo_categorias():
+    """Instância única de ModeloCategorias (criada no primeiro uso)"""
+    global _MODELO
+    if _MODELO is None:
+        _MODELO = ModeloCategorias()
+    return _MODELO
+
+
+def configurar_combo_categorias(combo):
+    """
+    Liga o combo ao modelo compartilhado, com busca por parte do nome
+    
+    O combo fica editável apenas para digitar a busca: o texto digitado
+    não cria categorias.
+    """
+    combo.setModel(modelo_categorias())
+    combo.setEditable(True)
+    combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+    
+    completer = QCompleter(combo.model(), combo)
+    completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    completer.setFilterMode(Qt.MatchFlag.MatchContains)
+    completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+    combo.setCompleter(completer)
+    combo.setCurrentIndex(0)
+    
+    def confirmar():
+        # Texto que não corresponde a uma categoria volta para a selecionada
+        linha = combo.findText(combo.currentText(), Qt.MatchFlag.MatchFixedString)
+        if linha >= 0:
+            combo.setCurrentIndex(linha)
+        else:
+            combo.setEditText(combo.itemText(combo.currentIndex()))
+    combo.lineEdit().editingFinished.connect(confirmar)
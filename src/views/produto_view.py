@@ -2,14 +2,15 @@
 Interface gráfica para cadastro de produtos
 """
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-                               QTableWidget, QTableWidgetItem, QLineEdit, QLabel,
-                               QDialog, QFormLayout, QTextEdit, QComboBox,
-                               QDoubleSpinBox, QSpinBox, QMessageBox, QHeaderView,
+                               QLineEdit, QLabel, QDialog, QFormLayout, QTextEdit,
+                               QComboBox, QDoubleSpinBox, QSpinBox, QMessageBox,
                                QGroupBox)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon
 from controllers.produto_controller import ProdutoController
-from models.database import Categoria
+from views.busca_incremental import BuscaIncremental
+from views.tabela_virtual import TabelaVirtual, Coluna, formatar_moeda, CENTRO
+from views.modelo_categorias import configurar_combo_categorias
 
 
 class DialogoProduto(QDialog):
@@ -125,16 +126,8 @@ class DialogoProduto(QDialog):
         layout.addLayout(layout_botoes)
     
     def carregar_categorias(self):
-        """Carrega categorias no combobox"""
-        self.cmb_categoria.clear()
-        self.cmb_categoria.addItem("Sem categoria", None)
-        
-        try:
-            categorias = Categoria.select().where(Categoria.ativo == True)
-            for cat in categorias:
-                self.cmb_categoria.addItem(cat.nome, cat.id)
-        except Exception as e:
-            print(f"Erro ao carregar categorias: {e}")
+        """Liga o combobox à lista de categorias compartilhada"""
+        configurar_combo_categorias(self.cmb_categoria)
     
     def calcular_margem(self):
         """Calcula e exibe a margem de lucro"""
@@ -161,8 +154,8 @@ class DialogoProduto(QDialog):
         self.txt_nome.setText(self.produto.nome)
         self.txt_descricao.setPlainText(self.produto.descricao or "")
         
-        if self.produto.categoria:
-            index = self.cmb_categoria.findData(self.produto.categoria.id)
+        if self.produto.categoria_id:
+            index = self.cmb_categoria.findData(self.produto.categoria_id)
             if index >= 0:
                 self.cmb_categoria.setCurrentIndex(index)
         
@@ -204,7 +197,9 @@ class DialogoProduto(QDialog):
         
         # Salvar
         if self.produto:
-            sucesso, mensagem = ProdutoController.atualizar(self.produto.id, dados)
+            sucesso, mensagem = ProdutoController.atualizar(
+                self.produto.id, dados, versao=self.produto.atualizado_em
+            )
         else:
             sucesso, mensagem, _ = ProdutoController.criar(dados)
         
@@ -215,6 +210,226 @@ class DialogoProduto(QDialog):
             QMessageBox.warning(self, "Erro", mensagem)
 
 
+class DialogoLote(QDialog):
+    """Diálogo para operações em lote sobre produtos"""
+    
+    OPERACOES = [
+        ("Reajustar preço de venda", 'preco_venda'),
+        ("Reajustar preço de custo", 'preco_custo'),
+        ("Mudar categoria", 'categoria'),
+        ("Inativar", 'inativar'),
+    ]
+    
+    def __init__(self, parent=None, ids_selecionados=None):
+        super().__init__(parent)
+        self.ids_selecionados = ids_selecionados or []
+        self.setWindowTitle("Ações em Lote")
+        self.setModal(True)
+        self.setMinimumWidth(500)
+        
+        self.configurar_ui()
+    
+    def configurar_ui(self):
+        """Configura a interface do diálogo"""
+        layout = QVBoxLayout(self)
+        
+        # Seleção de produtos
+        grupo_produtos = QGroupBox("Produtos")
+        form_produtos = QFormLayout(grupo_produtos)
+        
+        self.cmb_abrangencia = QComboBox()
+        self.cmb_abrangencia.addItem(f"Selecionados ({len(self.ids_selecionados)})", 'ids')
+        self.cmb_abrangencia.addItem("Por categoria", 'categoria')
+        self.cmb_abrangencia.addItem("Por faixa de códigos", 'codigos')
+        self.cmb_abrangencia.currentIndexChanged.connect(self.atualizar_campos)
+        form_produtos.addRow("Aplicar a:", self.cmb_abrangencia)
+        
+        self.cmb_categoria_filtro = QComboBox()
+        self.carregar_categorias(self.cmb_categoria_filtro)
+        form_produtos.addRow("Categoria:", self.cmb_categoria_filtro)
+        
+        self.txt_codigo_inicial = QLineEdit()
+        form_produtos.addRow("Código inicial:", self.txt_codigo_inicial)
+        
+        self.txt_codigo_final = QLineEdit()
+        form_produtos.addRow("Código final:", self.txt_codigo_final)
+        
+        layout.addWidget(grupo_produtos)
+        
+        # Operação
+        grupo_operacao = QGroupBox("Operação")
+        form_operacao = QFormLayout(grupo_operacao)
+        
+        self.cmb_operacao = QComboBox()
+        for texto, operacao in self.OPERACOES:
+            self.cmb_operacao.addItem(texto, operacao)
+        self.cmb_operacao.currentIndexChanged.connect(self.atualizar_campos)
+        form_operacao.addRow("Operação:", self.cmb_operacao)
+        
+        self.spin_percentual = QDoubleSpinBox()
+        self.spin_percentual.setSuffix(" %")
+        self.spin_percentual.setRange(-99.99, 1000)
+        self.spin_percentual.setDecimals(2)
+        form_operacao.addRow("Reajuste:", self.spin_percentual)
+        
+        self.cmb_nova_categoria = QComboBox()
+        self.carregar_categorias(self.cmb_nova_categoria)
+        form_operacao.addRow("Nova categoria:", self.cmb_nova_categoria)
+        
+        layout.addWidget(grupo_operacao)
+        
+        # Resultado da simulação
+        self.lbl_resumo = QLabel("Use \"Simular\" para ver o efeito antes de aplicar.")
+        self.lbl_resumo.setStyleSheet("color: gray; font-style: italic;")
+        self.lbl_resumo.setWordWrap(True)
+        layout.addWidget(self.lbl_resumo)
+        
+        # Botões
+        layout_botoes = QHBoxLayout()
+        
+        btn_desfazer = QPushButton("↩️ Desfazer Última")
+        btn_desfazer.clicked.connect(self.desfazer_ultima)
+        layout_botoes.addWidget(btn_desfazer)
+        
+        layout_botoes.addStretch()
+        
+        btn_fechar = QPushButton("Fechar")
+        btn_fechar.clicked.connect(self.reject)
+        layout_botoes.addWidget(btn_fechar)
+        
+        btn_simular = QPushButton("Simular")
+        btn_simular.clicked.connect(self.simular)
+        layout_botoes.addWidget(btn_simular)
+        
+        btn_aplicar = QPushButton("Aplicar")
+        btn_aplicar.clicked.connect(self.aplicar)
+        btn_aplicar.setStyleSheet("""
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                padding: 8px 20px;
+                border-radius: 4px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+        """)
+        layout_botoes.addWidget(btn_aplicar)
+        
+        layout.addLayout(layout_botoes)
+        
+        if not self.ids_selecionados:
+            self.cmb_abrangencia.setCurrentIndex(1)
+        self.atualizar_campos()
+    
+    def carregar_categorias(self, combo):
+        """Liga o combobox informado à lista de categorias compartilhada"""
+        configurar_combo_categorias(combo)
+    
+    def atualizar_campos(self):
+        """Habilita apenas os campos da abrangência e operação escolhidas"""
+        abrangencia = self.cmb_abrangencia.currentData()
+        self.cmb_categoria_filtro.setEnabled(abrangencia == 'categoria')
+        self.txt_codigo_inicial.setEnabled(abrangencia == 'codigos')
+        self.txt_codigo_final.setEnabled(abrangencia == 'codigos')
+        
+        operacao = self.cmb_operacao.currentData()
+        self.spin_percentual.setEnabled(operacao in ('preco_venda', 'preco_custo'))
+        self.cmb_nova_categoria.setEnabled(operacao == 'categoria')
+    
+    def filtro(self):
+        """Monta o filtro a partir da abrangência escolhida"""
+        abrangencia = self.cmb_abrangencia.currentData()
+        if abrangencia == 'ids':
+            return {'ids': self.ids_selecionados}
+        if abrangencia == 'categoria':
+            return {'categoria_id': self.cmb_categoria_filtro.currentData()}
+        return {
+            'codigo_inicial': self.txt_codigo_inicial.text().strip(),
+            'codigo_final': self.txt_codigo_final.text().strip(),
+        }
+    
+    def simular(self):
+        """Mostra quantos produtos serão afetados e o efeito na margem"""
+        operacao = self.cmb_operacao.currentData()
+        percentual = self.spin_percentual.value() if operacao in ('preco_venda', 'preco_custo') else 0
+        campo = operacao if operacao == 'preco_custo' else 'preco_venda'
+        
+        resumo = ProdutoController.simular_reajuste(self.filtro(), percentual, campo)
+        if resumo['erro']:
+            self.lbl_resumo.setText(resumo['erro'])
+            self.lbl_resumo.setStyleSheet("color: red;")
+            return
+        
+        texto = (f"{resumo['produtos']} produtos serão alterados. "
+                 f"Margem média: {resumo['margem_media_atual']}%")
+        if percentual:
+            texto += f" → {resumo['margem_media_nova']}%"
+        if resumo['abaixo_do_custo']:
+            texto += f". Atenção: {resumo['abaixo_do_custo']} ficarão com preço abaixo do custo"
+        
+        self.lbl_resumo.setText(texto)
+        self.lbl_resumo.setStyleSheet(
+            "color: red;" if resumo['abaixo_do_custo'] else "color: black;"
+        )
+    
+    def aplicar(self):
+        """Aplica a operação escolhida"""
+        operacao = self.cmb_operacao.currentData()
+        
+        resposta = QMessageBox.question(
+            self,
+            "Confirmar Alteração em Lote",
+            f"Deseja realmente aplicar \"{self.cmb_operacao.currentText()}\"?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if resposta != QMessageBox.StandardButton.Yes:
+            return
+        
+        filtro = self.filtro()
+        if operacao in ('preco_venda', 'preco_custo'):
+            sucesso, mensagem, _ = ProdutoController.reajustar_precos_lote(
+                filtro, self.spin_percentual.value(), operacao
+            )
+        elif operacao == 'categoria':
+            sucesso, mensagem, _ = ProdutoController.recategorizar_lote(
+                filtro, self.cmb_nova_categoria.currentData()
+            )
+        else:
+            sucesso, mensagem, _ = ProdutoController.inativar_lote(filtro)
+        
+        if sucesso:
+            QMessageBox.information(self, "Sucesso", mensagem)
+            self.accept()
+        else:
+            QMessageBox.warning(self, "Erro", mensagem)
+    
+    def desfazer_ultima(self):
+        """Desfaz a última alteração em lote ainda não desfeita"""
+        pendentes = [l for l in ProdutoController.listar_lotes() if not l.desfeita]
+        if not pendentes:
+            QMessageBox.information(self, "Atenção", "Nenhuma alteração em lote para desfazer.")
+            return
+        
+        lote = pendentes[0]
+        resposta = QMessageBox.question(
+            self,
+            "Desfazer Alteração",
+            f"Desfazer \"{lote.descricao}\" ({lote.quantidade} produtos)?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if resposta != QMessageBox.StandardButton.Yes:
+            return
+        
+        sucesso, mensagem = ProdutoController.desfazer_lote(lote.id)
+        if sucesso:
+            QMessageBox.information(self, "Sucesso", mensagem)
+            self.accept()
+        else:
+            QMessageBox.warning(self, "Erro", mensagem)
+
+
 class ProdutoView(QWidget):
     """View principal para gerenciamento de produtos"""
     
@@ -232,9 +447,9 @@ class ProdutoView(QWidget):
         
         # Busca
         toolbar.addWidget(QLabel("Buscar:"))
-        self.txt_busca = QLineEdit()
+        self.txt_busca = BuscaIncremental()
         self.txt_busca.setPlaceholderText("Digite o nome ou código do produto...")
-        self.txt_busca.textChanged.connect(self.buscar)
+        self.txt_busca.buscaSolicitada.connect(self.buscar)
         toolbar.addWidget(self.txt_busca)
         
         toolbar.addStretch()
@@ -263,25 +478,8 @@ class ProdutoView(QWidget):
         layout.addLayout(toolbar)
         
         # Tabela de produtos
-        self.tabela = QTableWidget()
-        self.tabela.setColumnCount(9)
-        self.tabela.setHorizontalHeaderLabels([
-            "ID", "Código", "Nome", "Categoria", "Preço Custo",
-            "Preço Venda", "Estoque", "Est. Mín.", "Status"
-        ])
-        
-        # Configurar tabela
-        self.tabela.setAlternatingRowColors(True)
-        self.tabela.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.tabela.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.tabela.verticalHeader().setVisible(False)
-        
-        # Ajustar colunas
-        header = self.tabela.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        self.tabela = TabelaVirtual(self.colunas())
+        self.tabela.setSelectionMode(TabelaVirtual.SelectionMode.ExtendedSelection)
         
         # Double click para editar
         self.tabela.doubleClicked.connect(self.editar_produto)
@@ -292,6 +490,10 @@ class ProdutoView(QWidget):
         layout_acoes = QHBoxLayout()
         layout_acoes.addStretch()
         
+        btn_lote = QPushButton("📋 Ações em Lote")
+        btn_lote.clicked.connect(self.acoes_em_lote)
+        layout_acoes.addWidget(btn_lote)
+        
         btn_editar = QPushButton("✏️ Editar")
         btn_editar.clicked.connect(self.editar_produto)
         layout_acoes.addWidget(btn_editar)
@@ -318,40 +520,34 @@ class ProdutoView(QWidget):
         self.lbl_total.setStyleSheet("font-weight: bold; padding: 5px;")
         layout.addWidget(self.lbl_total)
     
+    @staticmethod
+    def colunas():
+        """Colunas da tabela de produtos (linhas ProdutoLinha)"""
+        def estoque_baixo(produto):
+            if produto.estoque_atual <= produto.estoque_minimo:
+                return Qt.GlobalColor.red, Qt.GlobalColor.white
+            return None
+        
+        status = lambda ativo: "Ativo" if ativo else "Inativo"
+        return [
+            Coluna("ID", 'id'),
+            Coluna("Código", 'codigo'),
+            Coluna("Nome", 'nome', largura='esticar'),
+            Coluna("Categoria", 'categoria_nome'),
+            Coluna("Preço Custo", 'preco_custo', formatar=formatar_moeda),
+            Coluna("Preço Venda", 'preco_venda', formatar=formatar_moeda),
+            Coluna("Estoque", 'estoque_atual', alinhamento=CENTRO, destaque=estoque_baixo),
+            Coluna("Est. Mín.", 'estoque_minimo'),
+            Coluna("Status", 'ativo', formatar=status),
+        ]
+    
     def atualizar_tabela(self, produtos=None):
         """Atualiza a tabela de produtos"""
         if produtos is None:
-            produtos = ProdutoController.listar_todos()
+            produtos = ProdutoController.listar_todos(somente_leitura=True)
         
-        self.tabela.setRowCount(0)
-        
-        for produto in produtos:
-            row = self.tabela.rowCount()
-            self.tabela.insertRow(row)
-            
-            # Dados
-            self.tabela.setItem(row, 0, QTableWidgetItem(str(produto.id)))
-            self.tabela.setItem(row, 1, QTableWidgetItem(produto.codigo))
-            self.tabela.setItem(row, 2, QTableWidgetItem(produto.nome))
-            
-            categoria = produto.categoria.nome if produto.categoria else "-"
-            self.tabela.setItem(row, 3, QTableWidgetItem(categoria))
-            
-            self.tabela.setItem(row, 4, QTableWidgetItem(f"R$ {produto.preco_custo:.2f}"))
-            self.tabela.setItem(row, 5, QTableWidgetItem(f"R$ {produto.preco_venda:.2f}"))
-            
-            # Estoque com cor
-            item_estoque = QTableWidgetItem(str(produto.estoque_atual))
-            if produto.estoque_atual <= produto.estoque_minimo:
-                item_estoque.setBackground(Qt.GlobalColor.red)
-                item_estoque.setForeground(Qt.GlobalColor.white)
-            item_estoque.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.tabela.setItem(row, 6, item_estoque)
-            
-            self.tabela.setItem(row, 7, QTableWidgetItem(str(produto.estoque_minimo)))
-            
-            status = "Ativo" if produto.ativo else "Inativo"
-            self.tabela.setItem(row, 8, QTableWidgetItem(status))
+        # Os textos são formatados só quando as células são pintadas
+        self.tabela.definir_linhas(produtos)
         
         # Atualizar rodapé
         self.lbl_total.setText(f"Total de produtos: {len(produtos)}")
@@ -364,7 +560,7 @@ class ProdutoView(QWidget):
             self.atualizar_tabela()
             return
         
-        produtos = ProdutoController.listar_todos()
+        produtos = ProdutoController.listar_todos(somente_leitura=True)
         filtrados = [
             p for p in produtos
             if texto in p.nome.lower() or texto in p.codigo.lower()
@@ -380,27 +576,36 @@ class ProdutoView(QWidget):
     
     def editar_produto(self):
         """Edita o produto selecionado"""
-        row = self.tabela.currentRow()
-        if row < 0:
+        linha = self.tabela.linha_atual()
+        if linha is None:
             QMessageBox.warning(self, "Atenção", "Selecione um produto para editar!")
             return
         
-        produto_id = int(self.tabela.item(row, 0).text())
-        produto = ProdutoController.buscar_por_id(produto_id)
+        produto = ProdutoController.buscar_por_id(linha.id)
         
         if produto:
             dialogo = DialogoProduto(self, produto)
             if dialogo.exec():
                 self.atualizar_tabela()
     
+    def ids_selecionados(self):
+        """IDs dos produtos selecionados na tabela"""
+        return [linha.id for linha in self.tabela.linhas_selecionadas()]
+    
+    def acoes_em_lote(self):
+        """Abre o diálogo de operações em lote"""
+        dialogo = DialogoLote(self, self.ids_selecionados())
+        if dialogo.exec():
+            self.atualizar_tabela()
+    
     def excluir_produto(self):
         """Exclui o produto selecionado"""
-        row = self.tabela.currentRow()
-        if row < 0:
+        linha = self.tabela.linha_atual()
+        if linha is None:
             QMessageBox.warning(self, "Atenção", "Selecione um produto para excluir!")
             return
         
-        produto_nome = self.tabela.item(row, 2).text()
+        produto_nome = linha.nome
         
         resposta = QMessageBox.question(
             self,
@@ -410,8 +615,7 @@ class ProdutoView(QWidget):
         )
         
         if resposta == QMessageBox.StandardButton.Yes:
-            produto_id = int(self.tabela.item(row, 0).text())
-            sucesso, mensagem = ProdutoController.excluir(produto_id)
+            sucesso, mensagem = ProdutoController.excluir(linha.id)
             
             if sucesso:
                 QMessageBox.information(self, "Sucesso", mensagem)
@@ -0,0 +1,208 @@
+"""
+Interface gráfica de relatórios
+
+Os relatórios rodam em segundo plano (utils.relatorios) e as linhas
+chegam à tabela em lotes, conforme são lidas: a janela continua
+respondendo e o caixa continua gravando durante relatórios longos.
+"""
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                               QLabel, QComboBox, QDateEdit)
+from PySide6.QtCore import QObject, Signal, QDate
+from utils import relatorios
+from views.tabela_virtual import (TabelaVirtual, Coluna, formatar_moeda, ajustar_larguras,
+                                  CENTRO, DIREITA)
+
+
+class RelatorioQt(QObject):
+    """
+    Leva os retornos de um relatório da thread de fundo para a interface
+    
+    Sinais emitidos na thread do relatório são entregues na thread do
+    objeto (a principal) pela fila de eventos do Qt. Lotes de um relatório
+    já cancelado que ainda estejam na fila são descartados.
+    """
+    
+    lote = Signal(object)
+    concluido = Signal(int)
+    falhou = Signal(str)
+    
+    # (execucao, valor), emitidos na thread do relatório
+    _lote = Signal(object, object)
+    _concluido = Signal(object, int)
+    _falhou = Signal(object, str)
+    
+    def __init__(self, executor, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.execucao = None
+        # Métodos deste objeto: executados na thread dele (a da interface)
+        self._lote.connect(self._repassar_lote)
+        self._concluido.connect(self._repassar_conclusao)
+        self._falhou.connect(self._repassar_falha)
+    
+    def _repassar_lote(self, execucao, linhas):
+        if execucao is self.execucao:
+            self.lote.emit(linhas)
+    
+    def _repassar_conclusao(self, execucao, total):
+        if execucao is self.execucao:
+            self.execucao = None
+            self.concluido.emit(total)
+    
+    def _repassar_falha(self, execucao, mensagem):
+        if execucao is self.execucao:
+            self.execucao = None
+            self.falhou.emit(mensagem)
+    
+    def executar(self, relatorio, *args):
+        """Cancela o relatório anterior (se houver) e inicia outro"""
+        self.cancelar()
+        execucao = relatorios.Execucao()
+        self.execucao = execucao
+        self.executor.executar(
+            relatorio, *args,
+            ao_receber=lambda linhas: self._lote.emit(execucao, linhas),
+            ao_concluir=lambda total: self._concluido.emit(execucao, total),
+            ao_falhar=lambda mensagem: self._falhou.emit(execucao, mensagem),
+            execucao=execucao,
+        )
+    
+    def cancelar(self):
+        """Cancela o relatório em andamento"""
+        if self.execucao is not None:
+            self.execucao.cancelar()
+            self.execucao = None
+
+
+# Relatórios disponíveis: (título, função, colunas)
+RELATORIOS = [
+    ("Vendas por dia", relatorios.vendas_por_dia, [
+        Coluna("Dia", 'dia', alinhamento=CENTRO),
+        Coluna("Vendas", 'quantidade', alinhamento=CENTRO),
+        Coluna("Valor Total", 'valor_total', formatar=formatar_moeda, alinhamento=DIREITA),
+        Coluna("Desconto", 'desconto', formatar=formatar_moeda, alinhamento=DIREITA),
+        Coluna("Valor Final", 'valor_final', formatar=formatar_moeda, alinhamento=DIREITA),
+    ]),
+    ("Produtos mais vendidos", relatorios.produtos_mais_vendidos, [
+        Coluna("Código", 'codigo'),
+        Coluna("Nome", 'nome', largura='esticar'),
+        Coluna("Quantidade", 'quantidade', alinhamento=CENTRO),
+        Coluna("Valor", 'valor', formatar=formatar_moeda, alinhamento=DIREITA),
+    ]),
+    ("Movimentações de estoque", relatorios.movimentacoes_periodo, [
+        Coluna("Data", 'data'),
+        Coluna("Local", 'local'),
+        Coluna("Código", 'codigo'),
+        Coluna("Nome", 'nome', largura='esticar'),
+        Coluna("Tipo", 'tipo', alinhamento=CENTRO),
+        Coluna("Quantidade", 'quantidade', alinhamento=CENTRO),
+        Coluna("Anterior", 'estoque_anterior', alinhamento=CENTRO),
+        Coluna("Atual", 'estoque_atual', alinhamento=CENTRO),
+        Coluna("Motivo", 'motivo'),
+    ]),
+]
+
+
+class RelatorioView(QWidget):
+    """Widget principal de relatórios"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Conexões de leitura abertas só no primeiro relatório
+        self.executor = None
+        self.relatorio_qt = None
+        self.configurar_ui()
+    
+    def configurar_ui(self):
+        """Configura a interface"""
+        layout = QVBoxLayout(self)
+        
+        # Filtros
+        layout_filtros = QHBoxLayout()
+        
+        self.cmb_relatorio = QComboBox()
+        for titulo, _, _ in RELATORIOS:
+            self.cmb_relatorio.addItem(titulo)
+        layout_filtros.addWidget(QLabel("Relatório:"))
+        layout_filtros.addWidget(self.cmb_relatorio)
+        
+        hoje = QDate.currentDate()
+        self.dt_inicio = QDateEdit(hoje.addDays(-30))
+        self.dt_inicio.setCalendarPopup(True)
+        self.dt_fim = QDateEdit(hoje)
+        self.dt_fim.setCalendarPopup(True)
+        layout_filtros.addWidget(QLabel("De:"))
+        layout_filtros.addWidget(self.dt_inicio)
+        layout_filtros.addWidget(QLabel("Até:"))
+        layout_filtros.addWidget(self.dt_fim)
+        layout_filtros.addStretch()
+        
+        self.btn_gerar = QPushButton("📈 Gerar")
+        self.btn_gerar.clicked.connect(self.gerar)
+        layout_filtros.addWidget(self.btn_gerar)
+        
+        self.btn_cancelar = QPushButton("Cancelar")
+        self.btn_cancelar.setEnabled(False)
+        self.btn_cancelar.clicked.connect(self.cancelar)
+        layout_filtros.addWidget(self.btn_cancelar)
+        
+        layout.addLayout(layout_filtros)
+        
+        # Tabela
+        self.tabela = TabelaVirtual(RELATORIOS[0][2])
+        layout.addWidget(self.tabela)
+        
+        # Situação
+        self.lbl_situacao = QLabel("")
+        self.lbl_situacao.setStyleSheet("color: gray;")
+        layout.addWidget(self.lbl_situacao)
+    
+    def gerar(self):
+        """Inicia o relatório selecionado"""
+        if self.executor is None:
+            self.executor = relatorios.ExecutorRelatorios()
+            self.relatorio_qt = RelatorioQt(self.executor, self)
+            self.relatorio_qt.lote.connect(self.receber_lote)
+            self.relatorio_qt.concluido.connect(self.concluir)
+            self.relatorio_qt.falhou.connect(self.falhar)
+        
+        _, funcao, colunas = RELATORIOS[self.cmb_relatorio.currentIndex()]
+        self.tabela.definir_colunas(colunas)
+        
+        inicio = self.dt_inicio.date().toString('yyyy-MM-dd')
+        fim = self.dt_fim.date().toString('yyyy-MM-dd')
+        self.relatorio_qt.executar(funcao, inicio, fim)
+        
+        self.btn_cancelar.setEnabled(True)
+        self.lbl_situacao.setText("Gerando relatório...")
+    
+    def receber_lote(self, linhas):
+        """Exibe um lote de linhas do relatório"""
+        self.tabela.acrescentar_linhas(linhas)
+        self.lbl_situacao.setText(f"Gerando relatório... {self.tabela.modelo.rowCount()} linhas")
+    
+    def concluir(self, total):
+        """Relatório terminado: redimensiona as colunas pelo resultado completo"""
+        ajustar_larguras(self.tabela)
+        self.btn_cancelar.setEnabled(False)
+        self.lbl_situacao.setText(f"{total} linhas")
+    
+    def falhar(self, mensagem):
+        """Relatório interrompido por erro"""
+        self.btn_cancelar.setEnabled(False)
+        self.lbl_situacao.setText(f"Erro ao gerar relatório: {mensagem}")
+    
+    def cancelar(self):
+        """Cancela o relatório em andamento"""
+        if self.relatorio_qt is not None:
+            self.relatorio_qt.cancelar()
+        self.btn_cancelar.setEnabled(False)
+        self.lbl_situacao.setText(f"Cancelado ({self.tabela.modelo.rowCount()} linhas)")
+    
+    def fechar(self):
+        """Cancela o relatório em andamento e fecha as conexões de leitura"""
+        if self.relatorio_qt is not None:
+            self.relatorio_qt.cancelar()
+        if self.executor is not None:
+            self.executor.fechar()
+            self.executor = None
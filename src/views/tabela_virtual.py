@@ -0,0 +1,308 @@
+"""
+Tabelas virtualizadas para listas grandes
+
+O QTableWidget cria um QTableWidgetItem por célula, formata todos os
+valores de antemão e, com ResizeToContents, mede todas as linhas para
+dimensionar as colunas. Aqui os dados ficam na lista original (por
+exemplo, namedtuples dos controllers) e:
+
+- ModeloTabela formata apenas as células que a view pede para pintar e
+  guarda os textos formatados em cache;
+- DelegateTabela, compartilhado por todas as tabelas, pinta o texto e o
+  destaque direto, com pincéis criados uma única vez por cor;
+- ajustar_larguras mede só uma amostra das linhas.
+
+Uso:
+    colunas = [
+        Coluna("Código", 'codigo'),
+        Coluna("Preço", 'preco_venda', formatar=formatar_moeda, alinhamento=DIREITA),
+    ]
+    tabela = TabelaVirtual(colunas)
+    tabela.definir_linhas(ProdutoController.listar_todos(somente_leitura=True))
+"""
+import random
+from operator import attrgetter
+from PySide6.QtWidgets import (QTableView, QStyledItemDelegate, QStyle, QHeaderView,
+                               QAbstractItemView)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QBrush, QColor
+
+ESQUERDA = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+CENTRO = Qt.AlignmentFlag.AlignCenter
+DIREITA = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+# Textos formatados mantidos em cache por modelo
+LIMITE_CACHE = 50000
+
+# Linhas medidas para dimensionar as colunas
+AMOSTRA_LARGURA = 300
+
+# Pincéis compartilhados, um por cor
+_PINCEIS = {}
+
+
+def pincel(cor):
+    """QBrush da cor (nome, '#rrggbb' ou Qt.GlobalColor), criado uma única vez"""
+    if cor not in _PINCEIS:
+        _PINCEIS[cor] = QBrush(QColor(cor))
+    return _PINCEIS[cor]
+
+
+def formatar_moeda(valor):
+    """Valor em reais para exibição (R$ 1234.50)"""
+    return f"R$ {valor:.2f}"
+
+
+class Coluna:
+    """
+    Definição de uma coluna da tabela
+    
+    Args:
+        titulo (str): Texto do cabeçalho
+        atributo (str): Atributo da linha exibido na coluna
+        formatar: Função valor -> texto (padrão: str, com '-' para None)
+        alinhamento: ESQUERDA, CENTRO ou DIREITA
+        destaque: Função linha -> (cor_fundo, cor_texto) ou None
+        largura: 'amostra' (mede uma amostra), 'esticar' ou um int fixo
+    """
+    
+    def __init__(self, titulo, atributo, formatar=None, alinhamento=ESQUERDA,
+                 destaque=None, largura='amostra'):
+        self.titulo = titulo
+        self.atributo = atributo
+        self.ler = attrgetter(atributo)
+        self.formatar = formatar or (lambda valor: '-' if valor is None else str(valor))
+        self.alinhamento = alinhamento
+        self.destaque = destaque
+        self.largura = largura
+    
+    def texto(self, linha):
+        return self.formatar(self.ler(linha))
+
+
+class ModeloTabela(QAbstractTableModel):
+    """Modelo somente leitura sobre uma lista de linhas (namedtuples ou objetos)"""
+    
+    def __init__(self, colunas, parent=None):
+        super().__init__(parent)
+        self.colunas = colunas
+        self.linhas = []
+        self._textos = {}
+    
+    def definir_linhas(self, linhas):
+        """Substitui as linhas exibidas"""
+        self.beginResetModel()
+        self.linhas = linhas if isinstance(linhas, list) else list(linhas)
+        self._textos.clear()
+        self.endResetModel()
+    
+    def definir_colunas(self, colunas):
+        """Troca as colunas e esvazia a tabela"""
+        self.beginResetModel()
+        self.colunas = colunas
+        self.linhas = []
+        self._textos.clear()
+        self.endResetModel()
+    
+    def acrescentar_linhas(self, linhas):
+        """Acrescenta linhas ao final (as já exibidas não são refeitas)"""
+        if not linhas:
+            return
+        inicio = len(self.linhas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(linhas) - 1)
+        self.linhas.extend(linhas)
+        self.endInsertRows()
+    
+    def linha(self, row):
+        """Objeto da linha na posição informada"""
+        return self.linhas[row]
+    
+    def texto(self, row, column):
+        """Texto formatado da célula (em cache)"""
+        chave = (row, column)
+        texto = self._textos.get(chave)
+        if texto is None:
+            if len(self._textos) >= LIMITE_CACHE:
+                self._textos.clear()
+            texto = self.colunas[column].texto(self.linhas[row])
+            self._textos[chave] = texto
+        return texto
+    
+    def destaque(self, row, column):
+        """(pincel_fundo, pincel_texto) da célula, ou None"""
+        funcao = self.colunas[column].destaque
+        if funcao is None:
+            return None
+        cores = funcao(self.linhas[row])
+        if not cores:
+            return None
+        return pincel(cores[0]), pincel(cores[1])
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.linhas)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.colunas)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.texto(index.row(), index.column())
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self.colunas[index.column()].alinhamento
+        if role in (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole):
+            cores = self.destaque(index.row(), index.column())
+            if cores:
+                return cores[0] if role == Qt.ItemDataRole.BackgroundRole else cores[1]
+        if role == Qt.ItemDataRole.UserRole:
+            return self.linhas[index.row()]
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.colunas[section].titulo
+        return None
+
+
+class DelegateTabela(QStyledItemDelegate):
+    """
+    Pinta as células de ModeloTabela sem montar o QStyleOption completo
+    
+    Lê o texto e o destaque direto do modelo (ambos em cache) em vez de
+    consultar um papel (role) de cada vez. Uma única instância serve a
+    todas as tabelas (ver delegate_compartilhado).
+    """
+    
+    MARGEM = 4
+    
+    def paint(self, painter, option, index):
+        modelo = index.model()
+        if not isinstance(modelo, ModeloTabela):
+            return super().paint(painter, option, index)
+        
+        row, column = index.row(), index.column()
+        retangulo = option.rect
+        selecionada = option.state & QStyle.StateFlag.State_Selected
+        
+        painter.save()
+        destaque = modelo.destaque(row, column)
+        if selecionada:
+            painter.fillRect(retangulo, option.palette.highlight())
+            painter.setPen(option.palette.highlightedText().color())
+        elif destaque:
+            painter.fillRect(retangulo, destaque[0])
+            painter.setPen(destaque[1].color())
+        else:
+            painter.setPen(option.palette.text().color())
+        
+        area = retangulo.adjusted(self.MARGEM, 0, -self.MARGEM, 0)
+        texto = option.fontMetrics.elidedText(
+            modelo.texto(row, column), Qt.TextElideMode.ElideRight, area.width()
+        )
+        painter.drawText(area, modelo.colunas[column].alinhamento, texto)
+        painter.restore()
+
+
+_DELEGATE = None
+
+
+def delegate_compartilhado():
+    """Instância única de DelegateTabela"""
+    global _DELEGATE
+    if _DELEGATE is None:
+        _DELEGATE = DelegateTabela()
+    return _DELEGATE
+
+
+def ajustar_larguras(view, amostra=AMOSTRA_LARGURA, semente=0):
+    """
+    Dimensiona as colunas medindo o cabeçalho e uma amostra das linhas
+    
+    Mede as primeiras e as últimas linhas e uma seleção aleatória do meio,
+    em vez de todas as linhas como ResizeToContents.
+    """
+    modelo = view.model()
+    total = modelo.rowCount()
+    if total <= amostra:
+        linhas = range(total)
+    else:
+        terco = amostra // 3
+        meio = random.Random(semente).sample(range(terco, total - terco), amostra - 2 * terco)
+        linhas = list(range(terco)) + meio + list(range(total - terco, total))
+    
+    metricas = view.fontMetrics()
+    metricas_cabecalho = view.horizontalHeader().fontMetrics()
+    folga = 2 * DelegateTabela.MARGEM + 12
+    cabecalho = view.horizontalHeader()
+    
+    for column, coluna in enumerate(modelo.colunas):
+        if coluna.largura == 'esticar':
+            cabecalho.setSectionResizeMode(column, QHeaderView.ResizeMode.Stretch)
+            continue
+        
+        cabecalho.setSectionResizeMode(column, QHeaderView.ResizeMode.Interactive)
+        if isinstance(coluna.largura, int):
+            view.setColumnWidth(column, coluna.largura)
+            continue
+        
+        largura = metricas_cabecalho.horizontalAdvance(coluna.titulo)
+        for row in linhas:
+            largura = max(largura, metricas.horizontalAdvance(modelo.texto(row, column)))
+        view.setColumnWidth(column, largura + folga)
+
+
+class TabelaVirtual(QTableView):
+    """
+    QTableView configurada para listas grandes
+    
+    Linhas de altura fixa (a view não precisa medir cada linha), sem quebra
+    de texto, seleção por linha e o delegate compartilhado.
+    """
+    
+    def __init__(self, colunas, parent=None):
+        super().__init__(parent)
+        self.modelo = ModeloTabela(colunas, self)
+        self.setModel(self.modelo)
+        self.setItemDelegate(delegate_compartilhado())
+        
+        self.setAlternatingRowColors(True)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        
+        vertical = self.verticalHeader()
+        vertical.setVisible(False)
+        vertical.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical.setDefaultSectionSize(self.fontMetrics().height() + 8)
+    
+    def definir_linhas(self, linhas):
+        """Substitui as linhas e redimensiona as colunas por amostragem"""
+        self.modelo.definir_linhas(linhas)
+        ajustar_larguras(self)
+    
+    def definir_colunas(self, colunas):
+        """Troca as colunas, esvazia a tabela e dimensiona pelos títulos"""
+        self.modelo.definir_colunas(colunas)
+        ajustar_larguras(self)
+    
+    def acrescentar_linhas(self, linhas):
+        """
+        Acrescenta linhas ao final, como nos relatórios entregues em lotes
+        
+        As colunas são dimensionadas pelo primeiro lote; ao receber o último,
+        chame ajustar_larguras para medir a amostra do resultado completo.
+        """
+        vazia = self.modelo.rowCount() == 0
+        self.modelo.acrescentar_linhas(linhas)
+        if vazia:
+            ajustar_larguras(self)
+    
+    def linha_atual(self):
+        """Objeto da linha corrente (None se nenhuma)"""
+        index = self.currentIndex()
+        return self.modelo.linha(index.row()) if index.isValid() else None
+    
+    def linhas_selecionadas(self):
+        """Objetos das linhas selecionadas, na ordem da tabela"""
+        rows = sorted({index.row() for index in self.selectionModel().selectedRows()})
+        return [self.modelo.linha(row) for row in rows]
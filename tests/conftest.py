@@ -0,0 +1,23 @@
+"""
+Configuração dos testes
+
+Os módulos do sistema são importados a partir de src, como na execução da
+aplicação, e cada teste usa um banco novo em uma pasta temporária.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.database import db, preparar_esquema  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco vazio com o esquema atual"""
+    db.init(str(tmp_path / 'teste.db'))
+    db.connect()
+    preparar_esquema()
+    yield db
+    db.close()
@@ -0,0 +1,53 @@
+"""Ajustes de estoque: soma no próprio UPDATE, sem deixar o estoque negativo"""
+import threading
+from controllers.produto_controller import ProdutoController
+from models.database import Produto
+
+
+def _produto(estoque):
+    sucesso, mensagem, produto = ProdutoController.criar({
+        'codigo': 'A', 'nome': 'a', 'estoque_atual': estoque,
+    })
+    assert sucesso, mensagem
+    return produto.id
+
+
+def test_saida_maior_que_o_estoque_e_recusada(banco):
+    produto_id = _produto(5)
+    
+    assert ProdutoController.ajustar_estoque(produto_id, -6, 'saida', 'Venda') == \
+        (False, "Estoque não pode ficar negativo")
+    assert ProdutoController.ajustar_estoque(produto_id, -5, 'saida', 'Venda')[0]
+    assert Produto.get_by_id(produto_id).estoque_atual == 0
+
+
+def test_produto_inexistente(banco):
+    assert ProdutoController.ajustar_estoque(999, 1, 'entrada', 'Compra') == \
+        (False, "Produto não encontrado")
+
+
+def test_ajustes_simultaneos_nao_se_perdem(banco):
+    estoque = 50
+    produto_id = _produto(estoque)
+    resultados = []
+    
+    def vender():
+        # Cada thread usa a própria conexão do db
+        for _ in range(20):
+            resultados.append(
+                ProdutoController.ajustar_estoque(produto_id, -1, 'saida', 'Venda')[0]
+            )
+        banco.close()
+    
+    threads = [threading.Thread(target=vender) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # 100 tentativas sobre 50 unidades: exatamente 50 aceitas, estoque zerado
+    assert resultados.count(True) == estoque
+    assert Produto.get_by_id(produto_id).estoque_atual == 0
+    assert banco.execute_sql(
+        "SELECT COUNT(*) FROM movimentacoes_estoque WHERE tipo = 'saida'"
+    ).fetchone() == (estoque,)
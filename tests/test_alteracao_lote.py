@@ -0,0 +1,117 @@
+"""Alterações em lote de produtos e o desfazer"""
+from controllers.produto_controller import ProdutoController
+from models.database import Produto, Categoria
+from utils.dinheiro import Dinheiro
+
+
+def _produto(codigo, preco_venda, categoria=None):
+    sucesso, mensagem, produto = ProdutoController.criar({
+        'codigo': codigo, 'nome': f'Produto {codigo}', 'categoria_id': categoria,
+        'preco_custo': 1, 'preco_venda': preco_venda,
+    })
+    assert sucesso, mensagem
+    return produto.id
+
+
+def test_desfazer_reajuste_restaura_precos(banco):
+    ids = [_produto('A', 10), _produto('B', 20)]
+    
+    sucesso, _, quantidade = ProdutoController.reajustar_precos_lote({'ids': ids}, 10)
+    assert sucesso and quantidade == 2
+    assert Produto.get_by_id(ids[0]).preco_venda == Dinheiro(1100)
+    
+    lote = ProdutoController.listar_lotes()[0]
+    sucesso, mensagem = ProdutoController.desfazer_lote(lote.id)
+    assert sucesso, mensagem
+    assert [Produto.get_by_id(i).preco_venda for i in ids] == [Dinheiro(1000), Dinheiro(2000)]
+
+
+def test_desfazer_mantem_produtos_alterados_depois(banco):
+    ids = [_produto('A', 10), _produto('B', 20)]
+    ProdutoController.reajustar_precos_lote({'ids': ids}, 10)
+    ProdutoController.atualizar(ids[1], {'preco_venda': 25})
+    
+    lote = ProdutoController.listar_lotes()[0]
+    sucesso, mensagem = ProdutoController.desfazer_lote(lote.id)
+    
+    assert sucesso
+    assert '1 produtos restaurados' in mensagem
+    assert '1 alterados depois do lote foram mantidos' in mensagem
+    assert Produto.get_by_id(ids[0]).preco_venda == Dinheiro(1000)
+    assert Produto.get_by_id(ids[1]).preco_venda == Dinheiro(2500)
+
+
+def test_desfazer_so_volta_o_campo_do_lote(banco):
+    produto_id = _produto('A', 10)
+    ProdutoController.reajustar_precos_lote({'ids': [produto_id]}, 10)
+    ProdutoController.atualizar(produto_id, {'preco_custo': 3})
+    
+    lote = ProdutoController.listar_lotes()[0]
+    ProdutoController.desfazer_lote(lote.id)
+    
+    produto = Produto.get_by_id(produto_id)
+    assert produto.preco_venda == Dinheiro(1000)
+    assert produto.preco_custo == Dinheiro(300)
+
+
+def test_desfazer_recategorizacao_para_sem_categoria(banco):
+    categoria = Categoria.create(nome='Bebidas')
+    ids = [_produto('A', 10, categoria.id), _produto('B', 10)]
+    
+    ProdutoController.recategorizar_lote({'ids': ids}, None)
+    ProdutoController.atualizar(ids[1], {'categoria': categoria.id})
+    
+    lote = ProdutoController.listar_lotes()[0]
+    sucesso, mensagem = ProdutoController.desfazer_lote(lote.id)
+    
+    assert sucesso
+    assert Produto.get_by_id(ids[0]).categoria_id == categoria.id
+    assert Produto.get_by_id(ids[1]).categoria_id == categoria.id
+    assert '1 alterados depois do lote foram mantidos' in mensagem
+
+
+def test_desfazer_inativacao(banco):
+    ids = [_produto('A', 10), _produto('B', 10)]
+    ProdutoController.inativar_lote({'ids': ids})
+    assert not Produto.get_by_id(ids[0]).ativo
+    
+    lote = ProdutoController.listar_lotes()[0]
+    ProdutoController.desfazer_lote(lote.id)
+    
+    assert all(Produto.get_by_id(i).ativo for i in ids)
+
+
+def test_desfazer_duas_vezes(banco):
+    produto_id = _produto('A', 10)
+    ProdutoController.inativar_lote({'ids': [produto_id]})
+    lote = ProdutoController.listar_lotes()[0]
+    
+    assert ProdutoController.desfazer_lote(lote.id)[0]
+    assert ProdutoController.desfazer_lote(lote.id) == (False, "Alteração já foi desfeita")
+
+
+def test_desfazer_lote_inexistente(banco):
+    assert ProdutoController.desfazer_lote(999) == (False, "Alteração em lote não encontrada")
+
+
+def test_recategorizar_para_categoria_inexistente_e_recusado(banco):
+    ids = [_produto('A', 10)]
+    
+    assert ProdutoController.recategorizar_lote({'ids': ids}, 99) == \
+        (False, "Categoria não encontrada", None)
+    assert Produto.get_by_id(ids[0]).categoria_id is None
+    assert not ProdutoController.listar_lotes()
+
+
+def test_simulacao_valida_como_o_reajuste(banco):
+    ids = [_produto('A', 10)]
+    
+    for campo, percentual in (('estoque_atual', 10), ('preco_venda', -100)):
+        sucesso, mensagem, _ = ProdutoController.reajustar_precos_lote(
+            {'ids': ids}, percentual, campo)
+        resumo = ProdutoController.simular_reajuste({'ids': ids}, percentual, campo)
+        assert not sucesso
+        assert resumo['erro'] == mensagem
+        assert resumo['produtos'] == 0
+    
+    assert ProdutoController.simular_reajuste({'ids': ids}, 10)['erro'] is None
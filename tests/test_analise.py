@@ -0,0 +1,83 @@
+"""Análises vetorizadas do catálogo conferidas com os cálculos por produto"""
+import random
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from controllers.analise_controller import AnaliseController  # noqa: E402
+from controllers.produto_controller import ProdutoController  # noqa: E402
+from models.database import Categoria  # noqa: E402
+from utils.dinheiro import Dinheiro  # noqa: E402
+
+# Custos e vendas (centavos) em que np.round(margem, 2) difere de round()
+PERTO_DA_METADE = [(20000, 14783), (4000, 3083), (8000, 28526)]
+
+
+def _produto(codigo, custo, venda, estoque=0, **dados):
+    sucesso, mensagem, produto = ProdutoController.criar(dict(
+        dados, codigo=codigo, nome=codigo, preco_custo=Dinheiro(custo),
+        preco_venda=Dinheiro(venda), estoque_atual=estoque))
+    assert sucesso, mensagem
+    return produto.id
+
+
+def test_margens_iguais_as_do_produto_controller(banco):
+    rnd = random.Random(7)
+    pares = PERTO_DA_METADE + [(0, 500), (-100, 500)]
+    pares += [(rnd.randint(1, 20000), rnd.randint(0, 40000)) for _ in range(2000)]
+    custo = np.array([c for c, _ in pares], dtype=np.int64)
+    venda = np.array([v for _, v in pares], dtype=np.int64)
+    
+    margens = AnaliseController.calcular_margens(custo, venda).tolist()
+    
+    assert margens == [ProdutoController.calcular_margem_lucro(Dinheiro(c), Dinheiro(v))
+                       for c, v in pares]
+
+
+def test_blocos_menores_que_o_catalogo(banco):
+    ids = [_produto(f'P{i}', 100 + i, 200 + i) for i in range(7)]
+    ProdutoController.excluir(ids[3])
+    
+    blocos = list(AnaliseController.carregar_blocos(tamanho_bloco=2))
+    
+    assert [len(bloco['id']) for bloco in blocos] == [2, 2, 2]
+    assert np.concatenate([bloco['id'] for bloco in blocos]).tolist() == \
+        ids[:3] + ids[4:]
+    assert np.concatenate([bloco['custo'] for bloco in blocos]).tolist() == \
+        [100, 101, 102, 104, 105, 106]
+
+
+def test_valorizacao_exata_por_categoria(banco):
+    bebidas = Categoria.create(nome='Bebidas').id
+    limpeza = Categoria.create(nome='Limpeza').id
+    _produto('A', 333, 499, 3, categoria_id=bebidas)
+    _produto('B', 1, 7, 1000001, categoria_id=bebidas)
+    _produto('C', 1999, 2999, 7, categoria_id=limpeza)
+    _produto('D', 5, 9, 11)
+    inativo = _produto('E', 100, 100, 10)
+    ProdutoController.excluir(inativo)
+    
+    assert AnaliseController.valorizacao_estoque() == {
+        bebidas: (333 * 3 + 1 * 1000001, 499 * 3 + 7 * 1000001),
+        limpeza: (1999 * 7, 2999 * 7),
+        None: (5 * 11, 9 * 11),
+    }
+
+
+def test_simular_reajuste_arredonda_como_dinheiro(banco):
+    precos = [(100, 5), (100, 15), (100, 25), (100, 1005), (100, 12345), (100, 99999)]
+    for i, (custo, venda) in enumerate(precos):
+        _produto(f'P{i}', custo, venda, estoque=1)
+    
+    for percentual in (10, -10, 7.5, 33.33):
+        fator = Dinheiro.fator_reajuste(percentual)
+        resumo = AnaliseController.simular_reajuste(percentual)
+        esperado = sum(Dinheiro(venda).reajustado(fator).centavos for _, venda in precos)
+        assert resumo['erro'] is None
+        assert resumo['valor_venda_novo'] == esperado
+        assert resumo['valor_venda_atual'] == sum(venda for _, venda in precos)
+    
+    assert AnaliseController.simular_reajuste(-100)['erro'] == \
+        "Reajuste deixaria preços negativos"
+    assert AnaliseController.simular_reajuste(10, 'estoque_atual')['erro'] == \
+        "Campo de preço inválido"
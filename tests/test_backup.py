@@ -0,0 +1,83 @@
+"""Backup online, cópia compactada e manutenção do banco"""
+import sqlite3
+import time
+import pytest
+from controllers.produto_controller import ProdutoController
+from models.database import Produto
+from utils import backup
+
+TABELAS = ('produtos', 'estoque_locais', 'movimentacoes_estoque')
+
+
+@pytest.fixture
+def banco_populado(banco, tmp_path, monkeypatch):
+    """Banco com produtos e movimentações; backups numa pasta temporária"""
+    monkeypatch.setattr(backup, 'BACKUP_DIR', str(tmp_path / 'backups'))
+    for i in range(200):
+        sucesso, mensagem, _ = ProdutoController.criar(
+            {'codigo': f'P{i:04d}', 'nome': f'Produto {i}', 'preco_custo': 1,
+             'preco_venda': 2, 'estoque_atual': i + 1})
+        assert sucesso, mensagem
+    return banco
+
+
+def _contagens(conexao):
+    return {tabela: conexao.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0]
+            for tabela in TABELAS}
+
+
+def _conferir_copia(banco, arquivo):
+    """A cópia está íntegra e tem as mesmas linhas do banco"""
+    copia = sqlite3.connect(arquivo)
+    try:
+        assert copia.execute('PRAGMA integrity_check').fetchone() == ('ok',)
+        assert _contagens(copia) == _contagens(banco.connection())
+    finally:
+        copia.close()
+
+
+def test_backup_online(banco_populado):
+    sucesso, mensagem, relatorio = backup.fazer_backup(paginas=4, pausa=0)
+    
+    assert sucesso, mensagem
+    assert relatorio['paginas'] > 4
+    _conferir_copia(banco_populado, relatorio['arquivo'])
+
+
+def test_compactar_duas_vezes_no_mesmo_segundo(banco_populado):
+    sucesso, mensagem, primeiro = backup.compactar()
+    assert sucesso, mensagem
+    sucesso, mensagem, segundo = backup.compactar()
+    assert sucesso, mensagem
+    
+    assert primeiro['arquivo'] != segundo['arquivo']
+    for relatorio in (primeiro, segundo):
+        _conferir_copia(banco_populado, relatorio['arquivo'])
+
+
+def test_otimizar_devolve_paginas_livres(banco_populado):
+    Produto.insert_many([{'codigo': f'X{i}', 'nome': 'Temporário', 'descricao': 'x' * 2000,
+                          'preco_custo': 0, 'preco_venda': 0} for i in range(100)]).execute()
+    Produto.delete().where(Produto.codigo.startswith('X')).execute()
+    assert banco_populado.pragma('freelist_count') > 0
+    
+    sucesso, mensagem = backup.otimizar()
+    
+    assert sucesso, mensagem
+    assert banco_populado.pragma('freelist_count') == 0
+
+
+def test_agendador_faz_backup_e_para(banco_populado):
+    agendador = backup.AgendadorBackup(intervalo_backup=0, intervalo_manutencao=0,
+                                       intervalo_verificacao=0.01)
+    agendador.iniciar()
+    try:
+        limite = time.monotonic() + 10
+        while agendador.ultimo_relatorio is None and time.monotonic() < limite:
+            time.sleep(0.01)
+    finally:
+        agendador.parar()
+    
+    assert not agendador._thread.is_alive()
+    assert agendador.ultimo_relatorio is not None
+    _conferir_copia(banco_populado, agendador.ultimo_relatorio['arquivo'])
@@ -0,0 +1,40 @@
+"""
+Casos de utils.benchmark medidos com pytest-benchmark
+
+    pytest tests/test_benchmark.py
+    pytest tests/test_benchmark.py --benchmark-autosave         # grava a medição
+    pytest tests/test_benchmark.py --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from models.database import db, criar_tabelas  # noqa: E402
+from utils import benchmark as casos, gerador_dados  # noqa: E402
+
+# Escala do banco sintético (a linha de comando de utils.benchmark aceita maiores)
+PRODUTOS = 5000
+MOVIMENTACOES = 20000
+VENDAS = 2000
+LOCAIS = 3
+SEMENTE = 42
+
+
+@pytest.fixture(scope='module')
+def contexto(tmp_path_factory):
+    """Banco sintético compartilhado pelos casos deste módulo"""
+    db.init(str(tmp_path_factory.mktemp('benchmark') / 'benchmark.db'))
+    criar_tabelas()
+    gerador_dados.gerar(produtos=PRODUTOS, movimentacoes=MOVIMENTACOES,
+                        vendas=VENDAS, semente=SEMENTE, locais=LOCAIS)
+    yield casos.Contexto(PRODUTOS, SEMENTE, LOCAIS)
+    db.close()
+
+
+@pytest.mark.parametrize('nome', list(casos.CASOS))
+def test_caso(benchmark, contexto, nome):
+    preparar, _, _ = casos.CASOS[nome]
+    funcao = preparar(contexto)
+    if funcao is None:
+        pytest.skip('PySide6 indisponível')
+    benchmark(funcao)
@@ -0,0 +1,108 @@
+"""Busca incremental de clientes pelas chaves indexadas"""
+from controllers.cliente_controller import ClienteController
+from models.database import ClienteTermo, inserir_dados_exemplo
+
+
+def _cliente(nome, cpf_cnpj=None, telefone=None):
+    sucesso, mensagem, cliente = ClienteController.criar(
+        {'nome': nome, 'cpf_cnpj': cpf_cnpj, 'telefone': telefone})
+    assert sucesso, mensagem
+    return cliente.id
+
+
+def _nomes(texto, limite=10):
+    return [cliente.nome for cliente in ClienteController.sugerir(texto, limite)]
+
+
+def _termos(cliente_id):
+    return sorted(ClienteTermo
+                  .select(ClienteTermo.termo)
+                  .where(ClienteTermo.cliente == cliente_id)
+                  .tuples()
+                  .iterator())
+
+
+def test_cliente_dos_dados_de_exemplo_e_encontrado(banco):
+    inserir_dados_exemplo()
+    
+    for texto in ('joão', 'silva', '123456', '11 9876'):
+        assert _nomes(texto) == ['João Silva']
+
+
+def test_prefixo_numerico_do_documento_e_do_telefone(banco):
+    _cliente('Ana', cpf_cnpj='123.456.789-00', telefone='(21) 3333-4444')
+    _cliente('Bia', cpf_cnpj='98.765.432/0001-10', telefone='(11) 98765-4321')
+    _cliente('Caio', telefone='(11) 2222-1111')
+    
+    # Só os dígitos contam, com qualquer pontuação
+    assert _nomes('123.456') == ['Ana']
+    assert _nomes('12345678900') == ['Ana']
+    assert _nomes('98.765.432/') == ['Bia']
+    assert _nomes('(11) 9') == ['Bia']
+    assert _nomes('11') == ['Bia', 'Caio']
+    assert _nomes('21 3333') == ['Ana']
+    assert _nomes('999') == []
+
+
+def test_varias_palavras_devem_casar_todas(banco):
+    _cliente('José da Silva')
+    _cliente('José Santos')
+    _cliente('Maria da Silva')
+    
+    assert _nomes('jo si') == ['José da Silva']
+    assert _nomes('silva jo') == ['José da Silva']
+    assert _nomes('da si') == ['José da Silva', 'Maria da Silva']
+    assert _nomes('jo xyz') == []
+
+
+def test_acentos_e_maiusculas_sao_ignorados(banco):
+    _cliente('JOÃO Conceição')
+    
+    for texto in ('joao', 'JOÃO', 'Joã', 'conceicao', 'CONCEIÇ', 'jOaO cOnC'):
+        assert _nomes(texto) == ['JOÃO Conceição']
+
+
+def test_clientes_inativos_nao_aparecem(banco):
+    ativo = _cliente('Ana Souza', cpf_cnpj='111.111.111-11')
+    inativo = _cliente('Ana Lima', cpf_cnpj='111.222.333-44')
+    
+    sucesso, mensagem = ClienteController.excluir(inativo)
+    assert sucesso, mensagem
+    
+    assert _nomes('ana') == ['Ana Souza']
+    assert _nomes('111') == ['Ana Souza']
+    assert [c.id for c in ClienteController.sugerir('ana souza')] == [ativo]
+
+
+def test_limite_de_sugestoes(banco):
+    for i in range(8):
+        _cliente(f'Ana {i}', telefone=f'(11) 90000-000{i}')
+    
+    assert len(_nomes('ana', limite=3)) == 3
+    assert len(_nomes('11 9', limite=5)) == 5
+    assert len(_nomes('ana', limite=500)) == 8
+
+
+def test_cliente_que_casa_por_duas_palavras_aparece_uma_vez(banco):
+    _cliente('Ana Andrade')
+    _cliente('André Alves')
+    
+    assert _nomes('an') == ['Ana Andrade', 'André Alves']
+    assert _nomes('an', limite=1) == ['Ana Andrade']
+
+
+def test_termos_acompanham_criar_atualizar_e_excluir(banco):
+    cliente_id = _cliente('Ana Souza', cpf_cnpj='123.456.789-00')
+    assert _termos(cliente_id) == [('ana',), ('souza',)]
+    
+    sucesso, mensagem = ClienteController.atualizar(
+        cliente_id, {'nome': 'Ana Lúcia Pereira', 'cpf_cnpj': '987.654.321-00'})
+    assert sucesso, mensagem
+    assert _termos(cliente_id) == [('ana',), ('lucia',), ('pereira',)]
+    assert _nomes('souza') == []
+    assert _nomes('123') == []
+    assert _nomes('987') == ['Ana Lúcia Pereira']
+    
+    sucesso, mensagem = ClienteController.excluir(cliente_id)
+    assert sucesso, mensagem
+    assert _termos(cliente_id) == []
@@ -0,0 +1,102 @@
+"""Aritmética e arredondamento de Dinheiro"""
+from decimal import Decimal
+import pytest
+from models.database import Produto
+from utils.dinheiro import Dinheiro, totalizar_venda
+
+
+@pytest.mark.parametrize('reais, centavos', [
+    (10, 1000),
+    (10.5, 1050),
+    ('10.5', 1050),
+    (Decimal('0.005'), 1),
+    (Decimal('0.004'), 0),
+    (-1.005, -101),
+    (0.1 + 0.2, 30),
+])
+def test_de_reais_arredonda_para_o_centavo(reais, centavos):
+    assert Dinheiro.de_reais(reais).centavos == centavos
+
+
+def test_soma_e_subtracao_exatas():
+    valores = [Dinheiro(10)] * 3
+    assert Dinheiro.somar(valores) == Dinheiro(30)
+    assert Dinheiro(10) + 0.2 == Dinheiro(30)
+    assert 1 - Dinheiro(1) == Dinheiro(99)
+    assert -Dinheiro(5) == Dinheiro(-5)
+
+
+def test_multiplicacao_e_divisao():
+    assert Dinheiro(333) * 3 == Dinheiro(999)
+    assert Dinheiro(333) * 1.5 == Dinheiro(500)   # 499,5 -> 500
+    assert Dinheiro(1000) / 3 == Dinheiro(333)
+    assert Dinheiro(1000) / 6 == Dinheiro(167)    # 166,67 -> 167
+    assert Dinheiro(-1000) / 6 == Dinheiro(-167)
+    assert Dinheiro(500) / Dinheiro(1000) == 0.5
+
+
+def test_reajuste_e_percentual():
+    fator = Dinheiro.fator_reajuste(10)
+    assert Dinheiro(1999).reajustado(fator) == Dinheiro(2199)   # 2198,9
+    assert Dinheiro(1005).reajustado(Dinheiro.fator_reajuste(-50)) == Dinheiro(503)
+    assert Dinheiro(1005).percentual(10) == Dinheiro(101)       # 100,5 -> 101
+
+
+def test_comparacao_com_numeros_em_reais():
+    assert Dinheiro(1050) > 10
+    assert Dinheiro(100) == 1
+    assert Dinheiro(100) == Decimal('1.00')
+    assert Dinheiro(10) != 0.1
+    assert Dinheiro(100) != '1'
+
+
+def test_ordem_com_numeros_concorda_com_a_igualdade():
+    # 0,104 não é um centavo inteiro: não é igual, e fica de um lado só
+    for outro in (0.104, Decimal('0.104'), 0.1):
+        assert Dinheiro(10) != outro
+        assert (Dinheiro(10) < outro) != (Dinheiro(10) > outro)
+        assert (Dinheiro(10) <= outro) == (Dinheiro(10) < outro)
+        assert (Dinheiro(10) >= outro) == (Dinheiro(10) > outro)
+    assert Dinheiro(10) < 0.104
+    assert Dinheiro(11) > 0.104
+    assert sorted([0.104, Dinheiro(11), Dinheiro(10)]) == [Dinheiro(10), 0.104, Dinheiro(11)]
+    assert Dinheiro(100) <= 1 and Dinheiro(100) >= Decimal('1.00')
+
+
+def test_hash_igual_para_valores_iguais():
+    assert hash(Dinheiro(100)) == hash(1)
+    assert hash(Dinheiro(150)) == hash(1.5) == hash(Decimal('1.50'))
+    assert {Dinheiro(100): 'x'}[1] == 'x'
+    assert len({Dinheiro(100), Dinheiro(100), 1}) == 1
+
+
+def test_formatacao():
+    assert str(Dinheiro(-5)) == '-0.05'
+    assert f'{Dinheiro(123456)}' == '1234.56'
+    assert Dinheiro(1050).reais == Decimal('10.50')
+
+
+def test_totalizar_venda():
+    itens = [(3, Dinheiro(333)), (1, Dinheiro(1))]
+    subtotais, total, desconto, final = totalizar_venda(itens, percentual_desconto=10)
+    assert subtotais == [Dinheiro(999), Dinheiro(1)]
+    assert total == Dinheiro(1000)
+    assert desconto == Dinheiro(100)
+    assert final == Dinheiro(900)
+    
+    _, _, desconto, final = totalizar_venda(itens, desconto=2.5)
+    assert (desconto, final) == (Dinheiro(250), Dinheiro(750))
+
+
+def test_campo_grava_centavos(banco):
+    produto = Produto.create(codigo='A', nome='a', preco_custo=Dinheiro(150),
+                             preco_venda=Decimal('2.5'))
+    linha = banco.execute_sql('SELECT preco_custo, preco_venda FROM produtos').fetchone()
+    assert linha == (150, 250)
+    assert Produto.get_by_id(produto.id).preco_venda == Dinheiro(250)
+
+
+def test_campo_recusa_inteiro_ambiguo(banco):
+    with pytest.raises(TypeError):
+        Produto.create(codigo='A', nome='a', preco_custo=Dinheiro(0), preco_venda=250)
+    Produto.create(codigo='B', nome='b', preco_custo=0, preco_venda=Dinheiro(0))
@@ -0,0 +1,118 @@
+"""Estoque por local: a soma dos locais é sempre o total do produto"""
+import random
+from controllers.local_controller import LocalController
+from controllers.produto_controller import ProdutoController
+from models.database import Produto, EstoqueLocal, LOCAL_PADRAO
+
+
+def _divergencias(banco):
+    """Produtos cujo estoque_atual difere da soma de estoque_locais"""
+    return banco.execute_sql('''
+        SELECT p.id, p.estoque_atual, COALESCE(SUM(e.quantidade), 0)
+        FROM produtos p LEFT JOIN estoque_locais e ON e.produto_id = p.id
+        GROUP BY p.id
+        HAVING p.estoque_atual <> COALESCE(SUM(e.quantidade), 0)
+    ''').fetchall()
+
+
+def _local(nome):
+    sucesso, mensagem, local = LocalController.criar({'nome': nome, 'tipo': 'deposito'})
+    assert sucesso, mensagem
+    return local.id
+
+
+def _produto(codigo, estoque=0, **dados):
+    sucesso, mensagem, produto = ProdutoController.criar(
+        dict(dados, codigo=codigo, nome=codigo, estoque_atual=estoque))
+    assert sucesso, mensagem
+    return produto.id
+
+
+def test_criar_com_local_inexistente(banco):
+    assert ProdutoController.criar({'codigo': 'A', 'nome': 'a', 'estoque_atual': 5,
+                                    'local_id': 99}) == (False, "Local não encontrado", None)
+    assert not Produto.select().exists()
+
+
+def test_nome_repetido_e_outras_violacoes_de_integridade(banco):
+    _local('Depósito')
+    outro = _local('Galpão')
+    
+    assert LocalController.criar({'nome': 'Depósito'}) == (False, "Local já cadastrado", None)
+    assert LocalController.atualizar(outro, {'nome': 'Depósito'}) == \
+        (False, "Já existe um local com esse nome")
+    
+    # Uma violação que não é do nome único não vira "já cadastrado"
+    banco.execute_sql("CREATE TRIGGER sem_lojas BEFORE INSERT ON locais WHEN NEW.tipo = 'loja' "
+                      "BEGIN SELECT RAISE(ABORT, 'lojas bloqueadas'); END")
+    assert LocalController.criar({'nome': 'Centro'}) == \
+        (False, "Erro ao criar local: lojas bloqueadas", None)
+
+
+def test_transferir_mantem_o_total(banco):
+    deposito = _local('Depósito')
+    produto_id = _produto('A', 10)
+    
+    sucesso, mensagem = ProdutoController.transferir(produto_id, LOCAL_PADRAO, deposito, 4)
+    assert sucesso, mensagem
+    
+    estoques = {linha.local_id: linha.quantidade
+                for linha in LocalController.estoque_por_local(produto_id)}
+    assert estoques == {LOCAL_PADRAO: 6, deposito: 4}
+    assert Produto.get_by_id(produto_id).estoque_atual == 10
+
+
+def test_transferir_mais_que_a_origem_e_recusado(banco):
+    deposito = _local('Depósito')
+    produto_id = _produto('A', 3)
+    
+    assert ProdutoController.transferir(produto_id, LOCAL_PADRAO, deposito, 4) == \
+        (False, "Estoque insuficiente na origem")
+    assert ProdutoController.transferir(produto_id, deposito, LOCAL_PADRAO, 1) == \
+        (False, "Estoque insuficiente na origem")
+    assert not _divergencias(banco)
+
+
+def test_estoque_minimo_do_produto_e_o_do_local_padrao(banco):
+    produto_id = _produto('A', 5, estoque_minimo=2)
+    
+    ProdutoController.atualizar(produto_id, {'estoque_minimo': 8})
+    
+    linha = EstoqueLocal.get((EstoqueLocal.local == LOCAL_PADRAO) &
+                             (EstoqueLocal.produto == produto_id))
+    assert linha.estoque_minimo == 8
+    assert [l.produto_id for l in LocalController.listar_abaixo_estoque_minimo(LOCAL_PADRAO)] == \
+        [produto_id]
+
+
+def test_produto_sem_estoque_aparece_abaixo_do_minimo_no_local_padrao(banco):
+    deposito = _local('Depósito')
+    produto_id = _produto('A', 0, estoque_minimo=3)
+    outro_id = _produto('B', 5, estoque_minimo=1, local_id=deposito)
+    
+    assert [p.id for p in ProdutoController.listar_abaixo_estoque_minimo()] == [produto_id]
+    assert [l.produto_id for l in LocalController.listar_abaixo_estoque_minimo(LOCAL_PADRAO)] == \
+        [produto_id, outro_id]
+    linha = EstoqueLocal.get((EstoqueLocal.local == LOCAL_PADRAO) &
+                             (EstoqueLocal.produto == produto_id))
+    assert (linha.quantidade, linha.estoque_minimo) == (0, 3)
+    assert not _divergencias(banco)
+
+
+def test_operacoes_aleatorias_mantem_soma_igual_ao_total(banco):
+    rnd = random.Random(3)
+    locais = [LOCAL_PADRAO] + [_local(f'Local {i}') for i in range(3)]
+    produtos = [_produto(f'P{i}', rnd.randint(0, 20), local_id=rnd.choice(locais))
+                for i in range(10)]
+    
+    for _ in range(500):
+        produto_id = rnd.choice(produtos)
+        if rnd.random() < 0.6:
+            ProdutoController.ajustar_estoque(produto_id, rnd.randint(-10, 10) or 1,
+                                              'ajuste', 'Teste', local_id=rnd.choice(locais))
+        else:
+            origem, destino = rnd.sample(locais, 2)
+            ProdutoController.transferir(produto_id, origem, destino, rnd.randint(1, 10))
+    
+    assert not _divergencias(banco)
+    assert not EstoqueLocal.select().where(EstoqueLocal.quantidade < 0).exists()
@@ -0,0 +1,125 @@
+"""Migração de bancos criados pela primeira versão do sistema (user_version 0)"""
+import sqlite3
+import pytest
+from models import database
+from models.database import db, preparar_esquema, VERSAO_ESQUEMA, LOCAL_PADRAO
+
+# Esquema e dados da primeira versão: valores em reais, sem user_version
+ESQUEMA_V0 = '''
+CREATE TABLE "categorias" ("id" INTEGER NOT NULL PRIMARY KEY, "nome" VARCHAR(100) NOT NULL,
+    "descricao" TEXT, "ativo" INTEGER NOT NULL, "criado_em" DATETIME NOT NULL);
+CREATE UNIQUE INDEX "categoria_nome" ON "categorias" ("nome");
+CREATE TABLE "clientes" ("id" INTEGER NOT NULL PRIMARY KEY, "nome" VARCHAR(200) NOT NULL,
+    "cpf_cnpj" VARCHAR(18), "email" VARCHAR(100), "telefone" VARCHAR(20), "endereco" TEXT,
+    "ativo" INTEGER NOT NULL, "criado_em" DATETIME NOT NULL);
+CREATE UNIQUE INDEX "cliente_cpf_cnpj" ON "clientes" ("cpf_cnpj");
+CREATE TABLE "vendas" ("id" INTEGER NOT NULL PRIMARY KEY, "numero_venda" VARCHAR(50) NOT NULL,
+    "cliente_id" INTEGER, "data_venda" DATETIME NOT NULL, "valor_total" DECIMAL(10, 2) NOT NULL,
+    "desconto" DECIMAL(10, 2) NOT NULL, "valor_final" DECIMAL(10, 2) NOT NULL,
+    "forma_pagamento" VARCHAR(50) NOT NULL, "status" VARCHAR(20) NOT NULL,
+    "observacoes" TEXT, "criado_em" DATETIME NOT NULL,
+    FOREIGN KEY ("cliente_id") REFERENCES "clientes" ("id"));
+CREATE UNIQUE INDEX "venda_numero_venda" ON "vendas" ("numero_venda");
+CREATE TABLE "produtos" ("id" INTEGER NOT NULL PRIMARY KEY, "codigo" VARCHAR(50) NOT NULL,
+    "nome" VARCHAR(200) NOT NULL, "descricao" TEXT, "categoria_id" INTEGER,
+    "preco_custo" DECIMAL(10, 2) NOT NULL, "preco_venda" DECIMAL(10, 2) NOT NULL,
+    "estoque_atual" INTEGER NOT NULL, "estoque_minimo" INTEGER NOT NULL,
+    "unidade_medida" VARCHAR(20) NOT NULL, "ativo" INTEGER NOT NULL,
+    "criado_em" DATETIME NOT NULL, "atualizado_em" DATETIME NOT NULL,
+    FOREIGN KEY ("categoria_id") REFERENCES "categorias" ("id"));
+CREATE UNIQUE INDEX "produto_codigo" ON "produtos" ("codigo");
+CREATE TABLE "itens_venda" ("id" INTEGER NOT NULL PRIMARY KEY, "venda_id" INTEGER NOT NULL,
+    "produto_id" INTEGER NOT NULL, "quantidade" INTEGER NOT NULL,
+    "preco_unitario" DECIMAL(10, 2) NOT NULL, "subtotal" DECIMAL(10, 2) NOT NULL,
+    FOREIGN KEY ("venda_id") REFERENCES "vendas" ("id"),
+    FOREIGN KEY ("produto_id") REFERENCES "produtos" ("id"));
+CREATE TABLE "movimentacoes_estoque" ("id" INTEGER NOT NULL PRIMARY KEY,
+    "produto_id" INTEGER NOT NULL, "tipo" VARCHAR(20) NOT NULL, "quantidade" INTEGER NOT NULL,
+    "estoque_anterior" INTEGER NOT NULL, "estoque_atual" INTEGER NOT NULL,
+    "motivo" VARCHAR(100) NOT NULL, "observacoes" TEXT, "data_movimentacao" DATETIME NOT NULL,
+    FOREIGN KEY ("produto_id") REFERENCES "produtos" ("id"));
+
+INSERT INTO categorias VALUES (1, 'Bebidas', NULL, 1, '2024-01-01 08:00:00');
+INSERT INTO produtos VALUES (1, 'P1', 'Suco', NULL, 1, '2.50', '4.99', 10, 2, 'UN', 1,
+    '2024-01-01 08:00:00', '2024-01-01 08:00:00');
+INSERT INTO clientes VALUES (1, 'Ana Souza', '123.456.789-09', NULL, '(11) 99999-0000', NULL, 1,
+    '2024-01-01 08:00:00');
+INSERT INTO vendas VALUES (1, 'V1', 1, '2024-01-02 10:00:00', '9.98', '0.50', '9.48',
+    'dinheiro', 'finalizada', NULL, '2024-01-02 10:00:00');
+INSERT INTO itens_venda VALUES (1, 1, 1, 2, '4.99', '9.98');
+INSERT INTO movimentacoes_estoque VALUES (1, 1, 'entrada', 10, 0, 10, 'Compra', NULL,
+    '2024-01-01 08:00:00');
+'''
+
+
+@pytest.fixture
+def banco_v0(tmp_path):
+    caminho = str(tmp_path / 'v0.db')
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript(ESQUEMA_V0)
+    conexao.close()
+    db.init(caminho)
+    db.connect()
+    yield db
+    db.close()
+
+
+def _valores(banco):
+    return {
+        'produto': banco.execute_sql(
+            'SELECT preco_custo, preco_venda FROM produtos').fetchone(),
+        'venda': banco.execute_sql(
+            'SELECT valor_total, desconto, valor_final FROM vendas').fetchone(),
+        'item': banco.execute_sql(
+            'SELECT preco_unitario, subtotal FROM itens_venda').fetchone(),
+    }
+
+
+def test_migra_banco_v0(banco_v0):
+    preparar_esquema()
+    
+    assert banco_v0.pragma('user_version') == VERSAO_ESQUEMA
+    assert _valores(banco_v0) == {
+        'produto': (250, 499),
+        'venda': (998, 50, 948),
+        'item': (499, 998),
+    }
+    # Chaves de busca, resumo de compras e estoque por local
+    assert banco_v0.execute_sql(
+        'SELECT chave_documento, chave_telefone FROM clientes').fetchone() == \
+        ('12345678909', '11999990000')
+    assert banco_v0.execute_sql(
+        'SELECT termo FROM clientes_termos ORDER BY termo').fetchall() == [('ana',), ('souza',)]
+    assert banco_v0.execute_sql(
+        'SELECT quantidade_compras, valor_total FROM clientes_resumo').fetchone() == (1, 948)
+    assert banco_v0.execute_sql(
+        'SELECT local_id, quantidade FROM estoque_locais').fetchall() == [(LOCAL_PADRAO, 10)]
+    assert banco_v0.execute_sql(
+        'SELECT local_id FROM movimentacoes_estoque').fetchone() == (LOCAL_PADRAO,)
+
+
+def test_migrar_de_novo_nao_altera_valores(banco_v0):
+    preparar_esquema()
+    antes = _valores(banco_v0)
+    preparar_esquema()
+    assert _valores(banco_v0) == antes
+
+
+def test_falha_no_meio_nao_converte_centavos_duas_vezes(banco_v0, monkeypatch):
+    def falhar(database):
+        raise RuntimeError('falha simulada')
+    
+    monkeypatch.setattr(database, '_migrar_resumo_clientes', falhar)
+    with pytest.raises(RuntimeError):
+        preparar_esquema()
+    # Passos concluídos ficam gravados com a versão; o que falhou, não
+    assert banco_v0.pragma('user_version') == 2
+    assert not banco_v0.table_exists('clientes_resumo') or not banco_v0.execute_sql(
+        'SELECT COUNT(*) FROM clientes_resumo').fetchone()[0]
+    
+    monkeypatch.undo()
+    preparar_esquema()
+    assert banco_v0.pragma('user_version') == VERSAO_ESQUEMA
+    assert _valores(banco_v0)['produto'] == (250, 499)
+    assert banco_v0.execute_sql(
+        'SELECT valor_total FROM clientes_resumo').fetchone() == (948,)
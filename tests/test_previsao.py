@@ -0,0 +1,49 @@
+"""Previsão de demanda a partir das saídas de estoque"""
+from datetime import date, datetime
+import pytest
+from models.database import MovimentacaoEstoque, PrevisaoReposicao, Produto
+from utils import previsao, relatorios
+from utils.dinheiro import Dinheiro
+
+REFERENCIA = date(2024, 6, 30)
+
+
+def _saida(produto_id, dia, quantidade):
+    MovimentacaoEstoque.create(produto=produto_id, tipo='saida', quantidade=quantidade,
+                               estoque_anterior=100, estoque_atual=100 - quantidade,
+                               motivo='Venda',
+                               data_movimentacao=datetime.combine(dia, datetime.min.time()))
+
+
+def test_media_parte_de_zero_no_inicio_do_historico(banco):
+    produto = Produto.create(codigo='A', nome='a', preco_custo=Dinheiro(0),
+                             preco_venda=Dinheiro(0))
+    _saida(produto.id, REFERENCIA, 10)
+    
+    assert previsao.executar(processos=1, janela=9, data_referencia=REFERENCIA) == 1
+    
+    alfa = 2 / (9 + 1)
+    previsto = PrevisaoReposicao.get_by_id(produto.id)
+    # Uma única venda no último dia pesa alfa, não a demanda inteira
+    assert previsto.demanda_diaria == pytest.approx(alfa * 10, abs=1e-4)
+
+
+def test_banco_com_caracteres_especiais_no_caminho(banco, tmp_path):
+    produto = Produto.create(codigo='A', nome='a', preco_custo=Dinheiro(0),
+                             preco_venda=Dinheiro(0))
+    _saida(produto.id, REFERENCIA, 5)
+    banco.close()
+    caminho = tmp_path / 'pasta com espaço #1'
+    caminho.mkdir()
+    destino = caminho / 'banco?.db'
+    (tmp_path / 'teste.db').rename(destino)
+    banco.init(str(destino))
+    
+    assert previsao.executar(processos=1, data_referencia=REFERENCIA) == 1
+    
+    pool = relatorios.PoolLeitura(str(destino), tamanho=1)
+    try:
+        with pool.instantaneo() as conexao:
+            assert conexao.execute('SELECT COUNT(*) FROM produtos').fetchone() == (1,)
+    finally:
+        pool.fechar()
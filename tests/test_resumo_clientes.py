@@ -0,0 +1,87 @@
+"""Gatilhos que mantêm clientes_resumo a cada venda"""
+import random
+from datetime import datetime, timedelta
+from models.database import Cliente, Venda, ResumoCliente, reconstruir_resumo_clientes
+from utils.dinheiro import Dinheiro
+
+INICIO = datetime(2024, 1, 1)
+
+
+def _venda(numero, cliente, dias, valor, status='finalizada'):
+    return Venda.create(numero_venda=numero, cliente=cliente, forma_pagamento='dinheiro',
+                        data_venda=INICIO + timedelta(days=dias), valor_total=Dinheiro(valor),
+                        valor_final=Dinheiro(valor), status=status)
+
+
+def _resumos(banco):
+    # Clientes que ficaram sem compras mantêm a linha zerada; a reconstrução não
+    return banco.execute_sql('''
+        SELECT cliente_id, primeira_compra, ultima_compra, quantidade_compras, valor_total
+        FROM clientes_resumo WHERE quantidade_compras > 0 ORDER BY cliente_id
+    ''').fetchall()
+
+
+def test_venda_soma_no_resumo(banco):
+    cliente = Cliente.create(nome='Ana')
+    _venda('V1', cliente, 5, 1000)
+    _venda('V2', cliente, 1, 500)
+    _venda('V3', None, 2, 700)
+    
+    resumo = ResumoCliente.get_by_id(cliente.id)
+    assert resumo.quantidade_compras == 2
+    assert resumo.valor_total == Dinheiro(1500)
+    assert resumo.primeira_compra == INICIO + timedelta(days=1)
+    assert resumo.ultima_compra == INICIO + timedelta(days=5)
+    assert resumo.ticket_medio == Dinheiro(750)
+
+
+def test_cancelar_retira_do_resumo(banco):
+    cliente = Cliente.create(nome='Ana')
+    _venda('V1', cliente, 1, 500)
+    venda = _venda('V2', cliente, 5, 1000)
+    
+    Venda.update(status='cancelada').where(Venda.id == venda.id).execute()
+    
+    resumo = ResumoCliente.get_by_id(cliente.id)
+    assert (resumo.quantidade_compras, resumo.valor_total) == (1, Dinheiro(500))
+    assert resumo.ultima_compra == INICIO + timedelta(days=1)
+
+
+def test_trocar_cliente_move_a_venda(banco):
+    ana = Cliente.create(nome='Ana')
+    bia = Cliente.create(nome='Bia')
+    venda = _venda('V1', ana, 1, 500)
+    
+    Venda.update(cliente=bia).where(Venda.id == venda.id).execute()
+    
+    assert ResumoCliente.get_by_id(ana.id).quantidade_compras == 0
+    assert ResumoCliente.get_by_id(bia.id).valor_total == Dinheiro(500)
+
+
+def test_gatilhos_igualam_a_reconstrucao(banco):
+    rnd = random.Random(7)
+    clientes = [Cliente.create(nome=f'Cliente {i}') for i in range(5)]
+    vendas = []
+    
+    for i in range(300):
+        operacao = rnd.random()
+        if operacao < 0.5 or not vendas:
+            vendas.append(_venda(f'V{i}', rnd.choice(clientes + [None]), rnd.randint(0, 60),
+                                 rnd.randint(100, 10000),
+                                 rnd.choice(['finalizada'] * 9 + ['cancelada'])))
+        elif operacao < 0.8:
+            venda = rnd.choice(vendas)
+            campos = rnd.choice([
+                {'status': rnd.choice(['finalizada', 'cancelada'])},
+                {'valor_final': Dinheiro(rnd.randint(100, 10000))},
+                {'cliente': rnd.choice(clientes + [None])},
+                {'data_venda': INICIO + timedelta(days=rnd.randint(0, 60))},
+            ])
+            Venda.update(**campos).where(Venda.id == venda.id).execute()
+        else:
+            venda = vendas.pop(rnd.randrange(len(vendas)))
+            Venda.delete().where(Venda.id == venda.id).execute()
+    
+    pelos_gatilhos = _resumos(banco)
+    reconstruir_resumo_clientes()
+    assert pelos_gatilhos == _resumos(banco)
@@ -0,0 +1,117 @@
+"""Sincronização de um caixa com a base central (outro arquivo SQLite)"""
+import pytest
+from controllers.cliente_controller import ClienteController
+from controllers.produto_controller import ProdutoController
+from models.database import (Categoria, Produto, Cliente, Venda, ItemVenda, EstoqueLocal,
+                             MovimentacaoEstoque, MODELOS, LOCAL_PADRAO, indexar_cliente)
+from utils.dinheiro import Dinheiro
+from utils.sincronizacao import Sincronizador
+
+
+@pytest.fixture
+def sincronizador(banco, tmp_path):
+    sincronizador = Sincronizador(str(tmp_path / 'central.db'), identificador='caixa1')
+    yield sincronizador
+    sincronizador.fechar()
+
+
+def _na_central(sincronizador):
+    """Contexto em que os modelos consultam a base central"""
+    return sincronizador.db_central.bind_ctx(MODELOS)
+
+
+def _produto(codigo, estoque=0, **dados):
+    sucesso, mensagem, produto = ProdutoController.criar(
+        dict(dados, codigo=codigo, nome=codigo, preco_custo=2, preco_venda=5,
+             estoque_atual=estoque))
+    assert sucesso, mensagem
+    return produto.id
+
+
+def _venda(numero, cliente_id, produto_id, quantidade):
+    venda = Venda.create(numero_venda=numero, cliente=cliente_id, forma_pagamento='dinheiro',
+                         valor_total=Dinheiro(500 * quantidade),
+                         valor_final=Dinheiro(500 * quantidade))
+    ItemVenda.create(venda=venda, produto=produto_id, quantidade=quantidade,
+                     preco_unitario=Dinheiro(500), subtotal=Dinheiro(500 * quantidade))
+    return venda.id
+
+
+def test_enviar_vendas(sincronizador):
+    # Mesmo CPF, com outra formatação, já cadastrado na base central
+    with _na_central(sincronizador):
+        cliente_central = Cliente.insert(nome='Ana', cpf_cnpj='12345678900').execute()
+        indexar_cliente(cliente_central, 'Ana', '12345678900', None,
+                        database=sincronizador.db_central)
+        Produto.create(codigo='Z', nome='z', preco_custo=1.0, preco_venda=1.0)
+    
+    sucesso, mensagem, cliente = ClienteController.criar(
+        {'nome': 'Ana', 'cpf_cnpj': '123.456.789-00'})
+    assert sucesso, mensagem
+    produto_id = _produto('A')
+    _venda('V1', cliente.id, produto_id, 2)
+    _venda('V2', None, produto_id, 1)
+    
+    assert sincronizador.enviar_vendas() == 2
+    assert sincronizador.enviar_vendas() == 0
+    
+    with _na_central(sincronizador):
+        assert Cliente.select().count() == 1
+        produto_central = Produto.get(Produto.codigo == 'A')
+        vendas = {venda.numero_venda: venda for venda in Venda.select()}
+        assert vendas['V1'].cliente_id == cliente_central
+        assert vendas['V2'].cliente_id is None
+        assert [(item.produto_id, item.quantidade) for item in vendas['V1'].itens] == \
+            [(produto_central.id, 2)]
+
+
+def test_enviar_movimentacoes(sincronizador):
+    produto_id = _produto('A', 10)
+    sucesso, mensagem = ProdutoController.ajustar_estoque(produto_id, -3, 'saida', 'Venda')
+    assert sucesso, mensagem
+    
+    assert sincronizador.enviar_movimentacoes() == 2
+    assert sincronizador.enviar_movimentacoes() == 0
+    
+    with _na_central(sincronizador):
+        produto = Produto.get(Produto.codigo == 'A')
+        assert produto.estoque_atual == 7
+        assert EstoqueLocal.get_by_id((LOCAL_PADRAO, produto.id)).quantidade == 7
+        assert MovimentacaoEstoque.select().count() == 2
+
+
+def test_receber_catalogo_completo_e_incremental(sincronizador):
+    with _na_central(sincronizador):
+        bebidas = Categoria.create(nome='Bebidas')
+        for i in range(4):
+            Produto.create(codigo=f'P{i}', nome='Suco', categoria=bebidas,
+                           preco_custo=1.0, preco_venda=2.0)
+    
+    # Primeiro recebimento: todo o catálogo (categoria, local padrão e produtos)
+    assert sincronizador.receber_catalogo() == 6
+    assert Produto.select().count() == 4
+    assert {produto.categoria.nome for produto in Produto.select()} == {'Bebidas'}
+    
+    with _na_central(sincronizador):
+        Produto.update(nome='Suco de uva').where(Produto.codigo.in_(['P1', 'P2'])).execute()
+    
+    # Só as linhas alteradas, uma única vez
+    assert sincronizador.receber_catalogo() == 2
+    assert sincronizador.receber_catalogo() == 0
+    assert sorted(produto.codigo for produto in
+                  Produto.select().where(Produto.nome == 'Suco de uva')) == ['P1', 'P2']
+
+
+def test_sincronizar_de_novo_nao_repete_nada(sincronizador):
+    produto_id = _produto('A', 10)
+    _venda('V1', None, produto_id, 1)
+    
+    sucesso, mensagem = sincronizador.sincronizar()
+    assert sucesso, mensagem
+    assert sincronizador.sincronizar() == (
+        True, "Sincronização concluída: 0 vendas e 0 movimentações enviadas, "
+              "0 registros do catálogo recebidos")
+    
+    with _na_central(sincronizador):
+        assert Venda.select().count() == 1
+        assert Produto.get(Produto.codigo == 'A').estoque_atual == 10